@@ -66,6 +66,8 @@ def run_linters(fix_mode: bool = False) -> bool:
     # Only target script directories to preserve functionality
     script_patterns = [
         "../scripts/archive_templates/*.py",
+        "../scripts/benchmark/*.py",
+        "../scripts/common/*.py",
         "../scripts/create_groups/*.py",
         "../scripts/create_sites/*.py",
         "../scripts/delete_actions/*.py",
@@ -76,6 +78,7 @@ def run_linters(fix_mode: bool = False) -> bool:
         "../scripts/fetch_issues/*.py",
         "../scripts/get_public_issue_links/*.py",
         "../scripts/get_sites_without_activity/*.py",
+        "../scripts/mock_api_server/*.py",
         "../scripts/set_inspection_site/*.py",
         "../scripts/update_user_sites/*.py"
     ]
@@ -1,25 +1,63 @@
+import asyncio
+import json
+import os
+import sys
+
 import pandas as pd
-import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.api_client import ApiClient, ApiError, run_bounded  # noqa: E402
+from common.journal import OperationJournal, journal_path  # noqa: E402
 
 TOKEN = ''  # Add your API token here
+MAX_CONCURRENCY = 10  # Archive requests in flight at once
+INPUT_FILE = 'input.csv'
+# Archived templates, so a rerun skips them; one journal per script and input file
+JOURNAL_FILE = journal_path(__file__, INPUT_FILE)
+
+
+async def archive_template(client, journal, template_id):
+    key = str(template_id)
+    if journal.is_done(key):
+        return journal.result(key)
+    try:
+        result = json.dumps(
+            await client.post(
+                f"/templates/v1/templates/{template_id}/archive", idempotent=True
+            )
+        )
+    except ApiError as err:
+        journal.fail(key, error=str(err))
+        return str(err)
+    journal.complete(key, result=result)
+    return result
+
+
+async def archive_templates(templates, journal):
+    output = [None] * len(templates)
+    async with ApiClient(TOKEN, max_concurrency=MAX_CONCURRENCY) as client:
 
+        async def archive_row(index, row):
+            template_id = row.get('template_id', row)
+            output[index] = {
+                "template_id": template_id,
+                "result": await archive_template(client, journal, template_id),
+            }
 
-def archive_template(template_id):
-    url = f"https://api.safetyculture.io/templates/v1/templates/{template_id}/archive"
-    headers = {"authorization": f"Bearer {TOKEN}"}
-    return requests.post(url, headers=headers).text
+        await run_bounded(archive_row, templates, MAX_CONCURRENCY)
+    return output
 
 
 def main():
-    templates = pd.read_csv('input.csv').fillna('').to_dict('records')
-    output = [
-        {
-            "template_id": row.get('template_id', row),
-            "result": archive_template(row.get('template_id', row)),
-        }
-        for row in templates
-    ]
+    templates = pd.read_csv(INPUT_FILE).fillna('').to_dict('records')
+    journal = OperationJournal(JOURNAL_FILE, input_file=INPUT_FILE)
+    if journal.moved_to:
+        print(f"{INPUT_FILE} changed, moved the old journal to {journal.moved_to}")
+    if journal.resumed:
+        print(f"Resuming from {JOURNAL_FILE}: {journal.summary()}")
+    output = asyncio.run(archive_templates(templates, journal))
     pd.DataFrame(output).to_csv('log_output.csv', index=False)
+    journal.finish()
 
 
 main()
@@ -0,0 +1,471 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the scripts
+
+Runs each script end to end against the local mock API server on synthetic
+datasets (1K, 100K and 1M records by default) and records requests per
+second, p50/p99 request latency, processing time, peak RSS and output bytes.
+Results are saved as JSON named after the current commit, so two runs can be
+compared with --compare.
+
+Usage:
+    python main.py
+    python main.py --sizes 1k 100k --scripts fetch_issues create_groups
+    python main.py --compare results/before.json results/after.json
+"""
+
+import argparse
+import asyncio
+import csv
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from aiohttp import web
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.dirname(BENCHMARK_DIR)
+RESULTS_DIR = os.path.join(BENCHMARK_DIR, "results")
+RUNNER = os.path.join(BENCHMARK_DIR, "run_script.py")
+
+DATASET_SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+# Per-script seconds before a run is stopped and recorded as timed out
+DEFAULT_TIMEOUT = 3 * 3600
+# The scripts' own rate limiters would otherwise dominate every measurement
+BENCHMARK_REQUESTS_PER_SECOND = 100_000
+
+
+def load_mock_server():
+    """Import scripts/mock_api_server/main.py (every script module is named main)"""
+    path = os.path.join(SCRIPTS_DIR, "mock_api_server", "main.py")
+    spec = importlib.util.spec_from_file_location("mock_api_server", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+mock = load_mock_server()
+
+
+# Synthetic input.csv rows for the scripts that read one, drawn from the same
+# dataset the mock server serves so IDs resolve
+
+
+def template_rows(api, records: int) -> Iterator[Dict]:
+    for index in range(records):
+        yield {"template_id": mock.feed_id("template", 7, index)}
+
+
+def group_rows(api, records: int) -> Iterator[Dict]:
+    for index in range(records):
+        yield {"name": f"Benchmark group {index}"}
+
+
+def site_rows(api, records: int) -> Iterator[Dict]:
+    # A ten-way tree with parents referenced by name, so every depth level
+    # of create_sites' hierarchical mode is exercised
+    for index in range(records):
+        parent = f"Benchmark site {(index - 1) // 10}" if index else ""
+        yield {"name": f"Benchmark site {index}", "parent": parent, "meta_label": ""}
+
+
+def folder_rows(api, records: int) -> Iterator[Dict]:
+    for index in range(api.config.sites):
+        yield {"siteId": api.folder(index)["id"]}
+
+
+def inspection_site_rows(api, records: int) -> Iterator[Dict]:
+    for index in range(records):
+        yield {
+            "audit_id": api.inspection(index)["id"],
+            "site_id": api.folder(index % api.config.sites)["id"],
+        }
+
+
+def issue_rows(api, records: int) -> Iterator[Dict]:
+    for index in range(records):
+        yield {"issue_id": api.issue(index)["task_id"]}
+
+
+def action_rows(api, records: int) -> Iterator[Dict]:
+    for index in range(records):
+        yield {"id": mock.record_uuid(1, index)}
+
+
+def asset_rows(api, records: int) -> Iterator[Dict]:
+    for index in range(records):
+        yield {"asset_id": mock.record_uuid(8, index)}
+
+
+class Workload:
+    """How to run one script: its input rows, arguments and stdin"""
+
+    def __init__(
+        self,
+        script: str,
+        rows: Optional[Callable] = None,
+        args: Tuple[str, ...] = (),
+        stdin: str = "",
+    ):
+        self.script = script
+        self.rows = rows
+        self.args = list(args)
+        self.stdin = stdin
+
+
+# Read-only scripts first, so they see the dataset before the mutating ones
+# change it. update_user_sites sends every row in a single upsert job and is
+# not a throughput workload, so it is left out.
+WORKLOADS = [
+    Workload("fetch_issues"),
+    Workload("get_sites_without_activity"),
+    Workload("export_template_access_rules"),
+    Workload("export_asset_types"),
+    Workload("archive_templates", template_rows),
+    Workload("create_groups", group_rows),
+    Workload("create_sites", site_rows),
+    Workload("set_inspection_site", inspection_site_rows),
+    Workload("get_public_issue_links", issue_rows),
+    Workload("delete_actions", action_rows),
+    Workload(
+        "delete_assets",
+        asset_rows,
+        args=("--concurrency", "10", "--max-rps", "0"),
+        stdin="yes\n",
+    ),
+    Workload("delete_sites", folder_rows),
+]
+
+
+def write_input(path: str, rows: Iterator[Dict]) -> int:
+    writer = None
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        for row in rows:
+            if writer is None:
+                writer = csv.DictWriter(f, fieldnames=list(row))
+                writer.writeheader()
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def directory_bytes(path: str, exclude: Tuple[str, ...] = ()) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            file_path = os.path.join(root, name)
+            if file_path not in exclude:
+                total += os.path.getsize(file_path)
+    return total
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class MockServerThread:
+    """Mock API server on its own event loop thread, so scripts run as subprocesses"""
+
+    def __init__(self, config):
+        self.app = mock.build_app(config)
+        self.api = self.app["api"]
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.loop = asyncio.new_event_loop()
+        self.runner = None
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self.start(), self.loop).result()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+    async def start(self):
+        self.runner = web.AppRunner(self.app, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, "127.0.0.1", self.port).start()
+
+
+def run_workload(
+    workload: Workload, server: MockServerThread, records: int, work_dir: str, timeout
+) -> Dict:
+    """Run one script in a fresh directory and collect its metrics"""
+    script_dir = os.path.join(work_dir, workload.script)
+    shutil.rmtree(script_dir, ignore_errors=True)
+    os.makedirs(script_dir)
+    input_path = os.path.join(script_dir, "input.csv")
+    rows = None
+    if workload.rows is not None:
+        rows = write_input(input_path, workload.rows(server.api, records))
+
+    env = dict(
+        os.environ,
+        SC_API_BASE_URL=server.url,
+        SC_REQUESTS_PER_SECOND=str(BENCHMARK_REQUESTS_PER_SECOND),
+        SC_FEED_CHECKPOINTS=os.path.join(script_dir, "feed_checkpoints.db"),
+        PYTHONUNBUFFERED="1",
+    )
+    metrics_path = os.path.join(work_dir, f"{workload.script}.metrics.json")
+    log_path = os.path.join(work_dir, f"{workload.script}.log")
+    command = [
+        sys.executable,
+        RUNNER,
+        os.path.join(SCRIPTS_DIR, workload.script, "main.py"),
+        metrics_path,
+    ] + workload.args
+
+    server.api.reset_stats()
+    timed_out = False
+    started = time.perf_counter()
+    with open(log_path, "w", encoding="utf-8") as log:
+        try:
+            subprocess.run(
+                command,
+                cwd=script_dir,
+                env=env,
+                input=workload.stdin,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+                text=True,
+                timeout=timeout,
+            )
+        except subprocess.TimeoutExpired:
+            timed_out = True
+    elapsed = time.perf_counter() - started
+
+    metrics = {}
+    if os.path.exists(metrics_path):
+        with open(metrics_path, encoding="utf-8") as f:
+            metrics = json.load(f)
+    wall = metrics.get("wall_seconds", elapsed)
+    requests = server.api.stats["requests"]
+    errors = sum(
+        count
+        for key, count in server.api.stats.items()
+        if key != "requests" and int(key.rsplit(" ", 1)[1]) >= 400
+    )
+    return {
+        "script": workload.script,
+        "records": records,
+        "input_rows": rows,
+        "exit_code": metrics.get("exit_code"),
+        "timed_out": timed_out,
+        "wall_seconds": round(wall, 3),
+        "processing_seconds": round(metrics.get("cpu_seconds", 0.0), 3),
+        "requests": requests,
+        "error_responses": errors,
+        "requests_per_second": round(requests / wall, 1) if wall else None,
+        "latency_p50_ms": round_or_none(server.api.latency_percentile(50)),
+        "latency_p99_ms": round_or_none(server.api.latency_percentile(99)),
+        "peak_rss_bytes": metrics.get("peak_rss_bytes"),
+        "output_bytes": directory_bytes(script_dir, exclude=(input_path,)),
+    }
+
+
+def round_or_none(value: Optional[float], digits: int = 3) -> Optional[float]:
+    return None if value is None else round(value, digits)
+
+
+def git_revision() -> Dict:
+    def git(*args):
+        result = subprocess.run(
+            ["git", *args], cwd=SCRIPTS_DIR, capture_output=True, text=True
+        )
+        return result.stdout.strip() if result.returncode == 0 else None
+
+    status = git("status", "--porcelain", "--untracked-files=no")
+    return {
+        "commit": git("rev-parse", "HEAD"),
+        "subject": git("log", "-1", "--format=%s"),
+        "dirty": bool(status),
+    }
+
+
+def print_result(result: Dict):
+    status = "TIMEOUT" if result["timed_out"] else f"exit {result['exit_code']}"
+    rss = (result["peak_rss_bytes"] or 0) / 1024 / 1024
+    print(
+        f"  {result['script']:<30} {status:<8} {result['wall_seconds']:>9.2f}s "
+        f"{result['requests']:>9} req {result['requests_per_second'] or 0:>9.1f} req/s "
+        f"p50 {result['latency_p50_ms'] or 0:>7.2f}ms "
+        f"p99 {result['latency_p99_ms'] or 0:>7.2f}ms "
+        f"cpu {result['processing_seconds']:>8.2f}s rss {rss:>7.1f}MB "
+        f"out {result['output_bytes']:>12}B"
+    )
+
+
+def run_benchmarks(args) -> Dict:
+    workloads = [w for w in WORKLOADS if not args.scripts or w.script in args.scripts]
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "git": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "mock": {
+            "page_size": args.page_size,
+            "latency": args.latency,
+            "throttle_rate": args.throttle_rate,
+        },
+        "results": [],
+    }
+    work_root = args.work_dir or tempfile.mkdtemp(prefix="sc-benchmark-")
+    try:
+        for size in args.sizes:
+            records = DATASET_SIZES[size]
+            print(f"\nDataset {size} ({records:,} records)")
+            config = mock.MockConfig(
+                records=records,
+                page_size=args.page_size,
+                latency=args.latency,
+                throttle_rate=args.throttle_rate,
+            )
+            # One server per dataset; later workloads see earlier mutations
+            with MockServerThread(config) as server:
+                work_dir = os.path.join(work_root, size)
+                for workload in workloads:
+                    result = run_workload(
+                        workload, server, records, work_dir, args.timeout
+                    )
+                    report["results"].append(result)
+                    print_result(result)
+    finally:
+        if args.keep_work:
+            print(f"\nScript outputs and logs kept in {work_root}")
+        else:
+            shutil.rmtree(work_root, ignore_errors=True)
+    return report
+
+
+def results_path(report: Dict) -> str:
+    commit = (report["git"]["commit"] or "nogit")[:10]
+    if report["git"]["dirty"]:
+        commit += "-dirty"
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    return os.path.join(RESULTS_DIR, f"{stamp}-{commit}.json")
+
+
+COMPARED_METRICS = [
+    "wall_seconds",
+    "requests_per_second",
+    "latency_p50_ms",
+    "latency_p99_ms",
+    "processing_seconds",
+    "peak_rss_bytes",
+    "output_bytes",
+]
+
+
+def compare(baseline_path: str, candidate_path: str):
+    """Print the change of every metric between two result files"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(candidate_path, encoding="utf-8") as f:
+        candidate = json.load(f)
+    print(f"Baseline:  {baseline['git']['commit']} {baseline['git']['subject']}")
+    print(f"Candidate: {candidate['git']['commit']} {candidate['git']['subject']}")
+
+    before = {(r["script"], r["records"]): r for r in baseline["results"]}
+    for result in candidate["results"]:
+        previous = before.get((result["script"], result["records"]))
+        if previous is None:
+            continue
+        print(f"\n{result['script']} ({result['records']:,} records)")
+        for metric in COMPARED_METRICS:
+            old, new = previous.get(metric), result.get(metric)
+            if old is None or new is None:
+                continue
+            change = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+            print(f"  {metric:<22} {old:>14} -> {new:>14}  {change}")
+
+
+def main():
+    """Parse command line arguments and run the benchmarks."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark the scripts end to end against the mock API server"
+    )
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        choices=list(DATASET_SIZES),
+        default=list(DATASET_SIZES),
+        help="Dataset sizes to run (default: 1k 100k 1m)",
+    )
+    parser.add_argument(
+        "--scripts",
+        nargs="+",
+        choices=[workload.script for workload in WORKLOADS],
+        help="Scripts to run (default: all)",
+    )
+    parser.add_argument(
+        "--page-size", type=int, default=100, help="Records per feed page (default 100)"
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.0,
+        help="Seconds the mock server adds to every response (default 0)",
+    )
+    parser.add_argument(
+        "--throttle-rate",
+        type=float,
+        default=0.0,
+        help="Share of requests the mock server answers with 429 (default 0)",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=DEFAULT_TIMEOUT,
+        help=f"Seconds before a script run is stopped (default {DEFAULT_TIMEOUT})",
+    )
+    parser.add_argument(
+        "--output", help="Results file (default: results/<commit>.json)"
+    )
+    parser.add_argument(
+        "--work-dir",
+        help="Directory for script inputs and outputs (default: a temp dir)",
+    )
+    parser.add_argument(
+        "--keep-work", action="store_true", help="Keep script outputs and logs"
+    )
+    parser.add_argument(
+        "--compare",
+        nargs=2,
+        metavar=("BASELINE", "CANDIDATE"),
+        help="Compare two results files instead of running",
+    )
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    report = run_benchmarks(args)
+    output = args.output or results_path(report)
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
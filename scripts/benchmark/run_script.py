@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Run one script for the benchmark harness and record its resource usage
+
+Usage:
+    python run_script.py <script main.py> <metrics.json> [script arguments...]
+
+The script runs in this process with a placeholder TOKEN (the mock server
+accepts any bearer token) and the current directory as its working directory.
+Wall time, CPU time, peak RSS and the exit code are written to metrics.json
+when it finishes, even if it raises.
+"""
+
+import json
+import re
+import resource
+import sys
+import time
+import traceback
+
+BENCHMARK_TOKEN = "benchmark-token"
+
+
+def peak_rss_bytes() -> int:
+    """Peak resident set size of this process (ru_maxrss is KiB on Linux)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def exit_code_of(error: SystemExit) -> int:
+    if error.code is None:
+        return 0
+    return error.code if isinstance(error.code, int) else 1
+
+
+def main():
+    script_path, metrics_path = sys.argv[1], sys.argv[2]
+    with open(script_path, encoding="utf-8") as f:
+        source = f.read()
+    # Scripts keep their token in a TOKEN = '' constant at the top
+    source = re.sub(
+        r"^TOKEN = (['\"])\1",
+        f"TOKEN = '{BENCHMARK_TOKEN}'",
+        source,
+        count=1,
+        flags=re.M,
+    )
+    sys.argv = [script_path] + sys.argv[3:]
+
+    exit_code = 0
+    wall_started = time.perf_counter()
+    cpu_started = time.process_time()
+    try:
+        exec(
+            compile(source, script_path, "exec"),
+            {"__name__": "__main__", "__file__": script_path},
+        )
+    except SystemExit as e:
+        exit_code = exit_code_of(e)
+    except BaseException:
+        traceback.print_exc()
+        exit_code = 1
+    finally:
+        metrics = {
+            "exit_code": exit_code,
+            "wall_seconds": time.perf_counter() - wall_started,
+            "cpu_seconds": time.process_time() - cpu_started,
+            "peak_rss_bytes": peak_rss_bytes(),
+        }
+        with open(metrics_path, "w", encoding="utf-8") as f:
+            json.dump(metrics, f)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Shared helpers for the SafetyCulture API scripts."""
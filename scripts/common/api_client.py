@@ -0,0 +1,198 @@
+"""
+Shared async HTTP client for the SafetyCulture API.
+
+Every script talks to the API through one pooled ``aiohttp`` session with
+keep-alive connections, gzip, DNS caching, a concurrency limit, a shared
+adaptive rate limiter and the same retry/backoff policy, instead of opening a
+new connection per request.
+"""
+
+import asyncio
+import json
+import random
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+import aiohttp
+
+from .config import API_BASE_URL
+from .rate_limiter import (
+    DEFAULT_REQUESTS_PER_SECOND,
+    AdaptiveRateLimiter,
+    retry_after_seconds,
+)
+
+DEFAULT_BASE_URL = API_BASE_URL
+
+# Responses worth retrying; anything else >= 400 fails immediately. 429s are
+# paced by the rate limiter, the rest use exponential backoff.
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Methods that are safe to send twice. Other requests (creates) are only
+# retried when the server cannot have applied them: a 429, or a connection
+# that was never established.
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+# Bulk requests that fail with these statuses were rejected because of the
+# IDs they carry (malformed, unknown or too many), so splitting the batch
+# isolates the bad ones
+REJECTED_IDS_STATUSES = {400, 404, 413, 422}
+# The token is missing, expired or lacks a permission: every request will fail
+AUTH_STATUSES = {401, 403}
+
+
+class ApiError(Exception):
+    """Raised when a request fails after all retries or with a non-retryable status."""
+
+    def __init__(self, message: str, status: Optional[int] = None, body: str = ""):
+        super().__init__(message)
+        self.status = status
+        self.body = body
+
+
+class ApiClient:
+    """Pooled async client shared by all scripts."""
+
+    def __init__(
+        self,
+        token: str,
+        base_url: str = DEFAULT_BASE_URL,
+        max_concurrency: int = 10,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        timeout: float = 60,
+        requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
+    ):
+        self.token = token
+        self.base_url = base_url.rstrip("/")
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter(requests_per_second)
+        self.session = None
+        self.semaphore = None
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(
+            limit=self.max_concurrency,
+            ttl_dns_cache=300,
+            use_dns_cache=True,
+            keepalive_timeout=30,
+        )
+        self.session = aiohttp.ClientSession(
+            headers={
+                "accept": "application/json",
+                "accept-encoding": "gzip, deflate",
+                "authorization": f"Bearer {self.token}",
+            },
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout, connect=10),
+        )
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self.session:
+            await self.session.close()
+
+    def url(self, path: str) -> str:
+        return path if path.startswith("http") else f"{self.base_url}{path}"
+
+    def retry_delay(self, attempt: int, retry_after: Optional[str]) -> float:
+        """Honor Retry-After when present, otherwise exponential backoff with jitter"""
+        seconds = retry_after_seconds(retry_after)
+        if seconds is not None:
+            return min(seconds, self.max_delay)
+        return min(
+            self.base_delay * (2**attempt) + random.uniform(0, 1), self.max_delay
+        )
+
+    async def request(
+        self, method: str, path: str, idempotent: Optional[bool] = None, **kwargs
+    ) -> Any:
+        """Send a request and return the decoded JSON body ({} when empty).
+
+        Idempotent requests (by default those in IDEMPOTENT_METHODS) retry
+        connection errors and RETRY_STATUSES. Others retry only a 429 or a
+        connection that never reached the server, since a timeout or 5xx may
+        come after the server already applied them. Raises ApiError once
+        retries are exhausted, on any other error status, or when a success
+        response is not valid JSON.
+        """
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+        url = self.url(path)
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            sent = True
+            await self.rate_limiter.acquire()
+            async with self.semaphore:
+                try:
+                    async with self.session.request(method, url, **kwargs) as response:
+                        status = response.status
+                        text = await response.text()
+                        headers = response.headers
+                        retry_after = headers.get("Retry-After")
+                    error = ApiError(
+                        f"{status} Error: {text} for url: {url}", status, text
+                    )
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    status = None
+                    # Only a failed connect proves the request never left
+                    sent = not isinstance(e, aiohttp.ClientConnectorError)
+                    error = ApiError(f"{type(e).__name__}: {e} for url: {url}")
+
+            if status is not None and status < 400:
+                self.rate_limiter.on_success(headers)
+                try:
+                    return json.loads(text) if text else {}
+                except ValueError:
+                    raise ApiError(
+                        f"{status} Invalid JSON response: {text[:200]} for url: {url}",
+                        status,
+                        text,
+                    )
+            if status is not None and status not in RETRY_STATUSES:
+                raise error
+            if not idempotent and status != 429 and sent:
+                raise error
+            if status == 429:
+                # Pause every worker sharing the limiter, not just this one
+                self.rate_limiter.on_throttle(retry_after_seconds(retry_after))
+            if attempt == self.max_retries:
+                raise error
+            if status != 429:
+                await asyncio.sleep(self.retry_delay(attempt, retry_after))
+
+    async def get(self, path: str, **kwargs) -> Any:
+        return await self.request("GET", path, **kwargs)
+
+    async def post(self, path: str, **kwargs) -> Any:
+        return await self.request("POST", path, **kwargs)
+
+    async def put(self, path: str, **kwargs) -> Any:
+        return await self.request("PUT", path, **kwargs)
+
+    async def patch(self, path: str, **kwargs) -> Any:
+        return await self.request("PATCH", path, **kwargs)
+
+    async def delete(self, path: str, **kwargs) -> Any:
+        return await self.request("DELETE", path, **kwargs)
+
+
+async def run_bounded(
+    func: Callable[[int, Any], Awaitable[Any]], items: Iterable, concurrency: int
+):
+    """Call func(index, item) for every item with at most `concurrency` in flight.
+
+    Workers pull from one shared iterator, so large inputs never create more
+    than `concurrency` pending coroutines.
+    """
+    iterator = iter(enumerate(items))
+
+    async def worker():
+        for index, item in iterator:
+            await func(index, item)
+
+    await asyncio.gather(*[worker() for _ in range(max(1, concurrency))])
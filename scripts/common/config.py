@@ -0,0 +1,17 @@
+"""
+Settings shared by every script.
+
+Set the ``SC_API_BASE_URL`` environment variable to point the scripts at a
+different API host, such as the local mock server in ``scripts/mock_api_server``,
+and ``SC_REQUESTS_PER_SECOND`` to change the starting request rate of the shared
+rate limiter.
+"""
+
+import os
+
+PRODUCTION_BASE_URL = "https://api.safetyculture.io"
+
+API_BASE_URL = os.environ.get("SC_API_BASE_URL", PRODUCTION_BASE_URL).rstrip("/")
+
+# Starting rate of the adaptive rate limiter; it still backs off on 429s
+REQUESTS_PER_SECOND = float(os.environ.get("SC_REQUESTS_PER_SECOND", 12))
@@ -0,0 +1,102 @@
+"""
+Size-bounded on-disk key/value cache.
+
+Entries live in a small SQLite database and can carry a version tag (such as a
+feed ``modified_at`` timestamp) and an optional expiry. Once the cache grows
+past ``max_entries`` the least recently used entries are evicted.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+
+class DiskCache:
+    """Thread-safe SQLite cache with version checks, TTL and LRU eviction."""
+
+    def __init__(
+        self, path: str, max_entries: int = 10000, ttl: Optional[float] = None
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                version TEXT,
+                value TEXT NOT NULL,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed_at);
+            """)
+        self.connection.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        with self.lock:
+            self.evict()
+            self.connection.commit()
+            self.connection.close()
+
+    def get(self, key: str, version: Optional[str] = None) -> Any:
+        """Return the cached value, or None if missing, stale or expired"""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT version, value, stored_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            now = time.time()
+            if (
+                row is None
+                or row[0] != version
+                or (self.ttl is not None and now - row[2] > self.ttl)
+            ):
+                self.misses += 1
+                return None
+            self.connection.execute(
+                "UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self.hits += 1
+            return json.loads(row[1])
+
+    def set(self, key: str, value: Any, version: Optional[str] = None):
+        """Store a JSON-serialisable value under key"""
+        now = time.time()
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO cache "
+                "(key, version, value, stored_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, version, json.dumps(value), now, now),
+            )
+            self.writes += 1
+            # Keep long runs bounded too, not just the cache left on disk
+            if self.writes % 1000 == 0:
+                self.evict()
+            self.connection.commit()
+
+    def evict(self):
+        """Drop expired entries and the least recently used ones over max_entries"""
+        if self.ttl is not None:
+            self.connection.execute(
+                "DELETE FROM cache WHERE stored_at < ?", (time.time() - self.ttl,)
+            )
+        (count,) = self.connection.execute("SELECT COUNT(*) FROM cache").fetchone()
+        if count > self.max_entries:
+            self.connection.execute(
+                "DELETE FROM cache WHERE key IN "
+                "(SELECT key FROM cache ORDER BY accessed_at LIMIT ?)",
+                (count - self.max_entries,),
+            )
@@ -0,0 +1,67 @@
+"""
+Index of records that already exist, fetched once before a bulk create.
+
+Create scripts look every input row up in this index before sending a POST,
+so rows that were created by an earlier (possibly interrupted) run, or by
+hand, are skipped locally instead of being created a second time. Folders
+are keyed by ``(parent_id, name)`` because the same site name may exist
+under different parents; groups are keyed by name.
+"""
+
+from typing import Dict, Hashable, Optional
+
+from .api_client import ApiClient
+
+FOLDERS_PAGE_SIZE = 1500
+
+
+class ExistingRecords:
+    """Hashed key -> ID index of records that exist in the organization."""
+
+    def __init__(self):
+        self.ids: Dict[Hashable, str] = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.ids
+
+    def add(self, key: Hashable, record_id: str):
+        # Keep the first ID when a key is listed twice
+        self.ids.setdefault(key, record_id)
+
+    def get(self, key: Hashable) -> Optional[str]:
+        return self.ids.get(key)
+
+
+def folder_key(parent_id: Optional[str], name: str) -> tuple:
+    return (parent_id or "", name)
+
+
+async def fetch_existing_folders(client: ApiClient) -> ExistingRecords:
+    """Index every directory folder by (parent_id, name)"""
+    existing = ExistingRecords()
+    params = {"page_size": FOLDERS_PAGE_SIZE}
+    while True:
+        response = await client.get("/directory/v1/folders", params=params)
+        for folder in response.get("folders", []):
+            existing.add(
+                folder_key(folder.get("parent_id"), folder["name"]), folder["id"]
+            )
+        page_token = response.get("next_page_token")
+        if not page_token:
+            return existing
+        params = {"page_size": FOLDERS_PAGE_SIZE, "page_token": page_token}
+
+
+async def fetch_existing_groups(client: ApiClient) -> ExistingRecords:
+    """Index every group in /feed/groups by name"""
+    existing = ExistingRecords()
+    url = "/feed/groups"
+    while url:
+        response = await client.get(url)
+        for group in response.get("data", []):
+            existing.add(group["name"], group["id"])
+        url = response.get("metadata", {}).get("next_page")
+    return existing
@@ -0,0 +1,155 @@
+"""
+Resumable checkpoints for long feed cursor chains.
+
+Each fetched page is saved together with the ``next_page`` cursor that
+follows it. If a chain stops on a failed request the checkpoint is kept, so
+the next run replays the saved pages and continues from the last good cursor
+instead of starting the feed over. Checkpoints are deleted once their chain
+completes. Set ``SC_FEED_CHECKPOINTS`` to keep the checkpoint database
+somewhere other than ``scripts/feed_checkpoints.db``.
+"""
+
+import json
+import os
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional
+
+DEFAULT_CHECKPOINT_PATH = os.environ.get(
+    "SC_FEED_CHECKPOINTS",
+    os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "..", "feed_checkpoints.db"
+    ),
+)
+
+# Feed cursors expire on the API side; older checkpoints are discarded
+DEFAULT_MAX_AGE = timedelta(hours=24)
+
+
+class FeedCheckpoint:
+    """SQLite-backed store of in-progress cursor chains and their pages."""
+
+    def __init__(
+        self, path: str = DEFAULT_CHECKPOINT_PATH, max_age: timedelta = DEFAULT_MAX_AGE
+    ):
+        self.path = path
+        self.max_age = max_age
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                name TEXT PRIMARY KEY,
+                origin TEXT NOT NULL,
+                next_url TEXT NOT NULL,
+                pages INTEGER NOT NULL,
+                records INTEGER NOT NULL,
+                updated_at TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS pages (
+                name TEXT NOT NULL,
+                page INTEGER NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (name, page)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS state (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            """)
+        self.connection.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def resume(self, name: str, origin: str) -> Optional[Dict]:
+        """Return the saved checkpoint of a chain, or None to start from scratch.
+
+        Args:
+            name: Stable name of the chain (e.g. the feed endpoint)
+            origin: First URL of the chain; a checkpoint saved for a different
+                origin or older than max_age is discarded
+
+        Returns:
+            Dict with next_url, pages and records, or None
+        """
+        row = self.connection.execute(
+            "SELECT origin, next_url, pages, records, updated_at FROM checkpoints "
+            "WHERE name = ?",
+            (name,),
+        ).fetchone()
+        if row is None:
+            return None
+        saved_origin, next_url, pages, records, updated_at = row
+        age = datetime.now(timezone.utc) - datetime.fromisoformat(updated_at)
+        if saved_origin != origin or age > self.max_age:
+            self.complete(name)
+            return None
+        return {"next_url": next_url, "pages": pages, "records": records}
+
+    def iter_pages(self, name: str) -> Iterator[List[Dict]]:
+        """Yield the saved pages of a chain in fetch order"""
+        cursor = self.connection.execute(
+            "SELECT data FROM pages WHERE name = ? ORDER BY page", (name,)
+        )
+        for (data,) in cursor:
+            yield json.loads(data)
+
+    def save_page(self, name: str, origin: str, records: List[Dict], next_url: str):
+        """Store a fetched page and the cursor to continue from, atomically"""
+        with self.connection:
+            row = self.connection.execute(
+                "SELECT pages, records FROM checkpoints WHERE name = ?", (name,)
+            ).fetchone()
+            pages, total = row if row else (0, 0)
+            self.connection.execute(
+                "INSERT OR REPLACE INTO pages (name, page, data) VALUES (?, ?, ?)",
+                (name, pages, json.dumps(records)),
+            )
+            self.connection.execute(
+                "INSERT OR REPLACE INTO checkpoints "
+                "(name, origin, next_url, pages, records, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    name,
+                    origin,
+                    next_url,
+                    pages + 1,
+                    total + len(records),
+                    datetime.now(timezone.utc).isoformat(),
+                ),
+            )
+
+    def complete(self, name: str):
+        """Drop the checkpoint of a chain that finished (or is being restarted)"""
+        with self.connection:
+            self.connection.execute("DELETE FROM pages WHERE name = ?", (name,))
+            self.connection.execute("DELETE FROM checkpoints WHERE name = ?", (name,))
+
+    def pending(self) -> List[str]:
+        """Names of chains that stopped before completing"""
+        cursor = self.connection.execute("SELECT name FROM checkpoints ORDER BY name")
+        return [name for (name,) in cursor]
+
+    def get_state(self, key: str) -> Optional[str]:
+        """Read a value saved alongside the checkpoints (e.g. a shard plan)"""
+        row = self.connection.execute(
+            "SELECT value FROM state WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def set_state(self, key: str, value: str):
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)", (key, value)
+            )
+
+    def clear_state(self, key: str):
+        with self.connection:
+            self.connection.execute("DELETE FROM state WHERE key = ?", (key,))
@@ -0,0 +1,208 @@
+"""
+Persistent local mirror of SafetyCulture feeds.
+
+Stores feed records in an indexed SQLite database together with a per-feed
+high-water mark, so scripts only need to request records modified since
+their previous run (``modified_after``) instead of re-downloading whole feeds.
+
+Deleted records never show up in an incremental fetch, so every
+``FULL_RESYNC_INTERVAL`` a sync downloads the whole feed instead and drops
+mirrored records it no longer contains. Records flagged as deleted in an
+incremental fetch are dropped straight away.
+"""
+
+import json
+import os
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+DEFAULT_MIRROR_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "feed_mirror.db"
+)
+
+# Watermarks are taken from the local clock when a sync starts; step them back
+# a little so records written while the sync was running are fetched again.
+WATERMARK_OVERLAP = timedelta(minutes=5)
+# How long incremental syncs run before the next full resync
+FULL_RESYNC_INTERVAL = timedelta(days=7)
+
+
+def is_tombstone(record: Dict) -> bool:
+    """Whether a feed record marks a deletion rather than a live record"""
+    return bool(record.get("deleted") or record.get("is_deleted"))
+
+
+def format_timestamp(value: datetime) -> str:
+    """Format a datetime the way the feed API expects for modified_after"""
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def parse_timestamp(value: str) -> datetime:
+    """Parse a watermark written by format_timestamp back into a datetime"""
+    return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%fZ").replace(
+        tzinfo=timezone.utc
+    )
+
+
+class FeedMirror:
+    """SQLite-backed store of feed records keyed by feed name and record ID."""
+
+    def __init__(self, path: str = DEFAULT_MIRROR_PATH):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS records (
+                feed TEXT NOT NULL,
+                record_id TEXT NOT NULL,
+                modified_at TEXT,
+                data TEXT NOT NULL,
+                PRIMARY KEY (feed, record_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS records_modified
+                ON records (feed, modified_at);
+            CREATE TABLE IF NOT EXISTS watermarks (
+                feed TEXT PRIMARY KEY,
+                modified_after TEXT NOT NULL,
+                synced_at TEXT NOT NULL,
+                full_synced_at TEXT
+            );
+            """)
+        columns = {
+            row[1] for row in self.connection.execute("PRAGMA table_info(watermarks)")
+        }
+        if "full_synced_at" not in columns:
+            # Mirrors created before full resyncs existed
+            self.connection.execute(
+                "ALTER TABLE watermarks ADD COLUMN full_synced_at TEXT"
+            )
+        self.connection.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def sync_started(self) -> datetime:
+        """Timestamp to store as the watermark once the current sync succeeds"""
+        return datetime.now(timezone.utc) - WATERMARK_OVERLAP
+
+    def get_watermark(self, feed: str) -> Optional[str]:
+        """Return the modified_after value for the next incremental fetch"""
+        row = self.connection.execute(
+            "SELECT modified_after FROM watermarks WHERE feed = ?", (feed,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def needs_full_resync(
+        self, feed: str, interval: timedelta = FULL_RESYNC_INTERVAL
+    ) -> bool:
+        """Whether the next sync should fetch the whole feed to drop deleted records"""
+        row = self.connection.execute(
+            "SELECT full_synced_at FROM watermarks WHERE feed = ?", (feed,)
+        ).fetchone()
+        if not row or not row[0]:
+            return True
+        return datetime.now(timezone.utc) - parse_timestamp(row[0]) >= interval
+
+    def set_watermark(self, feed: str, sync_started: datetime, full: bool = False):
+        """Record that every change before sync_started is in the mirror.
+
+        With full, the sync fetched the whole feed, which also restarts the
+        FULL_RESYNC_INTERVAL countdown.
+        """
+        self.connection.execute(
+            "INSERT OR REPLACE INTO watermarks "
+            "(feed, modified_after, synced_at, full_synced_at) VALUES (?, ?, ?, "
+            "COALESCE(?, (SELECT full_synced_at FROM watermarks WHERE feed = ?)))",
+            (
+                feed,
+                format_timestamp(sync_started),
+                format_timestamp(datetime.now(timezone.utc)),
+                format_timestamp(sync_started) if full else None,
+                feed,
+            ),
+        )
+        self.connection.commit()
+
+    def upsert_records(
+        self,
+        feed: str,
+        records: Iterable[Dict],
+        key: Callable[[Dict], str] = lambda record: record.get("id", ""),
+    ) -> int:
+        """Insert or replace records, keeping the latest copy of each ID.
+
+        Records flagged as deleted (see is_tombstone) are removed instead.
+        """
+        rows, removed = [], []
+        for record in records:
+            record_id = str(key(record))
+            if is_tombstone(record):
+                removed.append((feed, record_id))
+                continue
+            rows.append(
+                (feed, record_id, record.get("modified_at"), json.dumps(record))
+            )
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO records (feed, record_id, modified_at, data) "
+            "VALUES (?, ?, ?, ?)",
+            rows,
+        )
+        self.connection.executemany(
+            "DELETE FROM records WHERE feed = ? AND record_id = ?", removed
+        )
+        self.connection.commit()
+        return len(rows)
+
+    def replace_records(
+        self,
+        feed: str,
+        records: Iterable[Dict],
+        key: Callable[[Dict], str] = lambda record: record.get("id", ""),
+    ) -> int:
+        """Store the complete feed and drop mirrored records it no longer contains.
+
+        Only call this with every record of the feed. Returns the number of
+        records dropped.
+        """
+        records = list(records)
+        self.connection.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS seen_ids (record_id TEXT PRIMARY KEY)"
+        )
+        self.connection.execute("DELETE FROM seen_ids")
+        self.connection.executemany(
+            "INSERT OR IGNORE INTO seen_ids (record_id) VALUES (?)",
+            ((str(key(record)),) for record in records if not is_tombstone(record)),
+        )
+        removed = self.connection.execute(
+            "DELETE FROM records WHERE feed = ? "
+            "AND record_id NOT IN (SELECT record_id FROM seen_ids)",
+            (feed,),
+        ).rowcount
+        self.upsert_records(feed, records, key)
+        return removed
+
+    def iter_records(self, feed: str) -> Iterator[Dict]:
+        """Yield every mirrored record of a feed"""
+        cursor = self.connection.execute(
+            "SELECT data FROM records WHERE feed = ?", (feed,)
+        )
+        for (data,) in cursor:
+            yield json.loads(data)
+
+    def load_records(self, feed: str) -> List[Dict]:
+        """Return every mirrored record of a feed as a list"""
+        return list(self.iter_records(feed))
+
+    def count(self, feed: str) -> int:
+        row = self.connection.execute(
+            "SELECT COUNT(*) FROM records WHERE feed = ?", (feed,)
+        ).fetchone()
+        return row[0]
@@ -0,0 +1,209 @@
+"""
+Append-only write-ahead journal for bulk mutation scripts.
+
+Every operation is identified by an idempotency key (e.g. the asset ID being
+archived or the name of the group being created). Scripts append a ``done`` or
+``failed`` entry once a response is known. When an interrupted run is
+restarted, keys already marked ``done`` are skipped, so multi-hour runs resume
+where they stopped instead of re-sending every request from the first input
+row.
+
+Scripts whose requests are not safe to repeat (creates) also append a
+``begin`` entry before sending. A key with a ``begin`` but no outcome was in
+flight when the run stopped and may or may not have been applied, so those
+scripts report it instead of retrying it.
+
+The journal is a JSON Lines file, flushed after every append, and is removed
+by ``finish()`` once a run completes with nothing left to retry.
+
+Each script keeps one journal per input file (see ``journal_path``), so two
+scripts run from the same directory never share one. The journal also records
+a digest of the input it was started for; when the input has changed since,
+the old journal is moved aside and the run starts from a fresh one instead of
+skipping keys that belonged to a different input.
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+DEFAULT_JOURNAL_PATH = "journal.jsonl"
+
+
+def journal_path(script_file: str, input_file: str) -> str:
+    """Journal for one script and input file, kept next to the input.
+
+    ``scripts/create_sites/main.py`` run on ``input.csv`` journals to
+    ``create_sites.input.journal.jsonl``.
+    """
+    script = os.path.basename(os.path.dirname(os.path.abspath(script_file)))
+    input_dir, input_name = os.path.split(os.path.abspath(input_file))
+    stem = os.path.splitext(input_name)[0]
+    return os.path.join(input_dir, f"{script}.{stem}.journal.jsonl")
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def split_duplicates(
+    rows: Iterable[Any], key: Callable[[Any], Hashable]
+) -> Tuple[List[Tuple[int, Any]], List[Tuple[int, Any, int]]]:
+    """Separate rows whose key repeats an earlier row of the same input.
+
+    Returns the first row for every key as (index, row) and each repeat as
+    (index, row, index of the first row), so a run sends one request per key.
+    """
+    first: Dict[Hashable, int] = {}
+    unique = []
+    duplicates = []
+    for index, row in enumerate(rows):
+        first_index = first.setdefault(key(row), index)
+        if first_index == index:
+            unique.append((index, row))
+        else:
+            duplicates.append((index, row, first_index))
+    return unique, duplicates
+
+
+class OperationJournal:
+    """Durable record of which keyed operations have completed."""
+
+    def __init__(
+        self, path: str = DEFAULT_JOURNAL_PATH, input_file: Optional[str] = None
+    ):
+        self.path = path
+        self.results: Dict[str, Any] = {}
+        self.started = set()
+        self.failed = set()
+        self.input_digest = None
+        # Where a journal left by a run on a different input was moved to
+        self.moved_to: Optional[str] = None
+        digest = file_digest(input_file) if input_file else None
+        self.resumed = os.path.exists(path)
+        if self.resumed:
+            self.load()
+            if digest and self.input_digest and self.input_digest != digest:
+                self.move_aside()
+        # Keys a previous run left in doubt, as opposed to requests in flight now
+        self.interrupted = set(self.started)
+        self.file = open(path, "a", encoding="utf-8")
+        if digest and self.input_digest is None:
+            self.append([], "input", digest=digest)
+            self.input_digest = digest
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def load(self):
+        """Replay the journal file into the completed / in-flight key sets"""
+        with open(self.path, encoding="utf-8") as journal:
+            for line in journal:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A torn final line from a killed process
+                    continue
+                if entry["state"] == "input":
+                    self.input_digest = entry["digest"]
+                self.apply(entry["keys"], entry["state"], entry.get("result"))
+
+    def move_aside(self):
+        """Set the existing journal aside and start this run from an empty one"""
+        stamp = datetime.fromtimestamp(os.path.getmtime(self.path))
+        root, ext = os.path.splitext(self.path)
+        self.moved_to = f"{root}.{stamp:%Y%m%d_%H%M%S}{ext}"
+        os.replace(self.path, self.moved_to)
+        self.results.clear()
+        self.started.clear()
+        self.failed.clear()
+        self.input_digest = None
+        self.resumed = False
+
+    def apply(self, keys: Iterable[str], state: str, result: Any = None):
+        for key in keys:
+            if state == "begin":
+                self.started.add(key)
+            elif state == "done":
+                self.results[key] = result
+                self.started.discard(key)
+                self.failed.discard(key)
+            elif state == "failed":
+                self.failed.add(key)
+                self.started.discard(key)
+
+    def append(self, keys: List[str], state: str, **fields):
+        """Write one entry covering every key of a request and flush it"""
+        entry = {
+            "keys": keys,
+            "state": state,
+            "at": datetime.now(timezone.utc).isoformat(),
+        }
+        entry.update(fields)
+        self.file.write(json.dumps(entry, default=str) + "\n")
+        self.file.flush()
+        self.apply(keys, state, fields.get("result"))
+
+    def begin(self, *keys: str):
+        """Record that a request for these keys is about to be sent"""
+        self.append(list(keys), "begin")
+
+    def complete(self, *keys: str, result: Any = None):
+        """Record that the request for these keys succeeded"""
+        self.append(list(keys), "done", result=result)
+
+    def fail(self, *keys: str, error: Optional[str] = None):
+        """Record that the request for these keys got a definite error"""
+        self.append(list(keys), "failed", error=error)
+
+    def is_done(self, key: str) -> bool:
+        return key in self.results
+
+    def in_doubt(self, key: str) -> bool:
+        """Whether a request for this key was sent but its outcome never recorded"""
+        return key in self.started
+
+    def retry_interrupted(self, key: str) -> bool:
+        """Claim a key a previous run left in doubt, once it is known not to have applied.
+
+        Returns True the first time it is called for such a key, so only one
+        request is sent for it even if the key appears more than once.
+        """
+        if key not in self.interrupted:
+            return False
+        self.interrupted.discard(key)
+        return True
+
+    def result(self, key: str) -> Any:
+        """Result stored when the key completed"""
+        return self.results.get(key)
+
+    def remaining(self, keys: Iterable[str]) -> List[str]:
+        """Keys that still need to be sent, in input order"""
+        return [key for key in keys if key not in self.results]
+
+    def summary(self) -> str:
+        return (
+            f"{len(self.results)} completed, {len(self.failed)} failed, "
+            f"{len(self.started)} interrupted mid-request"
+        )
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+    def finish(self):
+        """Close the journal and delete it if nothing is left to retry"""
+        self.close()
+        if not self.failed and not self.started:
+            os.remove(self.path)
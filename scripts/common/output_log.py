@@ -0,0 +1,88 @@
+"""
+Buffered CSV log of per-row results for the bulk scripts.
+
+Appending every result as its own one-row DataFrame reopens and stats the
+output file once per input row. ``CsvOutputLog`` keeps the file open, writes
+the header only when the file is new, and flushes every ``flush_every`` rows
+or ``flush_seconds`` seconds, whichever comes first, so a killed run loses at
+most that much of the log.
+
+Appending to a file written with different columns would misalign them, so
+an existing file whose header does not match is first moved aside to
+``<name>.<timestamp>.csv`` and a new file is started.
+"""
+
+import csv
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+
+def read_header(path: str) -> Optional[List[str]]:
+    """Column names of an existing CSV file, or None if it is missing or empty"""
+    if not os.path.exists(path):
+        return None
+    with open(path, newline="", encoding="utf-8") as f:
+        return next(csv.reader(f), None)
+
+
+class CsvOutputLog:
+    """Append-only CSV writer that batches rows between flushes."""
+
+    def __init__(
+        self,
+        path: str,
+        fieldnames: Sequence[str],
+        flush_every: int = 100,
+        flush_seconds: float = 5.0,
+    ):
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_seconds = flush_seconds
+        self.rows = 0
+        self.pending = 0
+        # Where an old log with other columns was moved to, if anywhere
+        self.moved_to: Optional[str] = None
+        header = read_header(path)
+        if header is not None and header != list(fieldnames):
+            stamp = datetime.fromtimestamp(os.path.getmtime(path))
+            root, ext = os.path.splitext(path)
+            self.moved_to = f"{root}.{stamp:%Y%m%d_%H%M%S}{ext}"
+            os.replace(path, self.moved_to)
+            header = None
+        new_file = header is None
+        self.file = open(path, "a", newline="", encoding="utf-8")
+        # Same line endings and quoting as DataFrame.to_csv
+        self.writer = csv.DictWriter(
+            self.file, fieldnames=list(fieldnames), lineterminator="\n"
+        )
+        if new_file:
+            self.writer.writeheader()
+        self.flushed_at = time.monotonic()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def write(self, row: Dict[str, Any]):
+        self.writer.writerow(row)
+        self.rows += 1
+        self.pending += 1
+        if (
+            self.pending >= self.flush_every
+            or time.monotonic() - self.flushed_at >= self.flush_seconds
+        ):
+            self.flush()
+
+    def flush(self):
+        self.file.flush()
+        self.pending = 0
+        self.flushed_at = time.monotonic()
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
@@ -0,0 +1,126 @@
+"""
+Adaptive token-bucket rate limiter shared by every coroutine of a script.
+
+Workers call ``acquire()`` before each request. When the API throttles
+(HTTP 429, ``Retry-After`` or an exhausted rate-limit header) the limiter
+pauses all workers together and halves its rate; after a run of successful
+requests it raises the rate again, so long runs stay close to the highest
+rate the API accepts instead of cascading into repeated 429s.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Mapping, Optional
+
+from .config import REQUESTS_PER_SECOND
+
+DEFAULT_REQUESTS_PER_SECOND = REQUESTS_PER_SECOND
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given either as seconds or as an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def rate_limit_reset_seconds(headers: Mapping[str, str]) -> Optional[float]:
+    """Seconds until the rate-limit window resets if the headers say it is exhausted"""
+    remaining = headers.get("X-RateLimit-Remaining", headers.get("RateLimit-Remaining"))
+    if remaining is None:
+        return None
+    try:
+        if float(remaining) > 0:
+            return None
+        reset = float(headers.get("X-RateLimit-Reset", headers.get("RateLimit-Reset")))
+    except (TypeError, ValueError):
+        return None
+    # Some APIs send an epoch timestamp, others a delta in seconds
+    if reset > 1e9:
+        reset -= time.time()
+    return max(0.0, reset)
+
+
+class AdaptiveRateLimiter:
+    """Token bucket whose rate backs off on throttling and recovers on success."""
+
+    def __init__(
+        self,
+        rate: float = DEFAULT_REQUESTS_PER_SECOND,
+        max_rate: Optional[float] = None,
+        min_rate: float = 0.5,
+        burst: float = 1.0,
+        increase_after: int = 20,
+    ):
+        """
+        Args:
+            rate: Starting requests per second
+            max_rate: Ceiling the rate may recover to (defaults to twice `rate`)
+            min_rate: Floor the rate never drops below when throttled
+            burst: Requests that may be sent back to back after an idle period
+            increase_after: Consecutive successes before the rate is raised
+        """
+        self.rate = rate
+        self.max_rate = max_rate if max_rate is not None else rate * 2
+        self.min_rate = min_rate
+        self.burst = burst
+        self.increase_after = increase_after
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.successes = 0
+        self.throttle_count = 0
+        self.lock = None
+
+    async def acquire(self):
+        """Wait for a request slot, honoring any active throttle pause"""
+        if self.lock is None:
+            self.lock = asyncio.Lock()
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self.tokens = min(
+                    self.burst, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def on_throttle(self, retry_after: Optional[float] = None):
+        """Slow every worker down after a 429 or an exhausted rate-limit window"""
+        now = time.monotonic()
+        self.throttle_count += 1
+        self.successes = 0
+        # Requests already in flight will report the same throttle; only the
+        # first report in a pause window lowers the rate
+        if now >= self.paused_until:
+            self.rate = max(self.min_rate, self.rate / 2)
+        pause = retry_after if retry_after is not None else 1 / self.rate
+        self.paused_until = max(self.paused_until, now + pause)
+        self.tokens = 0
+
+    def on_success(self, headers: Optional[Mapping[str, str]] = None):
+        """Record a successful request and speed back up after a clean run"""
+        if headers is not None:
+            reset = rate_limit_reset_seconds(headers)
+            if reset is not None:
+                self.paused_until = max(self.paused_until, time.monotonic() + reset)
+        self.successes += 1
+        if self.successes >= self.increase_after and self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate + max(0.5, self.rate * 0.1))
+            self.successes = 0
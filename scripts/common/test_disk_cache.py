@@ -0,0 +1,60 @@
+"""
+Checks that the disk cache only returns entries matching the requested
+version and TTL, keeps them across reopening, and evicts the least recently
+used entries beyond max_entries.
+
+Run with: python -m pytest scripts/common
+"""
+
+import time
+
+from common import disk_cache
+from common.disk_cache import DiskCache
+
+
+def test_entries_survive_reopening(tmp_path):
+    path = str(tmp_path / "cache.db")
+    with DiskCache(path) as cache:
+        cache.set("a", {"url": "x"}, version="v1")
+    with DiskCache(path) as cache:
+        assert cache.get("a", version="v1") == {"url": "x"}
+        assert (cache.hits, cache.misses) == (1, 0)
+
+
+def test_other_version_is_a_miss(tmp_path):
+    with DiskCache(str(tmp_path / "cache.db")) as cache:
+        cache.set("a", 1, version="2024-01-01")
+        assert cache.get("a", version="2024-02-01") is None
+        assert cache.get("a") is None
+        assert cache.get("b") is None
+        assert cache.misses == 3
+
+
+def test_ttl_counts_from_when_the_entry_was_stored(tmp_path, monkeypatch):
+    now = time.time()
+    monkeypatch.setattr(disk_cache.time, "time", lambda: now)
+    with DiskCache(str(tmp_path / "cache.db"), ttl=60) as cache:
+        cache.set("a", 1)
+        now += 30
+        assert cache.get("a") == 1
+        now += 31
+        assert cache.get("a") is None
+        cache.evict()
+        (count,) = cache.connection.execute("SELECT COUNT(*) FROM cache").fetchone()
+        assert count == 0
+
+
+def test_evicts_least_recently_used(tmp_path, monkeypatch):
+    now = time.time()
+    monkeypatch.setattr(disk_cache.time, "time", lambda: now)
+    path = str(tmp_path / "cache.db")
+    with DiskCache(path, max_entries=2) as cache:
+        for key in ("a", "b", "c"):
+            cache.set(key, key)
+            now += 1
+        # Reading "a" makes "b" the least recently used
+        assert cache.get("a") == "a"
+    with DiskCache(path, max_entries=2) as cache:
+        assert cache.get("a") == "a"
+        assert cache.get("b") is None
+        assert cache.get("c") == "c"
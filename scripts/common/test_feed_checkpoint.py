@@ -0,0 +1,70 @@
+"""
+Checks that feed checkpoints replay saved pages and continue from the last
+good cursor, and are discarded for another origin, when too old, or once the
+chain completes.
+
+Run with: python -m pytest scripts/common
+"""
+
+from datetime import timedelta
+
+from common.feed_checkpoint import FeedCheckpoint
+
+ORIGIN = "https://api.example.com/feed/inspections?archived=false"
+
+
+def save_two_pages(checkpoint, name="feed"):
+    checkpoint.save_page(name, ORIGIN, [{"id": 1}, {"id": 2}], f"{ORIGIN}&page=2")
+    checkpoint.save_page(name, ORIGIN, [{"id": 3}], f"{ORIGIN}&page=3")
+
+
+def test_resume_replays_pages_and_continues_from_the_last_cursor(tmp_path):
+    path = str(tmp_path / "checkpoints.db")
+    with FeedCheckpoint(path) as checkpoint:
+        save_two_pages(checkpoint)
+    with FeedCheckpoint(path) as checkpoint:
+        assert checkpoint.resume("feed", ORIGIN) == {
+            "next_url": f"{ORIGIN}&page=3",
+            "pages": 2,
+            "records": 3,
+        }
+        pages = list(checkpoint.iter_pages("feed"))
+        assert pages == [[{"id": 1}, {"id": 2}], [{"id": 3}]]
+        assert checkpoint.pending() == ["feed"]
+
+
+def test_other_origin_starts_over(tmp_path):
+    with FeedCheckpoint(str(tmp_path / "checkpoints.db")) as checkpoint:
+        save_two_pages(checkpoint)
+        assert checkpoint.resume("feed", f"{ORIGIN}&modified_after=x") is None
+        assert checkpoint.pending() == []
+        assert list(checkpoint.iter_pages("feed")) == []
+
+
+def test_expired_checkpoint_starts_over(tmp_path):
+    path = str(tmp_path / "checkpoints.db")
+    with FeedCheckpoint(path, max_age=timedelta(0)) as checkpoint:
+        save_two_pages(checkpoint)
+        assert checkpoint.resume("feed", ORIGIN) is None
+        assert checkpoint.pending() == []
+
+
+def test_complete_drops_only_that_chain(tmp_path):
+    with FeedCheckpoint(str(tmp_path / "checkpoints.db")) as checkpoint:
+        save_two_pages(checkpoint, "shard 1/2")
+        save_two_pages(checkpoint, "shard 2/2")
+        checkpoint.complete("shard 1/2")
+        assert checkpoint.pending() == ["shard 2/2"]
+        assert checkpoint.resume("shard 2/2", ORIGIN)["pages"] == 2
+
+
+def test_state_is_kept_until_cleared(tmp_path):
+    path = str(tmp_path / "checkpoints.db")
+    with FeedCheckpoint(path) as checkpoint:
+        assert checkpoint.get_state("plan") is None
+        checkpoint.set_state("plan", "one")
+        checkpoint.set_state("plan", "two")
+    with FeedCheckpoint(path) as checkpoint:
+        assert checkpoint.get_state("plan") == "two"
+        checkpoint.clear_state("plan")
+        assert checkpoint.get_state("plan") is None
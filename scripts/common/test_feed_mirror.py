@@ -0,0 +1,69 @@
+"""
+Checks that the feed mirror keeps the latest copy of each record, drops
+deleted records on incremental and full syncs, and schedules full resyncs
+from the watermarks.
+
+Run with: python -m pytest scripts/common
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from common.feed_mirror import FeedMirror, format_timestamp, parse_timestamp
+
+FEED = "/feed/inspections"
+
+
+@pytest.fixture
+def mirror(tmp_path):
+    with FeedMirror(str(tmp_path / "mirror.db")) as mirror:
+        yield mirror
+
+
+def records(mirror, feed=FEED):
+    return sorted(mirror.iter_records(feed), key=lambda record: record["id"])
+
+
+def test_upsert_keeps_the_latest_copy_and_drops_tombstones(mirror):
+    mirror.upsert_records(FEED, [{"id": "a", "v": 1}, {"id": "b", "v": 1}])
+    stored = mirror.upsert_records(
+        FEED, [{"id": "a", "v": 2}, {"id": "b", "deleted": True}]
+    )
+    assert stored == 1
+    assert records(mirror) == [{"id": "a", "v": 2}]
+
+
+def test_full_sync_drops_records_missing_from_the_feed(mirror):
+    mirror.upsert_records(FEED, [{"id": "a"}, {"id": "b"}, {"id": "c"}])
+    mirror.upsert_records("/feed/sites", [{"id": "a"}])
+    removed = mirror.replace_records(FEED, [{"id": "a"}, {"id": "c", "v": 2}])
+    assert removed == 1
+    assert records(mirror) == [{"id": "a"}, {"id": "c", "v": 2}]
+    # Other feeds are left alone
+    assert mirror.count("/feed/sites") == 1
+
+
+def test_full_resync_is_due_after_the_interval(mirror):
+    assert mirror.needs_full_resync(FEED)
+    started = mirror.sync_started()
+    mirror.set_watermark(FEED, started, full=True)
+    assert not mirror.needs_full_resync(FEED)
+    assert mirror.get_watermark(FEED) == format_timestamp(started)
+    assert mirror.needs_full_resync(FEED, interval=timedelta(0))
+
+    # An incremental sync moves the watermark but not the full-sync time
+    later = started + timedelta(hours=1)
+    mirror.set_watermark(FEED, later)
+    assert mirror.get_watermark(FEED) == format_timestamp(later)
+    assert not mirror.needs_full_resync(FEED)
+
+
+def test_incremental_syncs_alone_never_count_as_full(mirror):
+    mirror.set_watermark(FEED, mirror.sync_started())
+    assert mirror.needs_full_resync(FEED)
+
+
+def test_timestamps_round_trip():
+    value = datetime(2024, 5, 6, 7, 8, 9, 123456, tzinfo=timezone.utc)
+    assert format_timestamp(value) == "2024-05-06T07:08:09.123456Z"
+    assert parse_timestamp(format_timestamp(value)) == value
@@ -0,0 +1,105 @@
+"""
+Checks that the operation journal resumes interrupted runs: completed keys are
+skipped, requests left in flight are reported once, and a journal started for
+a different input is set aside.
+
+Run with: python -m pytest scripts/common
+"""
+
+import os
+
+from common.journal import OperationJournal, journal_path, split_duplicates
+
+
+def write_input(tmp_path, text="name\na\nb\n"):
+    path = tmp_path / "input.csv"
+    path.write_text(text)
+    return str(path)
+
+
+def test_resumed_run_skips_completed_keys(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    with OperationJournal(path) as journal:
+        journal.complete("a", "b", result="id-1")
+        journal.fail("c", error="404")
+
+    journal = OperationJournal(path)
+    assert journal.resumed
+    assert journal.is_done("a") and journal.result("b") == "id-1"
+    assert not journal.is_done("c")
+    assert journal.remaining(["a", "b", "c", "d"]) == ["c", "d"]
+    assert journal.summary() == "2 completed, 1 failed, 0 interrupted mid-request"
+    journal.close()
+
+
+def test_request_in_flight_is_in_doubt_and_claimed_once(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    with OperationJournal(path) as journal:
+        journal.begin("a")
+        # Sent in this run, not left over from an earlier one
+        assert not journal.retry_interrupted("a")
+
+    journal = OperationJournal(path)
+    assert journal.in_doubt("a")
+    assert journal.retry_interrupted("a")
+    assert not journal.retry_interrupted("a")
+    journal.complete("a")
+    assert not journal.in_doubt("a")
+    journal.close()
+
+
+def test_torn_final_line_is_ignored(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    with OperationJournal(path) as journal:
+        journal.complete("a")
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"keys": ["b"], "sta')
+
+    with OperationJournal(path) as journal:
+        assert journal.is_done("a")
+        assert not journal.is_done("b")
+
+
+def test_changed_input_moves_the_journal_aside(tmp_path):
+    input_file = write_input(tmp_path)
+    path = str(tmp_path / "journal.jsonl")
+    with OperationJournal(path, input_file=input_file) as journal:
+        journal.complete("a")
+    with OperationJournal(path, input_file=input_file) as journal:
+        assert journal.is_done("a")
+        assert journal.moved_to is None
+
+    write_input(tmp_path, "name\nc\n")
+    with OperationJournal(path, input_file=input_file) as journal:
+        assert not journal.resumed
+        assert not journal.is_done("a")
+        assert journal.moved_to and os.path.exists(journal.moved_to)
+
+
+def test_finish_keeps_the_journal_while_keys_are_left_to_retry(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = OperationJournal(path)
+    journal.complete("a")
+    journal.fail("b", error="500")
+    journal.finish()
+    assert os.path.exists(path)
+
+    journal = OperationJournal(path)
+    journal.complete("b")
+    journal.finish()
+    assert not os.path.exists(path)
+
+
+def test_journal_path_is_per_script_and_input(tmp_path):
+    script = os.path.join("scripts", "create_sites", "main.py")
+    input_file = str(tmp_path / "sites.csv")
+    assert journal_path(script, input_file) == str(
+        tmp_path / "create_sites.sites.journal.jsonl"
+    )
+
+
+def test_split_duplicates_points_repeats_at_the_first_row():
+    rows = ["a", "b", "a", "c", "b"]
+    unique, duplicates = split_duplicates(rows, lambda row: row)
+    assert unique == [(0, "a"), (1, "b"), (3, "c")]
+    assert duplicates == [(2, "a", 0), (4, "b", 1)]
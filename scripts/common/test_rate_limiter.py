@@ -0,0 +1,76 @@
+"""
+Checks the shared rate limiter's header parsing and that it backs off on
+throttling and recovers after a run of successful requests.
+
+Run with: python -m pytest scripts/common
+"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+from common.rate_limiter import (
+    AdaptiveRateLimiter,
+    rate_limit_reset_seconds,
+    retry_after_seconds,
+)
+
+
+def test_retry_after_accepts_seconds_and_http_dates():
+    assert retry_after_seconds("3") == 3.0
+    assert retry_after_seconds("-1") == 0.0
+    assert retry_after_seconds(None) is None
+    assert retry_after_seconds("soon") is None
+    later = datetime.now(timezone.utc) + timedelta(seconds=30)
+    assert 25 < retry_after_seconds(format_datetime(later, usegmt=True)) <= 30
+    earlier = datetime.now(timezone.utc) - timedelta(seconds=30)
+    assert retry_after_seconds(format_datetime(earlier, usegmt=True)) == 0.0
+
+
+def test_rate_limit_reset_only_when_the_window_is_exhausted():
+    assert rate_limit_reset_seconds({}) is None
+    headers = {"X-RateLimit-Remaining": "5", "X-RateLimit-Reset": "10"}
+    assert rate_limit_reset_seconds(headers) is None
+    headers = {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "10"}
+    assert rate_limit_reset_seconds(headers) == 10.0
+    # Epoch reset times are turned into a delay
+    headers = {"RateLimit-Remaining": "0", "RateLimit-Reset": str(time.time() + 20)}
+    assert 15 < rate_limit_reset_seconds(headers) <= 20
+    headers = {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "never"}
+    assert rate_limit_reset_seconds(headers) is None
+
+
+def test_throttle_halves_the_rate_once_per_pause():
+    limiter = AdaptiveRateLimiter(rate=8, min_rate=1.5)
+    limiter.on_throttle(retry_after=60)
+    # Requests already in flight report the same 429
+    limiter.on_throttle(retry_after=60)
+    assert limiter.rate == 4
+    assert limiter.throttle_count == 2
+
+    limiter.paused_until = 0.0
+    limiter.on_throttle(retry_after=0)
+    limiter.paused_until = 0.0
+    limiter.on_throttle(retry_after=0)
+    assert limiter.rate == 1.5
+
+
+def test_successes_raise_the_rate_up_to_max_rate():
+    limiter = AdaptiveRateLimiter(rate=10, max_rate=11, increase_after=3)
+    for _ in range(2):
+        limiter.on_success()
+    assert limiter.rate == 10
+    limiter.on_success()
+    assert limiter.rate == 11
+    for _ in range(6):
+        limiter.on_success()
+    assert limiter.rate == 11
+
+
+def test_exhausted_window_pauses_acquire():
+    limiter = AdaptiveRateLimiter(rate=1000)
+    limiter.on_success({"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "0.1"})
+    start = time.monotonic()
+    asyncio.run(limiter.acquire())
+    assert time.monotonic() - start >= 0.09
@@ -1,47 +1,144 @@
+import asyncio
 import os
+import sys
 
 import pandas as pd
-import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.api_client import ApiClient, ApiError, run_bounded  # noqa: E402
+from common.existing_records import fetch_existing_groups  # noqa: E402
+from common.journal import (  # noqa: E402
+    OperationJournal,
+    journal_path,
+    split_duplicates,
+)
+from common.output_log import CsvOutputLog  # noqa: E402
 
 TOKEN = ''
+MAX_CONCURRENCY = 10  # Create requests in flight at once
+INPUT_FILE = 'input.csv'
+# Created groups, so a rerun skips them; one journal per script and input file
+JOURNAL_FILE = journal_path(__file__, INPUT_FILE)
+OUTPUT_FILE = 'output.csv'
+# group_id comes from the create response for new groups and from
+# /feed/groups (role_... IDs) for existing ones; id_source says which
+OUTPUT_COLUMNS = ['name', 'group_id', 'id_source', 'status']
+# List the existing groups once before creating and skip names that already
+# exist, so reruns only create what is missing
+SKIP_EXISTING = True
 
 
 def import_csv():
-    df = pd.read_csv('input.csv')
+    df = pd.read_csv(INPUT_FILE)
     csv = df.to_dict('records')
     return csv
 
 
-def create_group(name, count):
-    count += 1
+async def load_existing_groups(client):
+    """Index of existing groups by name, or None when SKIP_EXISTING is off"""
+    if not SKIP_EXISTING:
+        return None
     try:
-        url = "https://api.safetyculture.io/groups"
+        existing = await fetch_existing_groups(client)
+    except ApiError as err:
+        print(f'Could not list existing groups: {err}')
+        raise SystemExit(1)
+    print(f'Found {len(existing)} existing groups')
+    return existing
 
+
+async def create_group(client, journal, name, count, existing=None):
+    """Create one group and return (status, group ID or '', ID source)"""
+    count += 1
+    group_id = existing.get(name) if existing is not None else None
+    if group_id:
+        journal.complete(name, result=group_id)
+        status = f'#{count} SKIPPED Creating Group: {name} - already exists'
+        print(status)
+        return status, group_id, 'feed'
+    # Once the existing groups are listed, a request left in doubt by an
+    # earlier run is known not to have applied and can be sent again
+    if journal.in_doubt(name) and not (
+        existing is not None and journal.retry_interrupted(name)
+    ):
+        # The request was sent but the run stopped before the response arrived
+        status = (
+            f'#{count} SKIPPED Creating Group: {name} - interrupted mid-request '
+            'in a previous run, check whether it was created'
+        )
+        print(status)
+        return status, '', ''
+    journal.begin(name)
+    try:
         payload = {"name": name}
-        headers = {
-            "accept": "application/json",
-            "content-type": "application/json",
-            "authorization": f"Bearer {TOKEN}",
-        }
-        response = requests.post(url, json=payload, headers=headers).json()
-        status = response['id']
-        print(f'#{count} SUCCESS Creating Group: {name} - {status}')
-    except requests.exceptions.RequestException as err:
+        response = await client.post("/groups", json=payload)
+    except ApiError as err:
+        journal.fail(name, error=str(err))
         status = f'#{count} ERROR Creating Group: {name} - {err}'
         print(status)
-    return status
+        return status, '', ''
+    group_id = response.get('id') if isinstance(response, dict) else None
+    if not group_id:
+        # The group may exist now; a rerun finds it in /feed/groups
+        error = f'response has no group id: {response}'
+        journal.fail(name, error=error)
+        status = f'#{count} ERROR Creating Group: {name} - {error}'
+        print(status)
+        return status, '', ''
+    journal.complete(name, result=group_id)
+    print(f'#{count} SUCCESS Creating Group: {name} - {group_id}')
+    return group_id, group_id, 'created'
+
+
+async def create_groups(data, journal, output):
+    async with ApiClient(TOKEN, max_concurrency=MAX_CONCURRENCY) as client:
+        existing = await load_existing_groups(client)
+
+        # Repeats of a name earlier in the input are reported, not sent again
+        rows, duplicates = split_duplicates(data, lambda row: row['name'])
+        for count, row, first in duplicates:
+            name = row['name']
+            if journal.is_done(name):
+                continue
+            status = (
+                f'#{count + 1} SKIPPED Creating Group: {name} - '
+                f'duplicate of row #{first + 1}'
+            )
+            print(status)
+            output.write({'name': name, 'status': status})
+
+        async def create_row(_, entry):
+            count, row = entry
+            name = row['name']
+            if journal.is_done(name):
+                return
+            status, group_id, id_source = await create_group(
+                client, journal, name, count, existing
+            )
+            output.write(
+                {
+                    'name': name,
+                    'group_id': group_id,
+                    'id_source': id_source,
+                    'status': status,
+                }
+            )
+
+        await run_bounded(create_row, rows, MAX_CONCURRENCY)
 
 
 def main():
     data = import_csv()
-    count = 0
-    for row in data:
-        name = row['name']
-        response = create_group(name, count)
-        df = pd.DataFrame({"name": [name], "status": [response]})
-        df.to_csv(
-            'output.csv', mode='a', header=not os.path.exists('output.csv'), index=False
-        )
+    journal = OperationJournal(JOURNAL_FILE, input_file=INPUT_FILE)
+    if journal.moved_to:
+        print(f'{INPUT_FILE} changed, moved the old journal to {journal.moved_to}')
+    if journal.resumed:
+        print(f'Resuming from {JOURNAL_FILE}: {journal.summary()}')
+    with CsvOutputLog(OUTPUT_FILE, OUTPUT_COLUMNS) as output:
+        if output.moved_to:
+            print(f'{OUTPUT_FILE} had other columns, moved it to {output.moved_to}')
+        asyncio.run(create_groups(data, journal, output))
+    journal.finish()
 
 
 main()
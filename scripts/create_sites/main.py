@@ -1,48 +1,272 @@
+import asyncio
 import os
+import sys
+from collections import Counter, defaultdict
 
 import pandas as pd
-import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.api_client import ApiClient, ApiError, run_bounded  # noqa: E402
+from common.existing_records import fetch_existing_folders, folder_key  # noqa: E402
+from common.journal import (  # noqa: E402
+    OperationJournal,
+    journal_path,
+    split_duplicates,
+)
+from common.output_log import CsvOutputLog  # noqa: E402
 
 TOKEN = ''
+MAX_CONCURRENCY = 10  # Create requests in flight at once
+INPUT_FILE = 'input.csv'
+# Created sites, so a rerun skips them; one journal per script and input file
+JOURNAL_FILE = journal_path(__file__, INPUT_FILE)
+OUTPUT_FILE = 'output.csv'
+OUTPUT_COLUMNS = ['count', 'site_name', 'meta_label', 'site_id', 'status']
+# Treat `parent` values that match another row's name as a reference to that
+# row and create the tree one depth level at a time, so children get the IDs
+# of parents created in the same run. Set to False to post rows as given,
+# with `parent` always a site ID.
+HIERARCHICAL = True
+# List the existing folders once before creating and skip rows whose name
+# already exists under the same parent, so reruns only create what is missing
+SKIP_EXISTING = True
+
+
+def site_key(name, parent):
+    """Idempotency key of a site: the same name may exist under different parents"""
+    return f"{parent or ''}/{name}"
+
+
+def build_levels(entries):
+    """Group input rows into depth levels by resolving `parent` against row names.
+
+    Takes (count, row) pairs. Level 0 holds rows whose parent is blank or not
+    the name of another row (an existing site ID); each later level holds the
+    children of the level before. Returns the levels as lists of (count, row)
+    and the rows that cannot be placed, as (count, row, reason).
+    """
+    names = Counter(row['name'] for _, row in entries)
+    children = defaultdict(list)
+    levels = [[]]
+    unresolved = []
+    for count, row in entries:
+        parent = row['parent']
+        if not parent or parent not in names:
+            levels[0].append((count, row))
+        elif names[parent] > 1:
+            reason = f"parent name {parent} matches {names[parent]} input rows"
+            unresolved.append((count, row, reason))
+        else:
+            children[parent].append((count, row))
+
+    while True:
+        level = [
+            child for _, row in levels[-1] for child in children.pop(row['name'], [])
+        ]
+        if not level:
+            break
+        levels.append(level)
+
+    # Whatever is left hangs off a cycle or an ambiguous parent
+    for parent, entries in children.items():
+        reason = f"parent {parent} is in a cycle or under an ambiguous parent"
+        unresolved.extend((count, row, reason) for count, row in entries)
+    return levels, unresolved
+
 
+def write_result(output, count, name, meta_label, site_id, status):
+    output.write(
+        {
+            'count': count,
+            'site_name': name,
+            'meta_label': meta_label,
+            'site_id': site_id,
+            'status': status,
+        }
+    )
 
-def create_site(name, parent, meta_label, count):
+
+async def load_existing_sites(client):
+    """Index of existing folders, or None when SKIP_EXISTING is off"""
+    if not SKIP_EXISTING:
+        return None
     try:
-        payload = {"meta_label": meta_label, "name": name}
-        if parent:
-            payload["parent_id"] = parent
-        headers = {"authorization": f"Bearer {TOKEN}"}
-        response = requests.post(
-            "https://api.safetyculture.io/directory/v1/folder",
-            json=payload,
-            headers=headers,
+        existing = await fetch_existing_folders(client)
+    except ApiError as error:
+        print(f"Could not list existing sites: {error}")
+        raise SystemExit(1)
+    print(f"Found {len(existing)} existing sites")
+    return existing
+
+
+async def create_site(
+    client, journal, key, name, parent_id, meta_label, count, checked=False
+):
+    """Create one folder and return (status, new site ID or '').
+
+    `checked` means the existing folders were listed at the start of the run
+    and this one is not among them, so a request left in doubt by an earlier
+    run did not apply and is sent again.
+    """
+    if journal.in_doubt(key) and not (checked and journal.retry_interrupted(key)):
+        # The request was sent but the run stopped before the response arrived
+        status = (
+            f"#{count} - SKIPPED {name}: interrupted mid-request in a previous "
+            "run, check whether it was created"
         )
-        response.raise_for_status()
+        print(status)
+        return status, ''
+    journal.begin(key)
+    try:
+        payload = {"meta_label": meta_label, "name": name}
+        if parent_id:
+            payload["parent_id"] = parent_id
+        response = await client.post("/directory/v1/folder", json=payload)
+        site_id = response.get("folder", {}).get("id", '')
+        journal.complete(key, result=site_id)
         status = f"#{count} - Successfully Created {name}"
         print(status)
-        return status
-    except requests.exceptions.RequestException as error:
+        return status, site_id
+    except ApiError as error:
+        journal.fail(key, error=str(error))
         status = f"#{count} - ERROR creating {name}: {error}"
         print(status)
-        return status
+        return status, ''
+
+
+async def ensure_site(
+    client, existing, journal, key, name, parent_id, meta_label, count
+):
+    """Return (status, site ID), creating the site only if it does not exist yet"""
+    if existing is not None:
+        site_id = existing.get(folder_key(parent_id, name))
+        if site_id:
+            journal.complete(key, result=site_id)
+            status = f"#{count} - SKIPPED {name}: already exists"
+            print(status)
+            return status, site_id
+    return await create_site(
+        client,
+        journal,
+        key,
+        name,
+        parent_id,
+        meta_label,
+        count,
+        checked=existing is not None,
+    )
+
+
+def report_duplicates(duplicates, output, journal):
+    """Log rows that repeat the parent and name of an earlier input row"""
+    for count, row, first in duplicates:
+        if journal.is_done(site_key(row['name'], row['parent'])):
+            continue
+        status = f"#{count} - SKIPPED {row['name']}: duplicate of row #{first}"
+        print(status)
+        write_result(output, count, row['name'], row['meta_label'], '', status)
+
+
+async def create_sites(csv_data, output, journal):
+    rows, duplicates = split_duplicates(
+        csv_data, lambda row: site_key(row['name'], row['parent'])
+    )
+    report_duplicates(duplicates, output, journal)
+    async with ApiClient(TOKEN, max_concurrency=MAX_CONCURRENCY) as client:
+        existing = await load_existing_sites(client)
+
+        async def create_row(_, entry):
+            count, row = entry
+            name, parent, meta_label = row['name'], row['parent'], row['meta_label']
+            key = site_key(name, parent)
+            if journal.is_done(key):
+                return
+            status, site_id = await ensure_site(
+                client, existing, journal, key, name, parent, meta_label, count
+            )
+            write_result(output, count, name, meta_label, site_id, status)
+
+        await run_bounded(create_row, rows, MAX_CONCURRENCY)
+
+
+async def create_site_tree(csv_data, output, journal):
+    """Create the input as a tree, one depth level of concurrent requests at a time"""
+    rows, duplicates = split_duplicates(
+        csv_data, lambda row: site_key(row['name'], row['parent'])
+    )
+    report_duplicates(duplicates, output, journal)
+    levels, unresolved = build_levels(rows)
+    for count, row, reason in unresolved:
+        if journal.is_done(site_key(row['name'], row['parent'])):
+            continue
+        status = f"#{count} - ERROR creating {row['name']}: {reason}"
+        print(status)
+        # Kept as failed so the journal is not removed as a finished run
+        journal.fail(site_key(row['name'], row['parent']), error=reason)
+        write_result(output, count, row['name'], row['meta_label'], '', status)
+
+    # Input name -> site ID, filled as each level is created so the next
+    # level can resolve its parents
+    site_ids = {}
+    async with ApiClient(TOKEN, max_concurrency=MAX_CONCURRENCY) as client:
+        existing = await load_existing_sites(client)
+        for depth, level in enumerate(levels):
+            print(f"Level {depth + 1}/{len(levels)}: {len(level)} sites")
+
+            async def create_row(_, entry, depth=depth):
+                count, row = entry
+                name, parent, meta_label = row['name'], row['parent'], row['meta_label']
+                key = site_key(name, parent)
+                if journal.is_done(key):
+                    # Created by an earlier run; its ID still anchors the children
+                    site_ids[name] = journal.result(key) or ''
+                    return
+                parent_id = site_ids.get(parent, '') if depth else parent
+                if depth and not parent_id:
+                    status = (
+                        f"#{count} - SKIPPED {name}: parent {parent} has no site ID"
+                    )
+                    print(status)
+                    journal.fail(key, error=status)
+                    site_id = ''
+                else:
+                    status, site_id = await ensure_site(
+                        client,
+                        existing,
+                        journal,
+                        key,
+                        name,
+                        parent_id,
+                        meta_label,
+                        count,
+                    )
+                site_ids[name] = site_id
+                write_result(output, count, name, meta_label, site_id, status)
+
+            await run_bounded(create_row, level, MAX_CONCURRENCY)
 
 
 def main():
-    csv_data = pd.read_csv('input.csv').fillna('').to_dict('records')
-    output_file = 'output.csv'
-    for count, row in enumerate(csv_data):
-        name, parent, meta_label = row['name'], row.get('parent'), row.get('meta_label')
-        status = create_site(name, parent, meta_label, count)
-        pd.DataFrame(
-            {
-                'count': [count],
-                'site_name': [name],
-                'meta_label': [meta_label],
-                'status': [status],
-            }
-        ).to_csv(
-            output_file, mode='a', header=not os.path.exists(output_file), index=False
-        )
+    csv_data = (
+        pd.read_csv(INPUT_FILE, dtype=str)
+        .reindex(columns=['name', 'meta_label', 'parent'])
+        .fillna('')
+        .to_dict('records')
+    )
+    journal = OperationJournal(JOURNAL_FILE, input_file=INPUT_FILE)
+    if journal.moved_to:
+        print(f"{INPUT_FILE} changed, moved the old journal to {journal.moved_to}")
+    if journal.resumed:
+        print(f"Resuming from {JOURNAL_FILE}: {journal.summary()}")
+    with CsvOutputLog(OUTPUT_FILE, OUTPUT_COLUMNS) as output:
+        if output.moved_to:
+            print(f"{OUTPUT_FILE} had other columns, moved it to {output.moved_to}")
+        if HIERARCHICAL:
+            asyncio.run(create_site_tree(csv_data, output, journal))
+        else:
+            asyncio.run(create_sites(csv_data, output, journal))
+    journal.finish()
 
 
-main()
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Checks that build_levels orders input rows so every parent is created one
+level before its children, and reports rows that cannot be placed.
+
+Run with: python -m pytest scripts/create_sites
+"""
+
+import importlib.util
+import os
+
+import pytest
+
+MAIN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+
+
+@pytest.fixture(scope="module")
+def create_sites():
+    spec = importlib.util.spec_from_file_location("create_sites_main", MAIN_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def entries(*pairs):
+    """(count, row) pairs from (name, parent) pairs, numbered from 1"""
+    return [
+        (count, {"name": name, "parent": parent, "meta_label": "location"})
+        for count, (name, parent) in enumerate(pairs, 1)
+    ]
+
+
+def names(level):
+    return [row["name"] for _, row in level]
+
+
+def test_children_come_one_level_after_their_parent(create_sites):
+    levels, unresolved = create_sites.build_levels(
+        entries(
+            ("Store 1", "Region"),
+            ("Region", ""),
+            ("Aisle 1", "Store 1"),
+            ("Other", "existing-folder-id"),
+            ("Store 2", "Region"),
+        )
+    )
+    assert [names(level) for level in levels] == [
+        ["Region", "Other"],
+        ["Store 1", "Store 2"],
+        ["Aisle 1"],
+    ]
+    assert unresolved == []
+
+
+def test_ambiguous_parent_leaves_its_subtree_unresolved(create_sites):
+    levels, unresolved = create_sites.build_levels(
+        entries(
+            ("North", ""),
+            ("North", "Country"),
+            ("Store", "North"),
+            ("Aisle", "Store"),
+        )
+    )
+    assert [names(level) for level in levels] == [["North", "North"]]
+    reasons = {row["name"]: reason for _, row, reason in unresolved}
+    assert reasons["Store"] == "parent name North matches 2 input rows"
+    assert "ambiguous" in reasons["Aisle"]
+
+
+def test_cycle_is_unresolved(create_sites):
+    levels, unresolved = create_sites.build_levels(
+        entries(("A", "B"), ("B", "A"), ("Root", ""))
+    )
+    assert [names(level) for level in levels] == [["Root"]]
+    assert sorted(row["name"] for _, row, _ in unresolved) == ["A", "B"]
+    assert all("cycle" in reason for _, _, reason in unresolved)
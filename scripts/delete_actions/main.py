@@ -1,11 +1,41 @@
+import asyncio
 import csv
 import datetime
 import json
+import os
+import random
+import sys
+import time
 
+import aiohttp
 import pandas as pd
-import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.api_client import (  # noqa: E402
+    AUTH_STATUSES,
+    REJECTED_IDS_STATUSES,
+    RETRY_STATUSES,
+)
+from common.config import API_BASE_URL  # noqa: E402
+from common.journal import OperationJournal, journal_path  # noqa: E402
+from common.rate_limiter import (  # noqa: E402
+    DEFAULT_REQUESTS_PER_SECOND,
+    AdaptiveRateLimiter,
+    retry_after_seconds,
+)
 
 TOKEN = ""  # Add your SafetyCulture API token here
+DELETE_URL = f"{API_BASE_URL}/tasks/v1/actions/delete"
+CHUNK_SIZE = 300  # Initial IDs per delete request
+MIN_CHUNK_SIZE = 25  # Smallest batch the adaptive batcher will shrink to
+MAX_CHUNK_SIZE = 2000  # Largest batch the adaptive batcher will grow to
+TARGET_LATENCY = 5.0  # Seconds per request the batcher aims to stay under
+MAX_IN_FLIGHT = 8  # Delete requests sent concurrently
+INPUT_FILE = "input.csv"
+# Deleted action IDs, so a rerun skips them; one journal per script and input file
+JOURNAL_FILE = journal_path(__file__, INPUT_FILE)
+MAX_RETRIES = 5  # Attempts per chunk on 429, 5xx and connection errors
+MAX_RETRY_DELAY = 30.0  # Longest backoff between attempts, in seconds
 
 
 def init_csv_log():
@@ -20,6 +50,7 @@ def init_csv_log():
             "status_code",
             "success",
             "error_message",
+            "target_chunk_size",
             "action_ids",
         ]
         writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
@@ -36,6 +67,7 @@ def log_to_csv(
     success,
     error_message,
     action_ids,
+    target_chunk_size=None,
 ):
     timestamp = datetime.datetime.now().isoformat()
 
@@ -47,6 +79,7 @@ def log_to_csv(
             "status_code",
             "success",
             "error_message",
+            "target_chunk_size",
             "action_ids",
         ]
         writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
@@ -58,81 +91,247 @@ def log_to_csv(
                 "status_code": status_code,
                 "success": success,
                 "error_message": error_message,
+                "target_chunk_size": target_chunk_size,
                 "action_ids": json.dumps(action_ids),
             }
         )
 
 
 def read_csv():
-    df = pd.read_csv("input.csv")
+    df = pd.read_csv(INPUT_FILE)
     csv = df.to_dict("records")
     return csv
 
 
-def chunk_actions(actions):
-    for i in range(0, len(actions), 300):
-        yield actions[i : i + 300]
+class AdaptiveBatcher:
+    """Adjusts the delete batch size from observed latency and error responses."""
 
+    def __init__(self, initial, minimum, maximum, target_latency):
+        self.size = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_latency = target_latency
 
-def delete_actions(actions, chunk_number, total_chunks, log_filename):
-    url = "https://api.safetyculture.io/tasks/v1/actions/delete"
-    payload = {"ids": actions}
-    headers = {
-        "accept": "application/json",
-        "content-type": "application/json",
-        "authorization": f"Bearer {TOKEN}",
-    }
+    def record(self, batch_size, latency, status_code):
+        if status_code == 413:
+            # Payload too large: never try this size again
+            self.maximum = max(self.minimum, int(batch_size * 0.8))
+            self.size = min(self.size, self.maximum)
+        elif status_code is None or status_code == 429 or status_code >= 500:
+            # Throttled or overloaded: back off quickly
+            self.size = max(self.minimum, self.size // 2)
+        elif status_code == 200 and batch_size >= self.size:
+            # Only full-size batches say anything about the current size
+            if latency > self.target_latency:
+                self.size = max(self.minimum, int(self.size * 0.75))
+            elif latency < self.target_latency / 2:
+                self.size = min(self.maximum, int(self.size * 1.25) + 1)
 
-    print(f"\n[CHUNK {chunk_number}/{total_chunks}] Deleting {len(actions)} actions...")
-    print(
-        f"[CHUNK {chunk_number}/{total_chunks}] Action IDs: {actions[:3]}{'...' if len(actions) > 3 else ''}"
-    )
 
-    try:
-        response = requests.post(url, json=payload, headers=headers)
-
-        success = response.status_code == 200
-        error_message = None if success else response.text
-
-        if success:
-            print(
-                f"[CHUNK {chunk_number}/{total_chunks}] ✅ SUCCESS - Status: {response.status_code}"
-            )
-            print(f"[CHUNK {chunk_number}/{total_chunks}] Response: {response.text}")
-        else:
-            print(
-                f"[CHUNK {chunk_number}/{total_chunks}] ❌ ERROR - Status: {response.status_code}"
-            )
-            print(
-                f"[CHUNK {chunk_number}/{total_chunks}] Error Response: {response.text}"
-            )
+def is_retryable(status_code):
+    """Throttling, server errors and connection failures are worth another attempt"""
+    return status_code is None or status_code in RETRY_STATUSES
 
-        log_to_csv(
-            log_filename,
-            chunk_number,
-            len(actions),
-            response.status_code,
-            success,
-            error_message,
-            actions,
-        )
 
-    except Exception as e:
-        error_message = str(e)
-        print(f"[CHUNK {chunk_number}/{total_chunks}] ❌ EXCEPTION - {error_message}")
+async def post_delete(session, limiter, actions):
+    """Send one delete, retrying throttled, 5xx and failed connections with backoff"""
+    payload = {"ids": actions}
+    for attempt in range(MAX_RETRIES + 1):
+        await limiter.acquire()
+        retry_after = None
+        try:
+            async with session.post(DELETE_URL, json=payload) as response:
+                status_code = response.status
+                response_text = await response.text()
+                headers = response.headers
+                retry_after = headers.get("Retry-After")
+            exception = None
+        except Exception as e:
+            status_code, response_text, exception = None, None, str(e)
+
+        if not is_retryable(status_code):
+            if status_code < 400:
+                limiter.on_success(headers)
+            return status_code, response_text, exception
+        if status_code == 429:
+            # Pause every chunk sharing the limiter, not just this one
+            limiter.on_throttle(retry_after_seconds(retry_after))
+        if attempt == MAX_RETRIES:
+            return status_code, response_text, exception
+        if status_code != 429:
+            delay = retry_after_seconds(retry_after)
+            if delay is None:
+                delay = 2**attempt + random.uniform(0, 1)
+            await asyncio.sleep(min(delay, MAX_RETRY_DELAY))
+
+
+async def delete_actions(
+    session,
+    semaphore,
+    limiter,
+    batcher,
+    journal,
+    actions,
+    chunk_label,
+    log_filename,
+    stats,
+):
+    """Delete a chunk, splitting it in halves when it is rejected to isolate bad IDs.
+
+    Throttling, 5xx and connection errors are retried by post_delete instead;
+    splitting only helps when the API refuses the IDs themselves (400, 404,
+    413, 422). A 401 or 403 stops the run.
+    """
+    if stats["stopped"]:
+        # Left out of the journal so the rerun sends them
+        return
+    async with semaphore:
+        print(f"\n[CHUNK {chunk_label}] Deleting {len(actions)} actions...")
+        print(
+            f"[CHUNK {chunk_label}] Action IDs: {actions[:3]}{'...' if len(actions) > 3 else ''}"
+        )
+        started = time.monotonic()
+        status_code, response_text, exception = await post_delete(
+            session, limiter, actions
+        )
+        batcher.record(len(actions), time.monotonic() - started, status_code)
+
+    success = status_code == 200
+    if success:
+        print(f"[CHUNK {chunk_label}] ✅ SUCCESS - Status: {status_code}")
+        print(f"[CHUNK {chunk_label}] Response: {response_text}")
+        stats["deleted"] += len(actions)
+        journal.complete(*actions)
         log_to_csv(
             log_filename,
-            chunk_number,
+            chunk_label,
             len(actions),
+            status_code,
+            True,
             None,
-            False,
-            error_message,
             actions,
+            batcher.size,
+        )
+        return
+
+    error_message = exception or response_text
+    if exception:
+        print(f"[CHUNK {chunk_label}] ❌ EXCEPTION - {exception}")
+    else:
+        print(f"[CHUNK {chunk_label}] ❌ ERROR - Status: {status_code}")
+        print(f"[CHUNK {chunk_label}] Error Response: {response_text}")
+
+    if status_code in AUTH_STATUSES:
+        if not stats["stopped"]:
+            print(f"[CHUNK {chunk_label}] 🛑 Stopping: token rejected ({status_code})")
+            stats["stopped"] = error_message or str(status_code)
+        return
+
+    if len(actions) > 1 and status_code in REJECTED_IDS_STATUSES:
+        # Retry each half separately so good IDs are still deleted in bulk
+        middle = len(actions) // 2
+        print(f"[CHUNK {chunk_label}] 🔀 Splitting into halves and retrying")
+        stats["splits"] += 1
+        await asyncio.gather(
+            delete_actions(
+                session,
+                semaphore,
+                limiter,
+                batcher,
+                journal,
+                actions[:middle],
+                f"{chunk_label}.1",
+                log_filename,
+                stats,
+            ),
+            delete_actions(
+                session,
+                semaphore,
+                limiter,
+                batcher,
+                journal,
+                actions[middle:],
+                f"{chunk_label}.2",
+                log_filename,
+                stats,
+            ),
         )
+        return
+
+    if is_retryable(status_code):
+        # Still throttled or unavailable after every retry: the IDs may be
+        # fine, so they are kept apart from IDs the API rejected
+        print(f"[CHUNK {chunk_label}] ⏳ Gave up after {MAX_RETRIES} retries")
+        stats["retries_exhausted"] += len(actions)
+    stats["failed"].extend(actions)
+    journal.fail(*actions, error=error_message)
+    log_to_csv(
+        log_filename,
+        chunk_label,
+        len(actions),
+        status_code,
+        False,
+        error_message,
+        actions,
+        batcher.size,
+    )
 
-    print(
-        f"[CHUNK {chunk_number}/{total_chunks}] Progress: {chunk_number}/{total_chunks} chunks completed ({(chunk_number / total_chunks) * 100:.1f}%)"
+
+async def delete_all_actions(actions, log_filename, journal):
+    headers = {
+        "accept": "application/json",
+        "content-type": "application/json",
+        "authorization": f"Bearer {TOKEN}",
+    }
+    stats = {
+        "deleted": 0,
+        "failed": [],
+        "retries_exhausted": 0,
+        "splits": 0,
+        "chunks": 0,
+        "dispatched": 0,
+        "stopped": None,
+    }
+    batcher = AdaptiveBatcher(
+        CHUNK_SIZE, MIN_CHUNK_SIZE, MAX_CHUNK_SIZE, TARGET_LATENCY
     )
+    semaphore = asyncio.Semaphore(MAX_IN_FLIGHT)
+    limiter = AdaptiveRateLimiter(DEFAULT_REQUESTS_PER_SECOND)
+    connector = aiohttp.TCPConnector(limit=MAX_IN_FLIGHT, ttl_dns_cache=300)
+    timeout = aiohttp.ClientTimeout(total=120)
+
+    async with aiohttp.ClientSession(
+        headers=headers, connector=connector, timeout=timeout
+    ) as session:
+
+        async def worker():
+            # Each worker cuts its next chunk at the batch size current at that time
+            while stats["dispatched"] < len(actions) and not stats["stopped"]:
+                chunk = actions[
+                    stats["dispatched"] : stats["dispatched"] + batcher.size
+                ]
+                stats["dispatched"] += len(chunk)
+                stats["chunks"] += 1
+                chunk_number = stats["chunks"]
+                await delete_actions(
+                    session,
+                    semaphore,
+                    limiter,
+                    batcher,
+                    journal,
+                    chunk,
+                    str(chunk_number),
+                    log_filename,
+                    stats,
+                )
+                print(
+                    f"[CHUNK {chunk_number}] Progress: {stats['dispatched']}/{len(actions)} actions dispatched ({(stats['dispatched'] / len(actions)) * 100:.1f}%) | Batch size: {batcher.size}"
+                )
+
+        await asyncio.gather(*[worker() for _ in range(MAX_IN_FLIGHT)])
+
+    stats["settled_chunk_size"] = batcher.size
+    return stats
 
 
 def main():
@@ -148,24 +347,63 @@ def main():
     print(f"📊 CSV log file created: {log_filename}")
 
     csv = read_csv()
-    actions = [row["id"] for row in csv]
-    chunked = list(chunk_actions(actions))
-
-    total_actions = len(actions)
-    total_chunks = len(chunked)
-
-    print(f"📋 Total actions to delete: {total_actions}")
-    print(f"📦 Total chunks (300 actions each): {total_chunks}")
+    journal = OperationJournal(JOURNAL_FILE, input_file=INPUT_FILE)
+    if journal.moved_to:
+        print(f"{INPUT_FILE} changed, moved the old journal to {journal.moved_to}")
+    actions = journal.remaining(row["id"] for row in csv)
+
+    if journal.resumed:
+        print(f"♻️  Resuming from {JOURNAL_FILE}: {journal.summary()}")
+        print(f"⏭️  Skipping {len(csv) - len(actions)} already deleted actions")
+    print(f"📋 Total actions to delete: {len(actions)}")
+    print(
+        f"📦 Initial chunk size: {CHUNK_SIZE} (adapts between {MIN_CHUNK_SIZE} and {MAX_CHUNK_SIZE})"
+    )
+    print(f"🚦 Chunks in flight at once: {MAX_IN_FLIGHT}")
     print(f"⏰ Started at: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("=" * 60)
 
-    for i, chunk in enumerate(chunked, 1):
-        delete_actions(chunk, i, total_chunks, log_filename)
+    stats = asyncio.run(delete_all_actions(actions, log_filename, journal))
+    if stats["stopped"]:
+        # Unsent IDs are not journaled, so keep the journal for the rerun
+        journal.close()
+    else:
+        journal.finish()
+
+    # Record the batch size the run settled on alongside the per-chunk rows
+    log_to_csv(
+        log_filename,
+        "summary",
+        None,
+        None,
+        not stats["failed"],
+        None,
+        [],
+        stats["settled_chunk_size"],
+    )
 
     print("\n" + "=" * 60)
-    print("✅ Bulk deletion process completed!")
+    if stats["stopped"]:
+        print("🛑 Bulk deletion process stopped early")
+    else:
+        print("✅ Bulk deletion process completed!")
+    print(f"🗑️  Actions deleted: {stats['deleted']}")
+    print(f"📦 Chunks sent: {stats['chunks']}")
+    print(f"📏 Settled chunk size: {stats['settled_chunk_size']}")
+    print(f"🔀 Failed chunks split for retry: {stats['splits']}")
+    print(f"❌ Actions that could not be deleted: {len(stats['failed'])}")
+    if stats["retries_exhausted"]:
+        print(
+            f"   {stats['retries_exhausted']} of them were still throttled or "
+            "unavailable after every retry; rerun to try them again"
+        )
+    if stats["failed"]:
+        print(f"   {stats['failed'][:10]}{'...' if len(stats['failed']) > 10 else ''}")
     print(f"📊 Results logged to: {log_filename}")
     print(f"⏰ Finished at: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    if stats["stopped"]:
+        print(f"🛑 Stopped early, fix the token and rerun: {stats['stopped']}")
+        sys.exit(1)
 
 
 main()
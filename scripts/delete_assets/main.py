@@ -7,27 +7,41 @@ using their API. It provides live logging of the archiving process to an output
 
 Usage:
     python delete_assets.py --api-token YOUR_API_TOKEN --input input.csv --output output.csv
+    python delete_assets.py --input input.csv --concurrency 20 --max-rps 10
+
+Archived assets are recorded in a journal (default
+delete_assets.<input name>.journal.jsonl next to the input file); rerunning
+after an interruption skips them.
 
 Requirements:
     - pandas
     - requests
+    - aiohttp (for --concurrency greater than 1)
     - python-dotenv (optional, for environment variables)
 
 API Endpoint: PATCH /assets/v1/assets/{id}/archive
 """
 
 import argparse
+import asyncio
 import csv
 import logging
+import os
 import sys
 import time
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
+import aiohttp
 import pandas as pd
 import requests
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.config import API_BASE_URL  # noqa: E402
+from common.journal import OperationJournal, journal_path  # noqa: E402
+from common.rate_limiter import AdaptiveRateLimiter, retry_after_seconds  # noqa: E402
+
 TOKEN = ""  # Add your SafetyCulture API token here
 
 # Configure logging
@@ -36,13 +50,16 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Attempts per asset when the API answers 429 in concurrent mode
+MAX_THROTTLE_RETRIES = 5
+
 
 class SafetyCultureAssetArchiver:
     """
     A class to handle archiving of SafetyCulture assets via their API.
     """
 
-    def __init__(self, api_token: str, base_url: str = "https://api.safetyculture.io"):
+    def __init__(self, api_token: str, base_url: str = API_BASE_URL):
         """
         Initialize the SafetyCulture Asset Archiver.
 
@@ -64,6 +81,114 @@ class SafetyCultureAssetArchiver:
         # Statistics
         self.stats = {"total": 0, "successful": 0, "failed": 0, "skipped": 0}
 
+        # Opened by open_journal; records each asset's outcome for resuming
+        self.journal = None
+
+    def build_result(
+        self, asset_id: str, status_code: Any, response_text: str
+    ) -> Dict[str, Any]:
+        """
+        Build the result row for a completed archive request and update stats.
+
+        Args:
+            asset_id: UUID of the asset
+            status_code: HTTP status code of the response
+            response_text: Body of the response
+
+        Returns:
+            Dictionary containing the result of the archive attempt
+        """
+        result = {
+            "asset_id": asset_id,
+            "timestamp": datetime.now().isoformat(),
+            "status_code": status_code,
+            "success": False,
+            "error_message": None,
+            "response_body": None,
+        }
+
+        if status_code == 200:
+            result["success"] = True
+            result["response_body"] = (
+                response_text if response_text else "Asset archived successfully"
+            )
+            self.stats["successful"] += 1
+            logger.info(f"Successfully archived asset: {asset_id}")
+        else:
+            result["error_message"] = f"HTTP {status_code}: {response_text}"
+            self.stats["failed"] += 1
+            logger.error(
+                f"Failed to archive asset {asset_id}: {result['error_message']}"
+            )
+
+        return result
+
+    def build_error_result(self, asset_id: str, error_message: str) -> Dict[str, Any]:
+        """
+        Build the result row for a request that raised and update stats.
+
+        Args:
+            asset_id: UUID of the asset
+            error_message: Description of the error
+
+        Returns:
+            Dictionary containing the result of the archive attempt
+        """
+        self.stats["failed"] += 1
+        return {
+            "asset_id": asset_id,
+            "timestamp": datetime.now().isoformat(),
+            "status_code": None,
+            "success": False,
+            "error_message": error_message,
+            "response_body": None,
+        }
+
+    def open_journal(
+        self, journal_file: Optional[str], input_file: str, asset_ids: List[str]
+    ) -> List[str]:
+        """
+        Open the run journal and drop assets an earlier run already archived.
+
+        Args:
+            journal_file: Path to the journal file, or None for the default
+                journal of this input file
+            input_file: Path to the input CSV file the asset IDs were read from
+            asset_ids: Asset IDs read from the input file
+
+        Returns:
+            Asset IDs that still need to be archived
+        """
+        journal_file = journal_file or journal_path(__file__, input_file)
+        self.journal = OperationJournal(journal_file, input_file=input_file)
+        if self.journal.moved_to:
+            logger.info(
+                f"{input_file} changed, moved the old journal to "
+                f"{self.journal.moved_to}"
+            )
+        if not self.journal.resumed:
+            return asset_ids
+
+        remaining = self.journal.remaining(asset_ids)
+        self.stats["skipped"] = len(asset_ids) - len(remaining)
+        logger.info(f"Resuming from {journal_file}: {self.journal.summary()}")
+        logger.info(f"Skipping {self.stats['skipped']} already archived assets")
+        return remaining
+
+    def journal_result(self, result: Dict[str, Any]):
+        """
+        Record the outcome of an archive attempt in the run journal.
+
+        Args:
+            result: Result dictionary of the archive attempt
+        """
+        if self.journal is None:
+            return
+        if result["success"]:
+            self.journal.complete(result["asset_id"], result=result["status_code"])
+        else:
+            self.journal.fail(result["asset_id"], error=result["error_message"])
+
     def archive_asset(self, asset_id: str) -> Dict[str, Any]:
         """
         Archive a single asset in SafetyCulture.
@@ -82,58 +207,66 @@ class SafetyCultureAssetArchiver:
         try:
             logger.info(f"Attempting to archive asset: {asset_id}")
             response = self.session.patch(url, json=archive_data)
-
-            result = {
-                "asset_id": asset_id,
-                "timestamp": datetime.now().isoformat(),
-                "status_code": response.status_code,
-                "success": False,
-                "error_message": None,
-                "response_body": None,
-            }
-
-            if response.status_code == 200:
-                result["success"] = True
-                result["response_body"] = (
-                    response.text if response.text else "Asset archived successfully"
-                )
-                self.stats["successful"] += 1
-                logger.info(f"Successfully archived asset: {asset_id}")
-            else:
-                result["error_message"] = (
-                    f"HTTP {response.status_code}: {response.text}"
-                )
-                self.stats["failed"] += 1
-                logger.error(
-                    f"Failed to archive asset {asset_id}: {result['error_message']}"
-                )
+            result = self.build_result(asset_id, response.status_code, response.text)
 
         except requests.exceptions.RequestException as e:
-            result = {
-                "asset_id": asset_id,
-                "timestamp": datetime.now().isoformat(),
-                "status_code": None,
-                "success": False,
-                "error_message": str(e),
-                "response_body": None,
-            }
-            self.stats["failed"] += 1
+            result = self.build_error_result(asset_id, str(e))
             logger.error(f"Request exception for asset {asset_id}: {e}")
 
         except Exception as e:
-            result = {
-                "asset_id": asset_id,
-                "timestamp": datetime.now().isoformat(),
-                "status_code": None,
-                "success": False,
-                "error_message": f"Unexpected error: {str(e)}",
-                "response_body": None,
-            }
-            self.stats["failed"] += 1
+            result = self.build_error_result(asset_id, f"Unexpected error: {str(e)}")
             logger.error(f"Unexpected error for asset {asset_id}: {e}")
 
         return result
 
+    async def archive_asset_async(
+        self,
+        session: aiohttp.ClientSession,
+        rate_limiter: AdaptiveRateLimiter,
+        asset_id: str,
+    ) -> Dict[str, Any]:
+        """
+        Archive a single asset over a shared aiohttp session.
+
+        Args:
+            session: Shared aiohttp session
+            rate_limiter: Rate limiter shared by all workers
+            asset_id: UUID of the asset to archive
+
+        Returns:
+            Dictionary containing the result of the archive attempt
+        """
+        url = f"{self.base_url}/assets/v1/assets/{asset_id}/archive"
+
+        try:
+            for attempt in range(1, MAX_THROTTLE_RETRIES + 1):
+                await rate_limiter.acquire()
+                logger.info(f"Attempting to archive asset: {asset_id}")
+                async with session.patch(url, json={}) as response:
+                    response_text = await response.text()
+                    status = response.status
+                    retry_after = response.headers.get("Retry-After")
+
+                if status == 429 and attempt < MAX_THROTTLE_RETRIES:
+                    # Slows every worker down, then retries this asset
+                    rate_limiter.on_throttle(retry_after_seconds(retry_after))
+                    logger.warning(
+                        f"Rate limited on asset {asset_id}, slowing to "
+                        f"{rate_limiter.rate:.1f} requests/sec"
+                    )
+                    continue
+                if status == 200:
+                    rate_limiter.on_success(response.headers)
+                return self.build_result(asset_id, status, response_text)
+
+        except aiohttp.ClientError as e:
+            logger.error(f"Request exception for asset {asset_id}: {e}")
+            return self.build_error_result(asset_id, str(e))
+
+        except Exception as e:
+            logger.error(f"Unexpected error for asset {asset_id}: {e}")
+            return self.build_error_result(asset_id, f"Unexpected error: {str(e)}")
+
     def read_asset_ids_from_csv(self, input_file: str) -> List[str]:
         """
         Read asset IDs from input CSV file with header row.
@@ -226,7 +359,11 @@ class SafetyCultureAssetArchiver:
             logger.error(f"Error writing to output file: {e}")
 
     def archive_assets_from_csv(
-        self, input_file: str, output_file: str, delay: float = 0.1
+        self,
+        input_file: str,
+        output_file: str,
+        delay: float = 0.1,
+        journal_file: Optional[str] = None,
     ):
         """
         Archive assets listed in CSV file and log results.
@@ -235,6 +372,7 @@ class SafetyCultureAssetArchiver:
             input_file: Path to input CSV file containing asset IDs
             output_file: Path to output CSV file for logging results
             delay: Delay in seconds between API calls (to respect rate limits)
+            journal_file: Path to the journal used to resume interrupted runs
         """
         # Read asset IDs
         asset_ids = self.read_asset_ids_from_csv(input_file)
@@ -244,6 +382,7 @@ class SafetyCultureAssetArchiver:
             return
 
         self.stats["total"] = len(asset_ids)
+        asset_ids = self.open_journal(journal_file, input_file, asset_ids)
 
         # Initialize output file with header
         self.write_result_to_csv(output_file, {}, write_header=True)
@@ -261,14 +400,129 @@ class SafetyCultureAssetArchiver:
 
             # Write result to CSV immediately
             self.write_result_to_csv(output_file, result)
+            self.journal_result(result)
 
             # Add delay between requests to respect rate limits
             if delay > 0 and i < len(asset_ids):
                 time.sleep(delay)
 
         end_time = time.time()
-        duration = end_time - start_time
+        self.journal.finish()
+        self.log_summary(output_file, end_time - start_time)
+
+    async def archive_assets_concurrently(
+        self, asset_ids: List[str], output_file: str, concurrency: int, max_rps: float
+    ):
+        """
+        Archive assets with a pool of concurrent workers under a shared rate limit.
 
+        Args:
+            asset_ids: Asset IDs to archive
+            output_file: Path to output CSV file for logging results
+            concurrency: Number of requests allowed in flight at once
+            max_rps: Maximum requests per second across all workers (0 = unlimited)
+        """
+        fieldnames = [
+            "asset_id",
+            "timestamp",
+            "success",
+            "status_code",
+            "error_message",
+            "response_body",
+        ]
+        # Never exceeds max_rps (0 = effectively unlimited); all workers back off
+        # together on 429s and recover afterwards
+        rate = max_rps if max_rps > 0 else 1000.0
+        rate_limiter = AdaptiveRateLimiter(rate, max_rate=rate)
+        queue: asyncio.Queue = asyncio.Queue()
+        for item in enumerate(asset_ids, 1):
+            queue.put_nowait(item)
+
+        connector = aiohttp.TCPConnector(limit=concurrency, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=60, connect=10)
+
+        # Results are written as they complete; one open handle for the whole run
+        with open(output_file, "a", newline="", encoding="utf-8") as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+
+            async with aiohttp.ClientSession(
+                headers=dict(self.session.headers),
+                connector=connector,
+                timeout=timeout,
+            ) as session:
+
+                async def worker():
+                    while not queue.empty():
+                        i, asset_id = queue.get_nowait()
+                        logger.info(
+                            f"Processing asset {i}/{len(asset_ids)}: {asset_id}"
+                        )
+                        result = await self.archive_asset_async(
+                            session, rate_limiter, asset_id
+                        )
+                        writer.writerow(result)
+                        csvfile.flush()
+                        self.journal_result(result)
+
+                await asyncio.gather(
+                    *[worker() for _ in range(min(concurrency, len(asset_ids)))]
+                )
+
+    def archive_assets_from_csv_async(
+        self,
+        input_file: str,
+        output_file: str,
+        concurrency: int = 10,
+        max_rps: float = 10.0,
+        journal_file: Optional[str] = None,
+    ):
+        """
+        Archive assets listed in CSV file concurrently and log results.
+
+        Args:
+            input_file: Path to input CSV file containing asset IDs
+            output_file: Path to output CSV file for logging results
+            concurrency: Number of requests allowed in flight at once
+            max_rps: Maximum requests per second across all workers (0 = unlimited)
+            journal_file: Path to the journal used to resume interrupted runs
+        """
+        # Read asset IDs
+        asset_ids = self.read_asset_ids_from_csv(input_file)
+
+        if not asset_ids:
+            logger.warning("No asset IDs found in input file")
+            return
+
+        self.stats["total"] = len(asset_ids)
+        asset_ids = self.open_journal(journal_file, input_file, asset_ids)
+
+        # Initialize output file with header
+        self.write_result_to_csv(output_file, {}, write_header=True)
+
+        logger.info(
+            f"Starting archiving of {len(asset_ids)} assets "
+            f"({concurrency} concurrent, max {max_rps} requests/sec)..."
+        )
+        logger.info(f"Results will be logged to: {output_file}")
+
+        start_time = time.time()
+        asyncio.run(
+            self.archive_assets_concurrently(
+                asset_ids, output_file, concurrency, max_rps
+            )
+        )
+        end_time = time.time()
+        self.journal.finish()
+        self.log_summary(output_file, end_time - start_time)
+
+    def log_summary(self, output_file: str, duration: float):
+        """
+        Log final statistics for an archiving run.
+
+        Args:
+            output_file: Path to the output CSV file
+            duration: Total run time in seconds
+        """
         # Log final statistics
         logger.info("=" * 50)
         logger.info("ARCHIVING SUMMARY")
@@ -296,6 +550,7 @@ def main():
 Examples:
   python delete_assets.py --api-token YOUR_TOKEN --input input.csv --output output.csv
   python delete_assets.py --api-token YOUR_TOKEN --input input.csv --output output.csv --delay 0.5
+  python delete_assets.py --input input.csv --concurrency 20 --max-rps 10
 
 Environment Variables:
   SC_API_TOKEN - SafetyCulture API token (alternative to --api-token)
@@ -329,11 +584,36 @@ Environment Variables:
         help="Delay between API calls in seconds (default: 0.1)",
     )
 
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Number of archive requests in flight at once; values above 1 use "
+        "the async executor and ignore --delay (default: 1)",
+    )
+
+    parser.add_argument(
+        "--max-rps",
+        type=float,
+        default=10.0,
+        help="Maximum archive requests per second across all concurrent workers, "
+        "0 for unlimited (default: 10)",
+    )
+
+    parser.add_argument(
+        "--journal",
+        type=str,
+        default=None,
+        help="Journal of archived assets; a rerun skips assets recorded in it "
+        "(default: delete_assets.<input name>.journal.jsonl next to the input)",
+    )
+
     parser.add_argument(
         "--base-url",
         type=str,
-        default="https://api.safetyculture.io",
-        help="SafetyCulture API base URL (default: https://api.safetyculture.io)",
+        default=API_BASE_URL,
+        help="SafetyCulture API base URL (default: $SC_API_BASE_URL or "
+        "https://api.safetyculture.io)",
     )
 
     parser.add_argument(
@@ -371,7 +651,11 @@ Environment Variables:
     print(f"  Input file: {args.input}")
     print(f"  Output file: {args.output}")
     print(f"  API base URL: {args.base_url}")
-    print(f"  Delay between calls: {args.delay}s")
+    if args.concurrency > 1:
+        print(f"  Concurrency: {args.concurrency}")
+        print(f"  Max requests/sec: {args.max_rps}")
+    else:
+        print(f"  Delay between calls: {args.delay}s")
 
     confirmation = (
         input("\nAre you sure you want to proceed? (yes/no): ").lower().strip()
@@ -384,7 +668,14 @@ Environment Variables:
     archiver = SafetyCultureAssetArchiver(api_token, args.base_url)
 
     try:
-        archiver.archive_assets_from_csv(args.input, args.output, args.delay)
+        if args.concurrency > 1:
+            archiver.archive_assets_from_csv_async(
+                args.input, args.output, args.concurrency, args.max_rps, args.journal
+            )
+        else:
+            archiver.archive_assets_from_csv(
+                args.input, args.output, args.delay, args.journal
+            )
     except KeyboardInterrupt:
         logger.info("Process interrupted by user")
         sys.exit(1)
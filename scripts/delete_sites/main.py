@@ -1,37 +1,160 @@
+import asyncio
 import os
+import sys
+from urllib.parse import quote
 
 import pandas as pd
-import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.api_client import (  # noqa: E402
+    AUTH_STATUSES,
+    REJECTED_IDS_STATUSES,
+    ApiClient,
+    ApiError,
+    run_bounded,
+)
+from common.journal import OperationJournal, journal_path  # noqa: E402
+from common.output_log import CsvOutputLog  # noqa: E402
 
 TOKEN = ''
+MAX_CONCURRENCY = 10  # Delete requests in flight at once
+INPUT_FILE = 'input.csv'
+# Deleted sites, so a rerun skips them; one journal per script and input file
+JOURNAL_FILE = journal_path(__file__, INPUT_FILE)
+OUTPUT_FILE = 'output.csv'
+DELETE_PATH = '/directory/v1/folders'
+MAX_BATCH_IDS = 100  # Folder IDs sent in one delete request
+MAX_URL_LENGTH = 4000  # Batches are cut short so request URLs stay under this
+
+
+def pack_batches(sites, base_url):
+    """Split (count, site_id) pairs into batches within the ID and URL limits"""
+    base_length = len(base_url) + len('?cascade_up=true')
+    batches, batch, length = [], [], base_length
+    for count, site_id in sites:
+        id_length = len('&folder_ids=') + len(quote(site_id, safe=''))
+        if batch and (
+            len(batch) >= MAX_BATCH_IDS or length + id_length > MAX_URL_LENGTH
+        ):
+            batches.append(batch)
+            batch, length = [], base_length
+        batch.append((count, site_id))
+        length += id_length
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def fail_batch(journal, output, batch, error, stats):
+    """Journal every site of a batch as failed so a rerun sends them again"""
+    journal.fail(*[site_id for _, site_id in batch], error=str(error))
+    for count, site_id in batch:
+        status = f"#{count} - Error deleting {site_id}: {error}"
+        output.write({'count': count, 'SiteID': site_id, 'Status': status})
+    stats['failed'] += len(batch)
+
 
+async def delete_batch(client, journal, output, batch, stats):
+    """Delete a batch of sites, splitting it in halves when the API rejects its IDs.
 
-def delete_site(site_id, count):
+    Throttling, server errors and timeouts that outlast the client's retries
+    fail the whole batch without splitting; a 401 or 403 stops the run.
+    """
+    if stats['stopped']:
+        # Left out of the journal so the rerun sends them
+        return
+    site_ids = [site_id for _, site_id in batch]
+    params = [('folder_ids', site_id) for site_id in site_ids]
+    params.append(('cascade_up', 'true'))
+    stats['requests'] += 1
     try:
-        url = f"https://api.safetyculture.io/directory/v1/folders?folder_ids={site_id}&cascade_up=true"
-        headers = {"authorization": f"Bearer {TOKEN}"}
-        response = requests.delete(url, headers=headers)
-        response.raise_for_status()
+        await client.delete(DELETE_PATH, params=params)
+    except ApiError as error:
+        if error.status in AUTH_STATUSES:
+            if not stats['stopped']:
+                stats['stopped'] = str(error)
+                print(f"Stopping: {error}")
+            return
+        if error.status not in REJECTED_IDS_STATUSES:
+            print(f"Batch of {len(batch)} sites failed, rerun to retry: {error}")
+            stats['retryable'] += len(batch)
+            fail_batch(journal, output, batch, error, stats)
+            return
+        if len(batch) > 1:
+            # The whole request fails if any ID does; retry each half so the
+            # good IDs are still deleted in bulk
+            stats['splits'] += 1
+            middle = len(batch) // 2
+            await asyncio.gather(
+                delete_batch(client, journal, output, batch[:middle], stats),
+                delete_batch(client, journal, output, batch[middle:], stats),
+            )
+            return
+        print(f"#{batch[0][0]} - Error deleting {batch[0][1]}: {error}")
+        fail_batch(journal, output, batch, error, stats)
+        return
+
+    journal.complete(*site_ids)
+    for count, site_id in batch:
         status = f"{count} - {site_id} Deleted"
-        print(status)
-        return status
-    except requests.exceptions.RequestException as error:
-        status = f"#{count} - Error deleting {site_id}: {error}"
-        print(status)
-        return status
+        output.write({'count': count, 'SiteID': site_id, 'Status': status})
+    stats['deleted'] += len(batch)
+    print(f"Deleted {len(batch)} sites ({stats['deleted']} so far)")
+
+
+async def delete_sites(sites, journal, output):
+    stats = {
+        'requests': 0,
+        'splits': 0,
+        'deleted': 0,
+        'failed': 0,
+        'retryable': 0,
+        'stopped': None,
+    }
+    async with ApiClient(TOKEN, max_concurrency=MAX_CONCURRENCY) as client:
+        batches = pack_batches(sites, client.url(DELETE_PATH))
+        print(f"Deleting {len(sites)} sites in {len(batches)} batches")
+
+        async def delete_one(_, batch):
+            await delete_batch(client, journal, output, batch, stats)
+
+        await run_bounded(delete_one, batches, MAX_CONCURRENCY)
+    return stats
 
 
 def main():
-    csv_data = pd.read_csv('input.csv').to_dict('records')
-    output_file = 'output.csv'
+    csv_data = pd.read_csv(INPUT_FILE, dtype=str).fillna('').to_dict('records')
+    journal = OperationJournal(JOURNAL_FILE, input_file=INPUT_FILE)
+    if journal.moved_to:
+        print(f"{INPUT_FILE} changed, moved the old journal to {journal.moved_to}")
+    if journal.resumed:
+        print(f"Resuming from {JOURNAL_FILE}: {journal.summary()}")
+    # One entry per site still to delete, keeping the input row number
+    sites = {}
     for count, row in enumerate(csv_data):
         site_id = row['siteId']
-        status = delete_site(site_id, count)
-        pd.DataFrame(
-            {'count': [count], 'SiteID': [site_id], 'Status': [status]}
-        ).to_csv(
-            output_file, mode='a', header=not os.path.exists(output_file), index=False
+        if site_id not in sites and not journal.is_done(site_id):
+            sites[site_id] = count
+    with CsvOutputLog(OUTPUT_FILE, ['count', 'SiteID', 'Status']) as output:
+        stats = asyncio.run(
+            delete_sites(
+                [(count, site_id) for site_id, count in sites.items()],
+                journal,
+                output,
+            )
         )
+    print(
+        f"Deleted {stats['deleted']} sites with {stats['requests']} requests "
+        f"({stats['splits']} failed batches split), {stats['failed']} failed "
+        f"({stats['retryable']} throttled or unavailable)"
+    )
+    if stats['stopped']:
+        # Sites not yet sent are not journaled, so keep the journal for the rerun
+        journal.close()
+        print(f"Stopped early, fix the token and rerun: {stats['stopped']}")
+        sys.exit(1)
+    journal.finish()
 
 
-main()
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""
+Checks that pack_batches keeps delete requests within the ID and URL limits,
+and that delete_batch only splits a batch when the API rejects its IDs.
+
+Run with: python -m pytest scripts/delete_sites
+"""
+
+import asyncio
+import importlib.util
+import os
+from urllib.parse import quote
+
+import pytest
+
+MAIN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+BASE_URL = "https://api.example.com/directory/v1/folders"
+
+
+@pytest.fixture
+def delete_sites():
+    spec = importlib.util.spec_from_file_location("delete_sites_main", MAIN_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def sites(count, id_length=36):
+    return [(number, f"{number:0{id_length}d}") for number in range(1, count + 1)]
+
+
+def url_length(batch):
+    return (
+        len(BASE_URL)
+        + len("?cascade_up=true")
+        + sum(
+            len("&folder_ids=") + len(quote(site_id, safe="")) for _, site_id in batch
+        )
+    )
+
+
+def test_batches_stop_at_max_batch_ids(delete_sites, monkeypatch):
+    monkeypatch.setattr(delete_sites, "MAX_BATCH_IDS", 10)
+    batches = delete_sites.pack_batches(sites(25), BASE_URL)
+    assert [len(batch) for batch in batches] == [10, 10, 5]
+    assert [entry for batch in batches for entry in batch] == sites(25)
+
+
+def test_batches_stop_before_max_url_length(delete_sites, monkeypatch):
+    monkeypatch.setattr(delete_sites, "MAX_URL_LENGTH", 500)
+    batches = delete_sites.pack_batches(sites(40), BASE_URL)
+    assert len(batches) > 1
+    assert all(url_length(batch) <= 500 for batch in batches)
+    # Each batch is filled as far as the limit allows
+    for batch, following in zip(batches, batches[1:]):
+        assert url_length(batch + following[:1]) > 500
+
+
+def test_escaped_ids_count_at_their_encoded_length(delete_sites, monkeypatch):
+    monkeypatch.setattr(delete_sites, "MAX_URL_LENGTH", 200)
+    # "a b/c" is sent as "a%20b%2Fc"
+    per_id = len("&folder_ids=") + len("a%20b%2Fc")
+    per_batch = (200 - url_length([])) // per_id
+    batches = delete_sites.pack_batches([(1, "a b/c")] * 20, BASE_URL)
+    assert [len(batch) for batch in batches[:-1]] == [per_batch] * (len(batches) - 1)
+
+
+def test_oversized_id_still_gets_its_own_batch(delete_sites, monkeypatch):
+    monkeypatch.setattr(delete_sites, "MAX_URL_LENGTH", 10)
+    batches = delete_sites.pack_batches(sites(3), BASE_URL)
+    assert [len(batch) for batch in batches] == [1, 1, 1]
+
+
+class Recorder:
+    def __init__(self):
+        self.rows = []
+
+    def write(self, row):
+        self.rows.append(row)
+
+
+class FakeClient:
+    """Rejects requests containing a bad ID with `status`, deletes the rest"""
+
+    def __init__(self, api_error, bad_ids, status):
+        self.api_error = api_error
+        self.bad_ids = set(bad_ids)
+        self.status = status
+        self.requests = []
+
+    async def delete(self, path, params=None):
+        site_ids = [value for key, value in params if key == "folder_ids"]
+        self.requests.append(site_ids)
+        if self.bad_ids.intersection(site_ids):
+            raise self.api_error("rejected", status=self.status)
+
+
+def run_batch(delete_sites, tmp_path, batch, bad_ids, status):
+    client = FakeClient(delete_sites.ApiError, bad_ids, status)
+    journal = delete_sites.OperationJournal(str(tmp_path / "journal.jsonl"))
+    stats = {
+        "requests": 0,
+        "splits": 0,
+        "deleted": 0,
+        "failed": 0,
+        "retryable": 0,
+        "stopped": None,
+    }
+    asyncio.run(delete_sites.delete_batch(client, journal, Recorder(), batch, stats))
+    journal.close()
+    return client, journal, stats
+
+
+def test_rejected_id_is_isolated_by_splitting(delete_sites, tmp_path):
+    batch = sites(8)
+    bad = batch[5][1]
+    client, journal, stats = run_batch(delete_sites, tmp_path, batch, [bad], 404)
+    assert stats["deleted"] == 7 and stats["failed"] == 1
+    assert journal.failed == {bad}
+    assert len(client.requests) == 7
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_exhausted_retries_fail_the_batch_without_splitting(
+    delete_sites, tmp_path, status
+):
+    batch = sites(8)
+    client, journal, stats = run_batch(
+        delete_sites, tmp_path, batch, [batch[0][1]], status
+    )
+    assert len(client.requests) == 1
+    assert stats["failed"] == stats["retryable"] == 8
+    assert stats["splits"] == 0
+
+
+def test_auth_error_stops_without_journaling(delete_sites, tmp_path):
+    batch = sites(8)
+    client, journal, stats = run_batch(
+        delete_sites, tmp_path, batch, [batch[0][1]], 403
+    )
+    assert len(client.requests) == 1
+    assert stats["stopped"]
+    assert not journal.failed and not journal.results
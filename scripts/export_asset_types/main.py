@@ -1,38 +1,39 @@
+import asyncio
 import csv
+import os
+import sys
 
-import requests
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.api_client import ApiClient, ApiError  # noqa: E402
 
 TOKEN = ''
 
 
-def fetch_asset_types():
-    url = "https://api.safetyculture.io/assets/v1/types/list"
-    headers = {'Authorization': f'Bearer {TOKEN}', 'Content-Type': 'application/json'}
-
+async def fetch_asset_types():
     all_types = []
     page_token = None
 
-    while True:
-        payload = {'page_size': 100}
-
-        if page_token:
-            payload['page_token'] = page_token
-        print(payload)
-        try:
-            response = requests.post(url, headers=headers, json=payload)
-            response.raise_for_status()
+    async with ApiClient(TOKEN) as client:
+        while True:
+            payload = {'page_size': 100}
 
-            data = response.json()
-            types = data.get('type_list', [])
-            all_types.extend(types)
+            if page_token:
+                payload['page_token'] = page_token
+            print(payload)
+            try:
+                data = await client.post(
+                    "/assets/v1/types/list", json=payload, idempotent=True
+                )
+                types = data.get('type_list', [])
+                all_types.extend(types)
 
-            page_token = data.get('page_token')
-            if not page_token:
-                break
+                page_token = data.get('page_token')
+                if not page_token:
+                    break
 
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching asset types: {e}")
-            return []
+            except ApiError as e:
+                print(f"Error fetching asset types: {e}")
+                return []
 
     return all_types
 
@@ -66,7 +67,7 @@ def main():
         return
 
     print("Fetching asset types from SafetyCulture API...")
-    asset_types = fetch_asset_types()
+    asset_types = asyncio.run(fetch_asset_types())
 
     if asset_types:
         print(f"Found {len(asset_types)} asset types")
@@ -1,10 +1,33 @@
 import csv
+import os
 import sys
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 import requests
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.config import API_BASE_URL  # noqa: E402
+from common.disk_cache import DiskCache  # noqa: E402
+from common.feed_mirror import FeedMirror  # noqa: E402
+
 TOKEN = ''  # Add your API token here
-BASE_URL = 'https://api.safetyculture.io'
+BASE_URL = API_BASE_URL
+# Keep users, groups and templates in the shared local feed mirror and only
+# fetch records modified since the previous run
+USE_FEED_MIRROR = False
+# Template detail requests in flight at once
+MAX_WORKERS = 16
+# Reuse template details from previous runs when the feed's modified_at is
+# unchanged; the least recently used entries beyond the limit are evicted
+USE_TEMPLATE_CACHE = True
+TEMPLATE_CACHE_PATH = 'template_cache.db'
+TEMPLATE_CACHE_MAX_ENTRIES = 50000
+# Changing a template's access rules is not guaranteed to bump its feed
+# modified_at. Set a number of days to refetch cached details at least that
+# often (counted from when they were downloaded), or USE_TEMPLATE_CACHE = False
+# for an export that must reflect permission edits made since the last run.
+# None keeps entries until modified_at changes.
+TEMPLATE_CACHE_TTL_DAYS = None
 
 
 class SafetyCultureClient:
@@ -14,6 +37,10 @@ class SafetyCultureClient:
         self.base_url = base_url.rstrip('/')
         self.session = requests.Session()
         self.session.headers.update({'Authorization': f'Bearer {api_token}'})
+        # Enough pooled connections for the detail workers plus the feed pagers
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=MAX_WORKERS + 3)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
 
     def _make_request(self, url):
         response = self.session.get(url)
@@ -28,8 +55,10 @@ class SafetyCultureClient:
             return f"{uuid_part[:8]}-{uuid_part[8:12]}-{uuid_part[12:16]}-{uuid_part[16:20]}-{uuid_part[20:]}"
         return uuid_part
 
-    def fetch_paginated_feed(self, endpoint):
+    def fetch_paginated_feed(self, endpoint, params=None):
         url = f"{self.base_url}{endpoint}"
+        if params:
+            url = requests.Request('GET', url, params=params).prepare().url
         while url:
             response = self._make_request(url)
             yield from response.get('data', [])
@@ -47,6 +76,20 @@ class SafetyCultureClient:
             return None
 
 
+def fetch_template_detail(client, template_summary, cache=None):
+    template_id = template_summary.get('id', '')
+    modified_at = template_summary.get('modified_at')
+    if cache is not None and modified_at:
+        template_detail = cache.get(template_id, modified_at)
+        if template_detail is not None:
+            return template_detail
+
+    template_detail = client.get_template_by_id(template_id)
+    if cache is not None and modified_at and template_detail:
+        cache.set(template_id, template_detail, modified_at)
+    return template_detail
+
+
 def process_template_permissions(template, users_lookup, groups_lookup):
     records = []
     template_id, template_name = template.get('id', ''), template.get('name', '')
@@ -79,9 +122,38 @@ def process_template_permissions(template, users_lookup, groups_lookup):
     return records
 
 
-def fetch_users_lookup(client):
+def sync_mirrored_feed(client, mirror, endpoint, params=None):
+    """Pull records modified since the last run into the mirror and read it back."""
+    sync_started = mirror.sync_started()
+    # A periodic full fetch drops records deleted since the last one
+    full = mirror.needs_full_resync(endpoint)
+    watermark = None if full else mirror.get_watermark(endpoint)
+    feed_params = dict(params or {})
+    if watermark:
+        feed_params['modified_after'] = watermark
+    # fetch_paginated_feed raises on errors, so the watermark only advances,
+    # and records missing from a full fetch are only dropped, once the whole
+    # feed has been stored
+    records = client.fetch_paginated_feed(endpoint, feed_params)
+    if full:
+        mirror.replace_records(endpoint, records)
+    else:
+        mirror.upsert_records(endpoint, records)
+    mirror.set_watermark(endpoint, sync_started, full=full)
+    return mirror.load_records(endpoint)
+
+
+def read_feed(client, endpoint, use_mirror=False, params=None):
+    if not use_mirror:
+        return client.fetch_paginated_feed(endpoint, params)
+    # One connection per call so feeds can sync from separate threads
+    with FeedMirror() as mirror:
+        return sync_mirrored_feed(client, mirror, endpoint, params)
+
+
+def fetch_users_lookup(client, use_mirror=False):
     users_lookup = {}
-    for user in client.fetch_paginated_feed('/feed/users'):
+    for user in read_feed(client, '/feed/users', use_mirror):
         user_id = user.get('id', '')
         user_name = (
             f"{user.get('firstname', '')} {user.get('lastname', '')}".strip()
@@ -91,9 +163,9 @@ def fetch_users_lookup(client):
     return users_lookup
 
 
-def fetch_groups_lookup(client):
+def fetch_groups_lookup(client, use_mirror=False):
     groups_lookup = {}
-    for group in client.fetch_paginated_feed('/feed/groups'):
+    for group in read_feed(client, '/feed/groups', use_mirror):
         group_id = group.get('id', '')
         groups_lookup[client.transform_feed_id(group_id)] = group.get(
             'name', 'Unknown Group'
@@ -101,15 +173,29 @@ def fetch_groups_lookup(client):
     return groups_lookup
 
 
-def main():
-    if not TOKEN:
-        print("Error: Please set your SafetyCulture API token in the TOKEN variable")
-        return 1
+def write_permission_rows(csv_writer, template_detail, users_lookup, groups_lookup):
+    for record in process_template_permissions(
+        template_detail, users_lookup, groups_lookup
+    ):
+        csv_writer.writerow(
+            [
+                record['template_id'],
+                record['name'],
+                record['permission'],
+                record['assignee_type'],
+                record['assignee_id'],
+                record['assignee_name'],
+            ]
+        )
 
-    client = SafetyCultureClient(BASE_URL, TOKEN)
+
+def export_access_rules(client, cache=None):
+    """Write template_access_rules.csv for every active template"""
     with open(
         'template_access_rules.csv', 'w', newline='', encoding='utf-8'
-    ) as csv_file:
+    ) as csv_file, ThreadPoolExecutor(max_workers=2) as lookup_pool, ThreadPoolExecutor(
+        max_workers=MAX_WORKERS
+    ) as detail_pool:
         csv_writer = csv.writer(csv_file)
         csv_writer.writerow(
             [
@@ -122,27 +208,73 @@ def main():
             ]
         )
 
-        users_lookup = fetch_users_lookup(client)
-        groups_lookup = fetch_groups_lookup(client)
+        # Users and groups load alongside the template feed and detail fetches
+        users_future = lookup_pool.submit(fetch_users_lookup, client, USE_FEED_MIRROR)
+        groups_future = lookup_pool.submit(fetch_groups_lookup, client, USE_FEED_MIRROR)
 
-        for template_summary in client.fetch_paginated_feed('/feed/templates'):
+        def write_completed(futures):
+            users_lookup = users_future.result()
+            groups_lookup = groups_future.result()
+            for future in futures:
+                template_detail = future.result()
+                if template_detail:
+                    write_permission_rows(
+                        csv_writer, template_detail, users_lookup, groups_lookup
+                    )
+
+        # Mirror archived templates too so archiving is picked up incrementally
+        templates = read_feed(
+            client,
+            '/feed/templates',
+            USE_FEED_MIRROR,
+            {'archived': 'both'} if USE_FEED_MIRROR else None,
+        )
+        pending = set()
+        for template_summary in templates:
             if template_summary.get('archived', False):
                 continue
-            template_detail = client.get_template_by_id(template_summary.get('id', ''))
-            if template_detail:
-                for record in process_template_permissions(
-                    template_detail, users_lookup, groups_lookup
-                ):
-                    csv_writer.writerow(
-                        [
-                            record['template_id'],
-                            record['name'],
-                            record['permission'],
-                            record['assignee_type'],
-                            record['assignee_id'],
-                            record['assignee_name'],
-                        ]
-                    )
+            # Bound the queue so the feed pager never runs far ahead of the writers
+            if len(pending) >= MAX_WORKERS * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                write_completed(done)
+            pending.add(
+                detail_pool.submit(
+                    fetch_template_detail, client, template_summary, cache
+                )
+            )
+
+        done, _ = wait(pending)
+        write_completed(done)
+
+
+def main():
+    if not TOKEN:
+        print("Error: Please set your SafetyCulture API token in the TOKEN variable")
+        return 1
+
+    client = SafetyCultureClient(BASE_URL, TOKEN)
+    cache = (
+        DiskCache(
+            TEMPLATE_CACHE_PATH,
+            TEMPLATE_CACHE_MAX_ENTRIES,
+            ttl=(
+                TEMPLATE_CACHE_TTL_DAYS * 24 * 60 * 60
+                if TEMPLATE_CACHE_TTL_DAYS
+                else None
+            ),
+        )
+        if USE_TEMPLATE_CACHE
+        else None
+    )
+    try:
+        export_access_rules(client, cache)
+    finally:
+        if cache is not None:
+            print(
+                f"Template cache: {cache.hits} reused, "
+                f"{cache.misses} fetched from the API"
+            )
+            cache.close()
 
 
 if __name__ == "__main__":
@@ -6,20 +6,144 @@ Outputs CSV with detailed issue information including who marked each issue comp
 """
 
 import asyncio
+import csv
+import json
 import os
 import random
+import sys
 import time
 import traceback
 from datetime import datetime
-from typing import List, Optional
+from typing import Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlencode
 
 import aiohttp
+import numpy as np
 import pandas as pd
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.config import API_BASE_URL  # noqa: E402
+from common.feed_checkpoint import FeedCheckpoint  # noqa: E402
+from common.feed_mirror import FeedMirror  # noqa: E402
+from common.rate_limiter import (  # noqa: E402
+    DEFAULT_REQUESTS_PER_SECOND,
+    AdaptiveRateLimiter,
+    retry_after_seconds,
+)
+
 # Configuration
-SC_API_BASE_URL = "https://api.safetyculture.io"
+SC_API_BASE_URL = API_BASE_URL
 TOKEN = ""  # Add your SafetyCulture API token here
 
+# Keep issues and timeline items in the shared local feed mirror and only
+# fetch records modified since the previous run
+USE_FEED_MIRROR = False
+
+# Starting request rate shared by all feed fetches; it backs off on 429s and
+# recovers after a run of successful requests
+REQUESTS_PER_SECOND = DEFAULT_REQUESTS_PER_SECOND
+# Save each feed's pages and last good cursor so a rerun after a failed
+# request resumes the feed instead of starting it over
+USE_CHECKPOINTS = True
+
+# Write each fetched page straight to its raw export file and keep only the
+# fields needed for processed_issues.csv in memory
+STREAM_RAW_FEEDS = True
+# "csv" rewrites each streamed JSON Lines file as CSV with the union of all
+# columns once its feed is complete; "jsonl" keeps the JSON Lines files only
+RAW_FEED_FORMAT = "csv"
+
+ISSUES_FEED = "/feed/issues"
+TIMELINE_FEED = "/feed/issue_timeline_items"
+ASSIGNEES_FEED = "/feed/issue_assignees"
+
+# Build processed_issues.csv with columnar pandas operations (sort + groupby
+# over the timeline and assignee feeds) instead of a per-issue Python loop
+VECTORIZED_PROCESSING = True
+
+# Raw export file name (without extension) for each feed
+RAW_FEED_FILES = {
+    ISSUES_FEED: "raw_issues",
+    TIMELINE_FEED: "raw_timeline_items",
+    ASSIGNEES_FEED: "raw_assignees",
+}
+
+# Issue fields read by process_issues_to_csv; the rest only go to raw_issues.
+# task_id must stay first: collect_issues stores the resolved join key there.
+ISSUE_JOIN_FIELDS = (
+    "task_id",
+    "id",
+    "creator_id",
+    "creator_user_name",
+    "creator",
+    "title",
+    "description",
+    "created_at",
+    "due_at",
+    "completed_at",
+    "unique_id",
+    "status",
+)
+# Timeline and assignee fields read by process_issues_vectorized
+TIMELINE_JOIN_FIELDS = (
+    "task_id",
+    "item_type",
+    "timestamp",
+    "creator_id",
+    "creator_name",
+)
+ASSIGNEE_JOIN_FIELDS = ("issue_id", "type", "group_name", "name")
+
+
+def issue_task_id(issue: dict):
+    """Join key of an issue: task_id, or id only when the task_id key is absent"""
+    return issue.get("task_id", issue.get("id", ""))
+
+
+class RawFeedWriter:
+    """Stream feed pages to a JSON Lines file, tracking the union of columns."""
+
+    def __init__(self, output_dir: str, name: str):
+        """Initialize a writer for one raw feed export."""
+        self.name = name
+        self.jsonl_path = os.path.join(output_dir, f"{name}.jsonl")
+        self.csv_path = os.path.join(output_dir, f"{name}.csv")
+        self.columns = {}
+        self.count = 0
+        self.file = None
+
+    def write_page(self, items: List[dict]):
+        """Append one page of records."""
+        if self.file is None:
+            self.file = open(self.jsonl_path, "w", encoding="utf-8")
+        for item in items:
+            self.columns.update(dict.fromkeys(item))
+            self.file.write(json.dumps(item) + "\n")
+        self.count += len(items)
+
+    def close(self, output_format: str = "csv") -> Optional[str]:
+        """Finish the export, converting to CSV unless JSON Lines was requested.
+
+        Returns:
+            Path of the exported file, or None if the feed was empty
+        """
+        if self.file is None:
+            return None
+        self.file.close()
+        if output_format == "jsonl":
+            return self.jsonl_path
+
+        # Second streaming pass now that every column is known
+        with open(self.jsonl_path, encoding="utf-8") as source, open(
+            self.csv_path, "w", newline="", encoding="utf-8"
+        ) as target:
+            writer = csv.DictWriter(target, fieldnames=list(self.columns), restval="")
+            writer.writeheader()
+            for line in source:
+                writer.writerow(json.loads(line))
+        os.remove(self.jsonl_path)
+        return self.csv_path
+
 
 class IssuesExtractor:  # pylint: disable=too-many-instance-attributes
     """Class to extract issues from SafetyCulture API."""
@@ -35,14 +159,28 @@ class IssuesExtractor:  # pylint: disable=too-many-instance-attributes
         self.timeline_data = []
         self.assignees_data = []
 
+        # Records received per feed
+        self.feed_counts = {}
+
+        # Feeds whose cursor chain ended on a failed request
+        self.incomplete_feeds = set()
+        # Open during fetch_all_data_concurrent when USE_CHECKPOINTS is set
+        self.checkpoint = None
+
+        # Lookup indexes built after fetching (see build_lookup_indexes), or
+        # page by page while streaming
+        self.completion_index = {}
+        self.assignees_index = {}
+
         # Async settings
         self.max_concurrent_requests = 10
         self.batch_size = 1000
 
         # Retry configuration
-        self.max_retries = 3
+        self.max_retries = 5
         self.base_delay = 2
         self.max_delay = 30
+        self.rate_limiter = AdaptiveRateLimiter(REQUESTS_PER_SECOND)
 
     async def get_session_headers(self):
         """Get headers for API requests."""
@@ -61,6 +199,18 @@ class IssuesExtractor:  # pylint: disable=too-many-instance-attributes
                     print(f"Final async attempt failed: {e}")
                     raise
 
+                if isinstance(e, aiohttp.ClientResponseError) and e.status == 429:
+                    # The shared limiter pauses every feed, so no extra sleep here
+                    retry_after = retry_after_seconds(
+                        e.headers.get("Retry-After") if e.headers else None
+                    )
+                    self.rate_limiter.on_throttle(retry_after)
+                    print(
+                        f"Rate limited (attempt {attempt + 1}/{self.max_retries}), "
+                        f"slowing to {self.rate_limiter.rate:.1f} requests/sec"
+                    )
+                    continue
+
                 delay = min(
                     self.base_delay * (2**attempt) + random.uniform(0, 1),
                     self.max_delay,
@@ -77,47 +227,93 @@ class IssuesExtractor:  # pylint: disable=too-many-instance-attributes
         """Fetch a single page of data from API with retry logic."""
 
         async def make_request():
+            await self.rate_limiter.acquire()
             async with session.get(url, params=params) as response:
                 response.raise_for_status()
-                return await response.json()
+                data = await response.json()
+                self.rate_limiter.on_success(response.headers)
+                return data
 
         try:
             return await self.retry_async_call(make_request)
         except Exception as e:  # pylint: disable=broad-exception-caught
             print(f"Error fetching {url} after all retries: {e}")
-            return {"data": [], "metadata": {}}
+            return {"data": [], "metadata": {}, "error": str(e)}
 
     async def fetch_feed_chain(
-        self, session: aiohttp.ClientSession, endpoint: str, params: dict = None
+        self,
+        session: aiohttp.ClientSession,
+        endpoint: str,
+        params: dict = None,
+        on_page: Optional[Callable[[List[dict]], None]] = None,
     ) -> List[dict]:
-        """Fetch all data from a feed endpoint following next_page chain."""
+        """Fetch all data from a feed endpoint following next_page chain.
+
+        When on_page is given each page is handed to it instead of being
+        collected, and an empty list is returned. With a checkpoint open, a
+        chain that previously stopped on an error is replayed from the saved
+        pages and continued from its last good cursor.
+        """
         all_data = []
-        current_url = f"{self.api_base_url}{endpoint}"
+        total = 0
+        start_url = f"{self.api_base_url}{endpoint}"
+        current_url = start_url
+        request_params = params
         page_count = 0
+        origin = f"{start_url}?{urlencode(params)}" if params else start_url
 
-        print(f"Fetching data from {endpoint}...")
+        def deliver(items: List[dict]):
+            if on_page is None:
+                all_data.extend(items)
+            else:
+                on_page(items)
 
-        while current_url:
-            request_params = (
-                params if current_url == f"{self.api_base_url}{endpoint}" else None
+        saved = self.checkpoint.resume(endpoint, origin) if self.checkpoint else None
+        if saved:
+            print(
+                f"Resuming {endpoint} from checkpoint: {saved['records']} items "
+                f"in {saved['pages']} pages"
             )
+            for items in self.checkpoint.iter_pages(endpoint):
+                deliver(items)
+            total = saved["records"]
+            page_count = saved["pages"]
+            current_url = saved["next_url"]
+            request_params = None
+        else:
+            print(f"Fetching data from {endpoint}...")
 
+        while current_url:
             data = await self.fetch_single_page(session, current_url, request_params)
+            request_params = None
+            if data.get("error"):
+                self.incomplete_feeds.add(endpoint)
+                if self.checkpoint and page_count:
+                    print(
+                        f"Checkpoint kept for {endpoint} after page {page_count}; "
+                        "rerun to resume"
+                    )
+                break
             items = data.get("data", [])
 
             if not items:
                 break
 
-            all_data.extend(items)
-            page_count += 1
-
             metadata = data.get("metadata", {})
             next_page = metadata.get("next_page", "")
             remaining = metadata.get("remaining_records", 0)
 
+            if next_page and self.checkpoint:
+                self.checkpoint.save_page(
+                    endpoint, origin, items, f"{self.api_base_url}{next_page}"
+                )
+            deliver(items)
+            total += len(items)
+            page_count += 1
+
             print(
                 f"Fetched {endpoint} page {page_count}: {len(items)} items "
-                f"(total: {len(all_data)}, remaining: {remaining})"
+                f"(total: {total}, remaining: {remaining})"
             )
 
             if next_page:
@@ -125,35 +321,238 @@ class IssuesExtractor:  # pylint: disable=too-many-instance-attributes
             else:
                 break
 
-        print(
-            f"Completed {endpoint}: {len(all_data)} total items in {page_count} pages"
-        )
+        if self.checkpoint and endpoint not in self.incomplete_feeds:
+            self.checkpoint.complete(endpoint)
+
+        print(f"Completed {endpoint}: {total} total items in {page_count} pages")
         return all_data
 
-    async def fetch_all_data_concurrent(self):
-        """Fetch issues, timeline items, and assignees concurrently."""
+    async def sync_feed_to_mirror(
+        self,
+        session: aiohttp.ClientSession,
+        mirror: FeedMirror,
+        endpoint: str,
+        on_page: Optional[Callable[[List[dict]], None]] = None,
+    ) -> List[dict]:
+        """Fetch records modified since the last sync into the mirror and load it.
+
+        When on_page is given the mirrored feed is handed to it in batches
+        instead of being loaded into a list.
+        """
+        sync_started = mirror.sync_started()
+        # A periodic full fetch drops records deleted since the last one
+        full = mirror.needs_full_resync(endpoint)
+        watermark = None if full else mirror.get_watermark(endpoint)
+        params = {"modified_after": watermark} if watermark else None
+
+        if watermark:
+            print(f"Syncing {endpoint} changes since {watermark}...")
+        elif mirror.get_watermark(endpoint):
+            print(f"Full resync of {endpoint} to drop deleted records...")
+        items = await self.fetch_feed_chain(session, endpoint, params)
+
+        # Only advance the watermark, or drop records missing from a full
+        # fetch, once the whole chain has been stored
+        if endpoint in self.incomplete_feeds:
+            mirror.upsert_records(endpoint, items)
+            print(f"Warning: {endpoint} sync incomplete, watermark not advanced")
+        else:
+            if full:
+                removed = mirror.replace_records(endpoint, items)
+                if removed:
+                    print(f"Dropped {removed} deleted {endpoint} records")
+            else:
+                mirror.upsert_records(endpoint, items)
+            mirror.set_watermark(endpoint, sync_started, full=full)
+
+        if on_page is None:
+            return mirror.load_records(endpoint)
+        batch = []
+        for record in mirror.iter_records(endpoint):
+            batch.append(record)
+            if len(batch) == self.batch_size:
+                on_page(batch)
+                batch = []
+        if batch:
+            on_page(batch)
+        return []
+
+    async def fetch_feed(
+        self,
+        session: aiohttp.ClientSession,
+        mirror: Optional[FeedMirror],
+        endpoint: str,
+        on_page: Optional[Callable[[List[dict]], None]] = None,
+    ) -> List[dict]:
+        """Fetch one feed, through the mirror for feeds that support it."""
+        # Assignee removals are not visible incrementally, so it is never mirrored
+        if mirror is not None and endpoint != ASSIGNEES_FEED:
+            return await self.sync_feed_to_mirror(session, mirror, endpoint, on_page)
+        return await self.fetch_feed_chain(session, endpoint, on_page=on_page)
+
+    async def fetch_all_data_concurrent(
+        self, page_handlers: Optional[Dict[str, Callable[[List[dict]], None]]] = None
+    ):
+        """Fetch issues, timeline items, and assignees concurrently.
+
+        When page_handlers maps each feed endpoint to a handler, every feed is
+        streamed page by page to its handler instead of being stored on the
+        extractor.
+        """
         print("Starting concurrent data fetch...")
         start_time = time.time()
+        page_handlers = page_handlers or {}
 
         headers = await self.get_session_headers()
         timeout = aiohttp.ClientTimeout(total=300)
 
         async with aiohttp.ClientSession(headers=headers, timeout=timeout) as session:
-            tasks = [
-                self.fetch_feed_chain(session, "/feed/issues"),
-                self.fetch_feed_chain(session, "/feed/issue_timeline_items"),
-                self.fetch_feed_chain(session, "/feed/issue_assignees"),
-            ]
-
+            mirror = FeedMirror() if USE_FEED_MIRROR else None
+            self.checkpoint = FeedCheckpoint() if USE_CHECKPOINTS else None
+            try:
+                tasks = [
+                    self.fetch_feed(
+                        session, mirror, endpoint, page_handlers.get(endpoint)
+                    )
+                    for endpoint in (ISSUES_FEED, TIMELINE_FEED, ASSIGNEES_FEED)
+                ]
+
+                issues, timeline, assignees = await asyncio.gather(*tasks)
+            finally:
+                if mirror is not None:
+                    mirror.close()
+                if self.checkpoint is not None:
+                    self.checkpoint.close()
+                    self.checkpoint = None
+
+        # Streamed feeds were already handed to their page handlers
+        if not page_handlers:
             self.issues_data, self.timeline_data, self.assignees_data = (
-                await asyncio.gather(*tasks)
+                issues,
+                timeline,
+                assignees,
             )
+            self.feed_counts[ISSUES_FEED] = len(issues)
+            self.feed_counts[TIMELINE_FEED] = len(timeline)
+            self.feed_counts[ASSIGNEES_FEED] = len(assignees)
 
         fetch_time = time.time() - start_time
         print(f"\nConcurrent fetch completed in {fetch_time:.2f} seconds")
-        print(f"- Issues: {len(self.issues_data)}")
-        print(f"- Timeline items: {len(self.timeline_data)}")
-        print(f"- Assignees: {len(self.assignees_data)}")
+        print(f"- Issues: {self.feed_counts.get(ISSUES_FEED, 0)}")
+        print(f"- Timeline items: {self.feed_counts.get(TIMELINE_FEED, 0)}")
+        print(f"- Assignees: {self.feed_counts.get(ASSIGNEES_FEED, 0)}")
+
+    def index_timeline_items(self, items: Iterable[dict]):
+        """Add TASK_STATUS_UPDATED events to the task_id -> latest event index."""
+        completion_index = self.completion_index
+        for item in items:
+            if item.get("item_type") != "TASK_STATUS_UPDATED":
+                continue
+            task_id = item.get("task_id")
+            timestamp = item.get("timestamp", "")
+            current = completion_index.get(task_id)
+            # Keep the first event seen for equal timestamps, matching a stable sort
+            if current is None or timestamp > current[0]:
+                completion_index[task_id] = (
+                    timestamp,
+                    item.get("creator_id", ""),
+                    item.get("creator_name", ""),
+                )
+
+    def index_assignees(self, items: Iterable[dict]):
+        """Add assignee names to the issue_id -> ordered names index."""
+        assignees_index = self.assignees_index
+        for assignee in items:
+            assignee_type = assignee.get("type", "")
+            if assignee_type == "group":
+                # For groups, look for group name or use name field
+                assignee_name = assignee.get("group_name", assignee.get("name", ""))
+            elif assignee_type == "user":
+                # For users, use the name field directly
+                assignee_name = assignee.get("name", "")
+            else:
+                continue
+            if assignee_name:
+                assignees_index.setdefault(assignee.get("issue_id"), []).append(
+                    assignee_name
+                )
+
+    def collect_issues(self, items: Iterable[dict]):
+        """Keep only the issue fields needed for processing."""
+        if VECTORIZED_PROCESSING:
+            # Field tuples hold less memory and load into a DataFrame faster.
+            # A null task_id is kept, so the task_id slot holds the resolved
+            # join key rather than the raw field.
+            self.issues_data.extend(
+                (issue_task_id(issue),)
+                + tuple(issue.get(field) for field in ISSUE_JOIN_FIELDS[1:])
+                for issue in items
+            )
+            return
+        self.issues_data.extend(
+            {field: issue[field] for field in ISSUE_JOIN_FIELDS if field in issue}
+            for issue in items
+        )
+
+    def collect_timeline_items(self, items: Iterable[dict]):
+        """Keep the status change events needed for processing, as field tuples."""
+        self.timeline_data.extend(
+            tuple(item.get(field) for field in TIMELINE_JOIN_FIELDS)
+            for item in items
+            if item.get("item_type") == "TASK_STATUS_UPDATED"
+        )
+
+    def collect_assignees(self, items: Iterable[dict]):
+        """Keep the assignee fields needed for processing, as field tuples."""
+        self.assignees_data.extend(
+            tuple(assignee.get(field) for field in ASSIGNEE_JOIN_FIELDS)
+            for assignee in items
+        )
+
+    def build_lookup_indexes(self):
+        """Index timeline and assignee feeds by issue in a single pass.
+
+        Builds task_id -> latest TASK_STATUS_UPDATED event and
+        issue_id -> ordered assignee names, so per-issue lookups are O(1)
+        instead of scanning the full feeds for every issue.
+        """
+        print("Building lookup indexes...")
+        start_time = time.time()
+
+        self.completion_index = {}
+        self.assignees_index = {}
+        self.index_timeline_items(self.timeline_data)
+        self.index_assignees(self.assignees_data)
+
+        index_time = time.time() - start_time
+        print(
+            f"Indexed {len(self.completion_index)} completion events and "
+            f"{len(self.assignees_index)} assignee lists in {index_time:.2f} seconds"
+        )
+
+    def make_page_handler(
+        self, endpoint: str, writer: RawFeedWriter
+    ) -> Callable[[List[dict]], None]:
+        """Build the streaming handler that exports and indexes a feed's pages."""
+        if VECTORIZED_PROCESSING:
+            index_page = {
+                ISSUES_FEED: self.collect_issues,
+                TIMELINE_FEED: self.collect_timeline_items,
+                ASSIGNEES_FEED: self.collect_assignees,
+            }[endpoint]
+        else:
+            index_page = {
+                ISSUES_FEED: self.collect_issues,
+                TIMELINE_FEED: self.index_timeline_items,
+                ASSIGNEES_FEED: self.index_assignees,
+            }[endpoint]
+
+        def on_page(items: List[dict]):
+            writer.write_page(items)
+            index_page(items)
+            self.feed_counts[endpoint] = writer.count
+
+        return on_page
 
     def find_completion_user(self, task_id: str) -> tuple[Optional[str], Optional[str]]:
         """Find the user who marked the issue as complete via timeline data.
@@ -161,48 +560,18 @@ class IssuesExtractor:  # pylint: disable=too-many-instance-attributes
         Returns:
             tuple: (user_id, user_name) or (None, None) if not found
         """
-        # Look for status update events that likely represent completion
-        status_events = [
-            item
-            for item in self.timeline_data
-            if (
-                item.get("task_id") == task_id
-                and item.get("item_type") == "TASK_STATUS_UPDATED"
-            )
-        ]
+        # Most recent status change as (timestamp, creator_id, creator_name)
+        latest_status_change = self.completion_index.get(task_id)
 
-        if status_events:
-            # Sort by timestamp to get the most recent status change
-            status_events.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
-            # Return both creator ID and name from the most recent status change
-            latest_status_change = status_events[0]
-            creator_id = latest_status_change.get("creator_id", "")
-            creator_name = latest_status_change.get("creator_name", "")
+        if latest_status_change:
+            _, creator_id, creator_name = latest_status_change
             return creator_id, creator_name
 
         return None, None
 
     def get_assignee_names(self, task_id: str) -> str:
         """Get comma-separated list of assignee names for a task."""
-        task_assignees = [
-            item for item in self.assignees_data if item.get("issue_id") == task_id
-        ]
-
-        assignee_names = []
-        for assignee in task_assignees:
-            assignee_type = assignee.get("type", "")
-            if assignee_type == "group":
-                # For groups, look for group name or use name field
-                group_name = assignee.get("group_name", assignee.get("name", ""))
-                if group_name:
-                    assignee_names.append(group_name)
-            elif assignee_type == "user":
-                # For users, use the name field directly
-                user_name = assignee.get("name", "")
-                if user_name:
-                    assignee_names.append(user_name)
-
-        return ", ".join(filter(None, assignee_names))
+        return ", ".join(map(str, self.assignees_index.get(task_id, [])))
 
     def create_creator_name(self, issue: dict) -> str:
         """Create full creator name from available creator information."""
@@ -227,13 +596,15 @@ class IssuesExtractor:  # pylint: disable=too-many-instance-attributes
     def process_issues_to_csv(self) -> pd.DataFrame:
         """Process all issues data into the required CSV format."""
         print("Processing issues data...")
+        if VECTORIZED_PROCESSING:
+            return self.process_issues_vectorized()
 
         processed_issues = []
 
         for issue in self.issues_data:
             try:
                 # Handle both task_id and id fields
-                task_id = issue.get("task_id", issue.get("id", ""))
+                task_id = issue_task_id(issue)
 
                 # Get basic issue information
                 creator_user_id = issue.get("creator_id", "")
@@ -283,14 +654,169 @@ class IssuesExtractor:  # pylint: disable=too-many-instance-attributes
         print(f"Processed {len(df)} issues successfully")
         return df
 
-    def export_raw_feeds_to_csv(self) -> str:
-        """Export all raw feed data to timestamped CSV files."""
+    def completion_events(self) -> pd.DataFrame:
+        """TASK_STATUS_UPDATED events, in feed order."""
+        # Rows are raw dicts after a buffered fetch and TIMELINE_JOIN_FIELDS
+        # tuples after a streamed one; the constructor accepts both. Object
+        # columns skip string dtype inference, which costs more than the joins.
+        timeline = pd.DataFrame(
+            self.timeline_data, columns=list(TIMELINE_JOIN_FIELDS), dtype=object
+        )
+        return timeline[timeline["item_type"] == "TASK_STATUS_UPDATED"]
+
+    def assignee_names(self) -> pd.DataFrame:
+        """Assignee issue_id and display name, in feed order, without blanks.
+
+        Groups use group_name (falling back to name) and users use name, as
+        in index_assignees; other assignee types are dropped.
+        """
+        assignees = pd.DataFrame(
+            self.assignees_data, columns=list(ASSIGNEE_JOIN_FIELDS), dtype=object
+        )
+        is_group = assignees["type"] == "group"
+        names = assignees["name"].where(
+            ~is_group, assignees["group_name"].fillna(assignees["name"])
+        )
+        keep = (is_group | (assignees["type"] == "user")) & names.notna()
+        keep &= names != ""
+        return pd.DataFrame(
+            {"issue_id": assignees["issue_id"][keep], "name": names[keep]}
+        )
+
+    @staticmethod
+    def latest_event_rows(
+        events: pd.DataFrame, event_keys: np.ndarray, key_count: int
+    ) -> np.ndarray:
+        """Row of the latest event for every join key, or -1 if it has none.
+
+        Matches index_timeline_items: the newest timestamp wins and the first
+        event in feed order wins between equal timestamps.
+        """
+        # Rank timestamps once and sort the integer ranks, which is much faster
+        # than sorting the strings; the stable sort keeps feed order within
+        # equal timestamps, so each key's first row after it is the winner
+        ranks, _ = pd.factorize(events["timestamp"].fillna(""), sort=True)
+        order = (-ranks).argsort(kind="stable")
+        keys, first = np.unique(event_keys[order], return_index=True)
+        rows = np.full(key_count, -1)
+        rows[keys] = order[first]
+        return rows
+
+    @staticmethod
+    def joined_names(
+        names: pd.Series, name_keys: np.ndarray, key_count: int
+    ) -> np.ndarray:
+        """Comma-separated names for every join key, in feed order."""
+        joined = np.full(key_count, "", dtype=object)
+        # Summing prefixed strings concatenates each group in order without a
+        # Python-level join per key
+        sums = (", " + names.astype(str)).groupby(name_keys, sort=False).sum()
+        joined[sums.index.to_numpy()] = sums.str[2:].to_numpy(dtype=object)
+        return joined
+
+    def creator_names(self, issues: pd.DataFrame) -> pd.Series:
+        """Vectorized create_creator_name over the issues frame."""
+        user_names = issues["creator_user_name"]
+        has_user_name = user_names.notna() & (user_names != "")
+        creator_names = user_names.str.strip().where(has_user_name, "")
+
+        # Only issues without creator_user_name fall back to the creator object
+        fallback = ~has_user_name & issues["creator"].notna()
+        fallback[fallback] = issues.loc[fallback, "creator"].map(
+            lambda creator: isinstance(creator, dict)
+        )
+        if fallback.any():
+            creators = issues.loc[fallback, "creator"]
+            full_names = (
+                creators.str.get("firstname").fillna("").astype(str)
+                + " "
+                + creators.str.get("lastname").fillna("").astype(str)
+            ).str.strip()
+            names = creators.str.get("name").fillna("").astype(str).str.strip()
+            creator_names[fallback] = full_names.where(full_names != "", names)
+        return creator_names
+
+    def process_issues_vectorized(self) -> pd.DataFrame:
+        """Columnar equivalent of the per-issue loop in process_issues_to_csv."""
+        start_time = time.time()
+        issues = pd.DataFrame(
+            self.issues_data, columns=list(ISSUE_JOIN_FIELDS), dtype=object
+        )
+        if self.issues_data and isinstance(self.issues_data[0], dict):
+            task_ids = pd.Series(
+                [issue_task_id(issue) for issue in self.issues_data], dtype=object
+            )
+        else:
+            # collect_issues already resolved the key into the task_id slot
+            task_ids = issues["task_id"]
+        events = self.completion_events()
+        assignees = self.assignee_names()
+
+        # Factorize every join key in one pass, so the joins below are integer
+        # array lookups instead of string hash joins. Missing keys get a code of
+        # their own rather than -1, so they only match each other.
+        join_keys = np.concatenate(
+            [
+                task_ids.to_numpy(dtype=object),
+                events["task_id"].to_numpy(dtype=object),
+                assignees["issue_id"].to_numpy(dtype=object),
+            ]
+        )
+        keys, _ = pd.factorize(join_keys, use_na_sentinel=False)
+        issue_keys, event_keys, assignee_keys = np.split(
+            keys, [len(issues), len(issues) + len(events)]
+        )
+        key_count = keys.max() + 1 if len(keys) else 0
+
+        event_rows = self.latest_event_rows(events, event_keys, key_count)[issue_keys]
+        assignee_names = self.joined_names(assignees["name"], assignee_keys, key_count)[
+            issue_keys
+        ]
+
+        def completion_field(column: str) -> np.ndarray:
+            # The trailing "" is picked by the -1 rows of issues with no event
+            values = events[column].fillna("").to_numpy(dtype=object)
+            return np.append(values, "")[event_rows]
+
+        # Passed-through columns keep their missing values; to_csv writes them
+        # as empty strings, like the loop's "" defaults
+        df = pd.DataFrame(
+            {
+                "task_id": task_ids,
+                "creator.user_id": issues["creator_id"],
+                "creator.name": self.creator_names(issues),
+                "title": issues["title"],
+                "description": issues["description"],
+                "created_at": issues["created_at"],
+                "due_at": issues["due_at"],
+                "assignee_names": assignee_names,
+                "completed_at": issues["completed_at"],
+                "status.label": issues["status"],
+                "unique_id": issues["unique_id"],
+                "user_who_marked_complete.user_id": completion_field("creator_id"),
+                "user_who_marked_complete.name": completion_field("creator_name"),
+            },
+            dtype=object,
+        )
+        print(
+            f"Processed {len(df)} issues successfully in "
+            f"{time.time() - start_time:.2f} seconds"
+        )
+        return df
+
+    def create_output_dir(self) -> str:
+        """Create the timestamped output directory."""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         output_dir = os.path.join(self.output_dir, f"issues_export_{timestamp}")
 
-        # Create timestamped output directory
         os.makedirs(output_dir, exist_ok=True)
         print(f"Created output directory: {output_dir}")
+        return output_dir
+
+    def export_raw_feeds_to_csv(self) -> str:
+        """Export all raw feed data to timestamped CSV files."""
+        # Create timestamped output directory
+        output_dir = self.create_output_dir()
 
         # Export raw issues data
         if self.issues_data:
@@ -334,12 +860,53 @@ class IssuesExtractor:  # pylint: disable=too-many-instance-attributes
         if not self.api_token:
             raise ValueError("TOKEN must be set with your SafetyCulture API token")
 
-        # Fetch all data
-        await self.fetch_all_data_concurrent()
+        if STREAM_RAW_FEEDS:
+            # Export and index each page as it arrives
+            output_dir = self.create_output_dir()
+            writers = {
+                endpoint: RawFeedWriter(output_dir, name)
+                for endpoint, name in RAW_FEED_FILES.items()
+            }
+            await self.fetch_all_data_concurrent(
+                {
+                    endpoint: self.make_page_handler(endpoint, writer)
+                    for endpoint, writer in writers.items()
+                }
+            )
 
-        # Export raw feeds to CSV
-        print("\nExporting raw feed data...")
-        output_dir = self.export_raw_feeds_to_csv()
+            print("\nFinalizing raw feed exports...")
+            for writer in writers.values():
+                path = writer.close(RAW_FEED_FORMAT)
+                if path:
+                    print(
+                        f"Exported {writer.count} {writer.name} records to: "
+                        f"{os.path.basename(path)}"
+                    )
+        else:
+            # Fetch all data
+            await self.fetch_all_data_concurrent()
+
+            # Index timeline and assignees so processing is linear in issue count
+            if not VECTORIZED_PROCESSING:
+                self.build_lookup_indexes()
+
+            # Export raw feeds to CSV
+            print("\nExporting raw feed data...")
+            output_dir = self.export_raw_feeds_to_csv()
+
+        if self.incomplete_feeds:
+            # Processing a partial feed would silently drop issues or their
+            # assignees, so the joined output is only written from full feeds
+            print("\n⚠ Export is incomplete; these feeds stopped on a failed request:")
+            for endpoint in sorted(self.incomplete_feeds):
+                print(f"  {endpoint}")
+            print(
+                f"  Raw exports in {output_dir} are partial and "
+                "processed_issues.csv was not written"
+            )
+            if USE_CHECKPOINTS:
+                print("  Rerun the script to resume them from their checkpoints")
+            return output_dir
 
         # Process to CSV format
         issues_df = self.process_issues_to_csv()
@@ -350,9 +917,9 @@ class IssuesExtractor:  # pylint: disable=too-many-instance-attributes
         print("\n✓ Issues extraction completed successfully!")
         print(f"  Issues processed: {len(issues_df)}")
         print(f"  Output directory: {output_dir}")
-        print(f"  Raw issues: {len(self.issues_data)} records")
-        print(f"  Raw timeline items: {len(self.timeline_data)} records")
-        print(f"  Raw assignees: {len(self.assignees_data)} records")
+        print(f"  Raw issues: {self.feed_counts.get(ISSUES_FEED, 0)} records")
+        print(f"  Raw timeline items: {self.feed_counts.get(TIMELINE_FEED, 0)} records")
+        print(f"  Raw assignees: {self.feed_counts.get(ASSIGNEES_FEED, 0)} records")
 
         return output_dir
 
@@ -362,7 +929,8 @@ async def main():
     try:
         extractor = IssuesExtractor()
         await extractor.run_extraction()
-        return 0
+        # A feed that stopped early leaves partial output; fail the run
+        return 1 if extractor.incomplete_feeds else 0
     except Exception as e:  # pylint: disable=broad-exception-caught
         print(f"Error during extraction: {e}")
         traceback.print_exc()
@@ -370,6 +938,4 @@ async def main():
 
 
 if __name__ == "__main__":
-    import sys
-
     sys.exit(asyncio.run(main()))
@@ -0,0 +1,158 @@
+"""
+Checks that the vectorized processing path writes the same
+processed_issues.csv as the per-issue loop, and that a run whose feeds did
+not complete exits nonzero without writing it.
+
+Run with: python -m pytest scripts/fetch_issues
+"""
+
+import asyncio
+import importlib.util
+import os
+
+import pytest
+
+MAIN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+
+
+@pytest.fixture
+def fetch_issues():
+    spec = importlib.util.spec_from_file_location("fetch_issues_main", MAIN_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class PageSink:
+    """Stand-in for RawFeedWriter that only counts records"""
+
+    count = 0
+
+    def write_page(self, items):
+        self.count += len(items)
+
+
+def synthetic_feeds():
+    issues = [
+        {"task_id": "t1", "id": "i1", "creator_user_name": " Ann ", "title": "A"},
+        # Null task_id stays empty; it must not fall back to id
+        {"task_id": None, "id": "i2", "title": "B", "due_at": None},
+        # Missing task_id falls back to id
+        {"id": "t3", "creator": {"firstname": "Bo", "lastname": "Li"}},
+        {"creator": {"name": " Cy "}, "status": "Open"},
+        {"task_id": "t5", "id": "i5", "completed_at": "2024-01-02T00:00:00Z"},
+        {"task_id": "t6", "creator": "not a dict", "unique_id": 6},
+    ]
+    timeline = [
+        {
+            "task_id": "t1",
+            "item_type": "TASK_STATUS_UPDATED",
+            "timestamp": "2024-01-01T00:00:00Z",
+            "creator_id": "u1",
+            "creator_name": "First",
+        },
+        # Equal timestamp: the first event in feed order wins
+        {
+            "task_id": "t1",
+            "item_type": "TASK_STATUS_UPDATED",
+            "timestamp": "2024-01-01T00:00:00Z",
+            "creator_id": "u2",
+            "creator_name": "Second",
+        },
+        {
+            "task_id": "t5",
+            "item_type": "TASK_STATUS_UPDATED",
+            "timestamp": "2024-01-03T00:00:00Z",
+            "creator_id": "u3",
+            "creator_name": "Newest",
+        },
+        {
+            "task_id": "t5",
+            "item_type": "TASK_STATUS_UPDATED",
+            "timestamp": "2024-01-02T00:00:00Z",
+            "creator_id": "u4",
+            "creator_name": "Older",
+        },
+        {"task_id": "t3", "item_type": "COMMENT_ADDED", "timestamp": "2024"},
+        {"task_id": "i2", "item_type": "TASK_STATUS_UPDATED", "creator_id": "u5"},
+    ]
+    assignees = [
+        {"issue_id": "t1", "type": "user", "name": "Dee"},
+        {"issue_id": "t1", "type": "group", "group_name": "Crew"},
+        {"issue_id": "t1", "type": "group", "name": "Fallback"},
+        {"issue_id": "t3", "type": "user", "name": 42},
+        {"issue_id": "t3", "type": "user", "name": ""},
+        {"issue_id": "t5", "type": "role", "name": "Skipped"},
+        {"issue_id": "i2", "type": "user", "name": "Not i2's"},
+        {"issue_id": None, "type": "user", "name": "No issue"},
+    ]
+    return issues, timeline, assignees
+
+
+def processed_csv(module, monkeypatch, vectorized, streamed):
+    monkeypatch.setattr(module, "VECTORIZED_PROCESSING", vectorized)
+    extractor = module.IssuesExtractor()
+    issues, timeline, assignees = synthetic_feeds()
+    feeds = {
+        module.ISSUES_FEED: issues,
+        module.TIMELINE_FEED: timeline,
+        module.ASSIGNEES_FEED: assignees,
+    }
+    if streamed:
+        for endpoint, items in feeds.items():
+            extractor.make_page_handler(endpoint, PageSink())(items)
+    else:
+        extractor.issues_data = issues
+        extractor.timeline_data = timeline
+        extractor.assignees_data = assignees
+        if not vectorized:
+            extractor.build_lookup_indexes()
+    return extractor.process_issues_to_csv().to_csv(index=False)
+
+
+@pytest.mark.parametrize("streamed", [True, False])
+def test_vectorized_matches_loop(fetch_issues, monkeypatch, streamed):
+    loop = processed_csv(fetch_issues, monkeypatch, vectorized=False, streamed=streamed)
+    vectorized = processed_csv(
+        fetch_issues, monkeypatch, vectorized=True, streamed=streamed
+    )
+    assert vectorized == loop
+
+
+def test_null_task_id_is_not_replaced_by_id(fetch_issues, monkeypatch):
+    rows = processed_csv(
+        fetch_issues, monkeypatch, vectorized=True, streamed=True
+    ).splitlines()
+    assert rows[2].startswith(",")
+    assert "Not i2's" not in rows[2]
+
+
+@pytest.mark.parametrize("streamed", [True, False])
+def test_incomplete_feed_fails_without_processed_output(
+    fetch_issues, monkeypatch, tmp_path, streamed
+):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(fetch_issues, "TOKEN", "token")
+    monkeypatch.setattr(fetch_issues, "STREAM_RAW_FEEDS", streamed)
+    issues, timeline, assignees = synthetic_feeds()
+
+    async def fetch_partial(self, page_handlers=None):
+        feeds = {
+            fetch_issues.ISSUES_FEED: issues,
+            fetch_issues.TIMELINE_FEED: timeline,
+            fetch_issues.ASSIGNEES_FEED: assignees,
+        }
+        for endpoint, items in feeds.items():
+            if page_handlers:
+                page_handlers[endpoint](items)
+        if not page_handlers:
+            self.issues_data, self.timeline_data = issues, timeline
+            self.assignees_data = assignees
+        # The assignees feed stopped on a failed request
+        self.incomplete_feeds.add(fetch_issues.ASSIGNEES_FEED)
+
+    monkeypatch.setattr(
+        fetch_issues.IssuesExtractor, "fetch_all_data_concurrent", fetch_partial
+    )
+    assert asyncio.run(fetch_issues.main()) == 1
+    assert not list(tmp_path.glob("*/processed_issues.csv"))
@@ -1,34 +1,87 @@
+import asyncio
 import os
+import sys
 
 import pandas as pd
-import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.api_client import ApiClient, ApiError, run_bounded  # noqa: E402
+from common.disk_cache import DiskCache  # noqa: E402
+from common.output_log import CsvOutputLog  # noqa: E402
 
 TOKEN = ''
+MAX_CONCURRENCY = 10  # Link requests in flight at once
+OUTPUT_FILE = 'output.csv'
+# Reuse links generated by previous runs so overlapping issue lists only
+# request links for new issues; links older than LINK_CACHE_TTL_DAYS are
+# requested again and the least recently used entries beyond the limit are
+# evicted
+USE_LINK_CACHE = True
+LINK_CACHE_PATH = 'link_cache.db'
+LINK_CACHE_MAX_ENTRIES = 500000
+LINK_CACHE_TTL_DAYS = 30
 
 
-def get_public_link(issue_id, count):
-    try:
-        url = f"https://api.safetyculture.io/tasks/v1/shared_link/{issue_id}/web_report"
-        headers = {"authorization": f"Bearer {TOKEN}"}
-        response = requests.post(url, headers=headers).json()
-        status = f"#{count+1} SUCCESS Fetching Public Link For Issue: {issue_id}"
-        log_row = {"issue_id": issue_id, "url": response['url'], "status": status}
-        print(status)
-        return log_row
-    except requests.exceptions.RequestException as err:
-        status = f"#{count+1} ERROR Fetching Public Link For Issue: {issue_id}, {err}"
-        log_row = {"issue_id": issue_id, "url": "N/A", "status": status}
+def link_error(issue_id, count, error):
+    status = f"#{count+1} ERROR Fetching Public Link For Issue: {issue_id}, {error}"
+    print(status)
+    return {"issue_id": issue_id, "url": "N/A", "status": status}
+
+
+async def get_public_link(client, issue_id, count, cache=None):
+    url = cache.get(issue_id) if cache is not None else None
+    if url:
+        status = f"#{count+1} CACHED Public Link For Issue: {issue_id}"
         print(status)
-        return log_row
+        return {"issue_id": issue_id, "url": url, "status": status}
+    try:
+        # Asking again for an issue's link is harmless, so it is retried like a read
+        response = await client.post(
+            f"/tasks/v1/shared_link/{issue_id}/web_report", idempotent=True
+        )
+    except ApiError as err:
+        return link_error(issue_id, count, err)
+    url = response.get('url') if isinstance(response, dict) else None
+    if not url:
+        return link_error(issue_id, count, f"response has no url: {response}")
+    status = f"#{count+1} SUCCESS Fetching Public Link For Issue: {issue_id}"
+    if cache is not None:
+        cache.set(issue_id, url)
+    print(status)
+    return {"issue_id": issue_id, "url": url, "status": status}
+
+
+async def get_public_links(data, output, cache=None):
+    async with ApiClient(TOKEN, max_concurrency=MAX_CONCURRENCY) as client:
+
+        async def link_row(count, row):
+            response = await get_public_link(client, row['issue_id'], count, cache)
+            output.write(response)
+
+        await run_bounded(link_row, data, MAX_CONCURRENCY)
 
 
 def main():
-    data = pd.read_csv('input.csv').to_dict('records')
-    for count, row in enumerate(data):
-        response = get_public_link(row['issue_id'], count)
-        pd.DataFrame([response]).to_csv(
-            "output.csv", mode='a', header=not os.path.exists("output.csv"), index=False
+    data = pd.read_csv('input.csv', dtype=str).to_dict('records')
+    cache = (
+        DiskCache(
+            LINK_CACHE_PATH,
+            LINK_CACHE_MAX_ENTRIES,
+            ttl=LINK_CACHE_TTL_DAYS * 24 * 60 * 60,
         )
+        if USE_LINK_CACHE
+        else None
+    )
+    try:
+        with CsvOutputLog(OUTPUT_FILE, ['issue_id', 'url', 'status']) as output:
+            asyncio.run(get_public_links(data, output, cache))
+    finally:
+        if cache is not None:
+            print(
+                f"Link cache: {cache.hits} reused, {cache.misses} requested "
+                f"({LINK_CACHE_PATH})"
+            )
+            cache.close()
 
 
 main()
@@ -1,20 +1,246 @@
 import asyncio
 import csv
+import json
 import os
+import sys
 import time
-from datetime import datetime
-from typing import Dict, List, Set
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import urlencode
 
 import aiohttp
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.config import API_BASE_URL  # noqa: E402
+from common.feed_checkpoint import FeedCheckpoint  # noqa: E402
+from common.feed_mirror import FeedMirror, parse_timestamp  # noqa: E402
+from common.rate_limiter import (  # noqa: E402
+    DEFAULT_REQUESTS_PER_SECOND,
+    AdaptiveRateLimiter,
+    retry_after_seconds,
+)
+
 TOKEN = ""
-BASE_URL = "https://api.safetyculture.io"
+BASE_URL = API_BASE_URL
+
+# Split the inspections feed into this many modified-date windows and page
+# through them concurrently. Set to 1 for a single sequential cursor chain.
+INSPECTION_SHARDS = 8
+# Most inspections are recent, so equal date ranges would leave nearly all of
+# them in the last shard. Windows are sized by record count instead: the
+# busiest window is cut into SHARD_PROBE_FANOUT date ranges, each counted from
+# the remaining_records of its first page, for up to SHARD_PROBE_ROUNDS rounds,
+# and neighbouring ranges are then merged into shards of similar size.
+SHARD_PROBE_FANOUT = 4
+SHARD_PROBE_ROUNDS = 6
+MIN_SHARD_SPAN = timedelta(seconds=1)
+# Lower bound for the first window; inspections modified earlier are still
+# fetched because the first window is left open-ended.
+FEED_START_DATE = datetime(2015, 1, 1, tzinfo=timezone.utc)
+# Keep inspections in the shared local feed mirror and only fetch inspections
+# modified since the previous run
+USE_FEED_MIRROR = False
+INSPECTIONS_FEED = "/feed/inspections"
+# Starting request rate shared by every shard and the folder fetch; it backs off
+# on 429s and recovers after a run of successful requests
+REQUESTS_PER_SECOND = DEFAULT_REQUESTS_PER_SECOND
+# Attempts per page before a cursor chain gives up
+MAX_RETRIES = 5
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Save each inspection chain's pages and last good cursor so a rerun after a
+# failed request resumes it instead of starting over
+USE_CHECKPOINTS = True
+# Checkpoint state key holding the upper date used to split the shards, so a
+# resumed run rebuilds the same windows
+SHARD_PLAN_KEY = "get_sites_without_activity shard plan"
+# Fold each page into per-site inspection counts and first/last activity as
+# it arrives, instead of keeping every inspection as a full dict. Needed for
+# very large organizations; all_inspections.csv requires the full records, so
+# it is not written in this mode.
+COMPACT_INSPECTIONS = False
+# Staleness windows in days, e.g. (30, 90, 365). Empty by default, so
+# sites_without_activity.csv lists only sites that never had an inspection
+# (with the original columns when ROLLUP_HIERARCHY is off). When set, it
+# instead lists every site idle for at least the shortest window, with
+# activity columns and a column per window.
+STALENESS_DAYS: Tuple[int, ...] = ()
+SECONDS_PER_DAY = 86400
+# Judge each folder by the activity of its whole subtree, so an area whose
+# child sites are busy is not reported as inactive; every report row shows
+# both direct and rolled-up activity
+ROLLUP_HIERARCHY = True
+
+
+def timestamp_seconds(value: Optional[str]) -> float:
+    """Epoch seconds of a feed timestamp, or 0.0 when missing or malformed"""
+    if not value:
+        return 0.0
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return 0.0
+
+
+class SiteActivity:
+    """Inspection count and first/last activity time per site.
+
+    First activity is the earliest created_at and last activity the latest
+    modified_at of a site's inspections, in epoch seconds (0.0 when unknown),
+    so any staleness threshold is a dictionary lookup per site.
+    """
+
+    def __init__(self):
+        self.counts: Dict[str, int] = {}
+        self.first: Dict[str, float] = {}
+        self.last: Dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def __contains__(self, site_id: str) -> bool:
+        return site_id in self.counts
+
+    def record(self, site_id: str, created: float, modified: float):
+        """Add one inspection of the site"""
+        self.add(site_id, 1, created, modified)
+
+    def add(self, site_id: str, count: int, first: float, last: float):
+        """Fold an activity summary (e.g. a child folder's) into the site's"""
+        current = self.counts.get(site_id)
+        if current is None:
+            self.counts[site_id] = count
+            self.first[site_id] = first
+            self.last[site_id] = last
+            return
+        self.counts[site_id] = current + count
+        if first and (not self.first[site_id] or first < self.first[site_id]):
+            self.first[site_id] = first
+        if last > self.last[site_id]:
+            self.last[site_id] = last
+
+    def idle_since(self, site_id: str, cutoff: float) -> bool:
+        """Whether the site had no inspection activity after the cutoff.
+
+        Sites whose inspections have no known modified time count as active.
+        """
+        last = self.last.get(site_id)
+        return last is None or (bool(last) and last < cutoff)
+
+
+class InspectionStore:
+    """Inspections folded into per-site activity as each page arrives.
+
+    Only the inspection count, first activity and last activity of every site
+    are kept, so memory grows with the number of distinct sites rather than
+    inspections. An inspection modified after the shard plan's end time can
+    only come from the open-ended last window, and a chain may return it more
+    than once while it keeps changing; those inspections are kept by ID,
+    newest version only, and folded in when the activity is read.
+    """
+
+    def __init__(self, plan_end: Optional[float] = None):
+        # Epoch seconds of the shard plan's end; None for a single cursor
+        # chain or mirror records, which are already unique by ID
+        self.plan_end = plan_end
+        self.activity = SiteActivity()
+        self.count = 0
+        # Inspection ID -> (site ID, created, modified) past plan_end
+        self.late: Dict[str, Tuple[Optional[str], float, float]] = {}
+
+    def __len__(self) -> int:
+        return self.count + len(self.late)
+
+    def add(self, inspections: Iterable[Dict]):
+        """Fold a page of inspection records into the per-site activity"""
+        for inspection in inspections:
+            site_id = inspection.get("site_id")
+            created = timestamp_seconds(inspection.get("created_at"))
+            modified = timestamp_seconds(inspection.get("modified_at"))
+            inspection_id = inspection.get("id")
+            if self.plan_end is not None and modified > self.plan_end and inspection_id:
+                seen = self.late.get(inspection_id)
+                if seen is None or modified >= seen[2]:
+                    self.late[inspection_id] = (site_id, created, modified)
+                continue
+            self.count += 1
+            if site_id:
+                self.activity.record(site_id, created, modified)
+
+    def site_activity(self) -> SiteActivity:
+        """Per-site activity including the inspections modified past plan_end"""
+        for site_id, created, modified in self.late.values():
+            self.count += 1
+            if site_id:
+                self.activity.record(site_id, created, modified)
+        self.late.clear()
+        return self.activity
+
+
+class FolderTree:
+    """Parent/child index over the directory folders."""
+
+    def __init__(self, folders: Iterable[Dict]):
+        self.parents: Dict[str, str] = {}
+        self.children: Dict[str, List[str]] = {}
+        for folder in folders:
+            folder_id = folder.get("id")
+            if folder_id:
+                self.parents[folder_id] = folder.get("parent_id") or ""
+        for folder_id, parent_id in self.parents.items():
+            if parent_id in self.parents:
+                self.children.setdefault(parent_id, []).append(folder_id)
+
+    def top_down(self) -> List[str]:
+        """Folder IDs reachable from a root, every parent before its children.
+
+        Folders caught in a parent cycle are unreachable and left out.
+        """
+        order = [
+            folder_id
+            for folder_id, parent_id in self.parents.items()
+            if parent_id not in self.parents
+        ]
+        # Breadth-first: the loop also visits the children appended to order
+        for folder_id in order:
+            order.extend(self.children.get(folder_id, ()))
+        return order
+
+    def rollup(self, activity: SiteActivity) -> SiteActivity:
+        """Activity of every folder including all folders below it.
+
+        Each folder's total is folded into its parent's once, children first,
+        so the whole tree is rolled up in one linear pass.
+        """
+        rolled = SiteActivity()
+        for folder_id in self.parents:
+            if folder_id in activity:
+                rolled.add(
+                    folder_id,
+                    activity.counts[folder_id],
+                    activity.first[folder_id],
+                    activity.last[folder_id],
+                )
+        for folder_id in reversed(self.top_down()):
+            parent_id = self.parents[folder_id]
+            if folder_id in rolled and parent_id in self.parents:
+                rolled.add(
+                    parent_id,
+                    rolled.counts[folder_id],
+                    rolled.first[folder_id],
+                    rolled.last[folder_id],
+                )
+        return rolled
+
+
+Inspections = Union[List[Dict], InspectionStore]
 
 
 class SafetyCultureAPI:
     """SafetyCulture API client."""
 
-    def __init__(self, max_concurrent_requests=25):
+    def __init__(
+        self, max_concurrent_requests=25, requests_per_second=REQUESTS_PER_SECOND
+    ):
         self.headers = {
             "accept": "application/json",
             "authorization": f"Bearer {TOKEN}",
@@ -22,6 +248,16 @@ class SafetyCultureAPI:
         self.max_concurrent_requests = max_concurrent_requests
         self.session = None
         self.semaphore = None
+        self.rate_limiter = AdaptiveRateLimiter(requests_per_second)
+        # Set when an inspection cursor chain stops on an error
+        self.inspections_incomplete = False
+        # Set when the folder listing stops on an error
+        self.sites_incomplete = False
+        # Opened by main when USE_CHECKPOINTS is set
+        self.checkpoint: Optional[FeedCheckpoint] = None
+        # When the current shard windows were planned; the last window is
+        # open-ended past it
+        self.plan_end: Optional[datetime] = None
 
     async def __aenter__(self):
         # Create session with connection pooling
@@ -43,31 +279,81 @@ class SafetyCultureAPI:
             await self.session.close()
 
     async def fetch_page(self, url: str) -> Dict:
-        """Fetch a single page from the API with rate limiting"""
-        async with self.semaphore:
-            try:
-                async with self.session.get(url) as response:
-                    response.raise_for_status()
-                    return await response.json()
-            except Exception as e:
-                print(f"❌ Error fetching {url}: {e}")
-                raise
-
-    async def fetch_all_inspections(self) -> List[Dict]:
-        """Fetch all inspections - sequential pagination with progress tracking"""
-        initial_url = f"{BASE_URL}/feed/inspections?archived=false&completed=both"
-        print("🚀 Starting inspection fetch...")
-
+        """Fetch a single page from the API with rate limiting and retries"""
+        for attempt in range(1, MAX_RETRIES + 1):
+            await self.rate_limiter.acquire()
+            async with self.semaphore:
+                try:
+                    async with self.session.get(url) as response:
+                        response.raise_for_status()
+                        data = await response.json()
+                        self.rate_limiter.on_success(response.headers)
+                        return data
+                except Exception as e:
+                    status = getattr(e, "status", None)
+                    retryable = status in RETRY_STATUSES or isinstance(
+                        e, (aiohttp.ClientConnectionError, asyncio.TimeoutError)
+                    )
+                    if not retryable or attempt == MAX_RETRIES:
+                        print(f"❌ Error fetching {url}: {e}")
+                        raise
+                    error = e
+                    headers = getattr(e, "headers", None) or {}
+                    retry_after = retry_after_seconds(headers.get("Retry-After"))
+
+            if status == 429:
+                # Slows every shard down together; acquire() waits out the pause
+                self.rate_limiter.on_throttle(retry_after)
+                print(
+                    f"⏳ Rate limited, slowing to {self.rate_limiter.rate:.1f} requests/sec"
+                )
+            else:
+                delay = retry_after if retry_after is not None else 2**attempt
+                print(
+                    f"⚠️  Retrying {url} in {delay:.1f}s ({attempt}/{MAX_RETRIES}): {error}"
+                )
+                await asyncio.sleep(delay)
+
+    async def fetch_inspection_chain(
+        self,
+        initial_url: str,
+        label: str = "Page",
+        name: str = INSPECTIONS_FEED,
+        store: Optional[InspectionStore] = None,
+    ) -> List[Dict]:
+        """Follow a single /feed/inspections cursor chain with progress tracking.
+
+        With a checkpoint open, every page is saved with the cursor after it;
+        a chain that stopped on an error in an earlier run is replayed from
+        its saved pages and continued from its last good cursor. With a store,
+        pages are added to it and the returned list stays empty.
+        """
         all_data = []
+        collect = store.add if store is not None else all_data.extend
+        total = 0
         url = initial_url
         page_count = 0
         start_time = time.time()
 
+        saved = self.checkpoint.resume(name, initial_url) if self.checkpoint else None
+        if saved:
+            for page in self.checkpoint.iter_pages(name):
+                collect(page)
+            total = saved["records"]
+            page_count = saved["pages"]
+            url = saved["next_url"]
+            print(
+                f"  ♻️  Resuming {name} from checkpoint: {total:,} records "
+                f"in {page_count} pages"
+            )
+        resumed_pages = page_count
+
         while url:
             try:
                 response = await self.fetch_page(url)
                 data = response.get("data", [])
-                all_data.extend(data)
+                collect(data)
+                total += len(data)
                 page_count += 1
 
                 # Get metadata for remaining records
@@ -76,7 +362,7 @@ class SafetyCultureAPI:
 
                 # Calculate time estimates
                 elapsed = time.time() - start_time
-                rate = page_count / elapsed if elapsed > 0 else 0
+                rate = (page_count - resumed_pages) / elapsed if elapsed > 0 else 0
 
                 if remaining_records > 0 and rate > 0:
                     remaining_pages = remaining_records / 25  # 25 records per page
@@ -89,7 +375,7 @@ class SafetyCultureAPI:
 
                 # Real-time logging for every page
                 print(
-                    f"  📄 Page {page_count}: {len(data)} records | Total: {len(all_data):,} | Remaining: {remaining_records:,} | Rate: {rate:.2f} pages/sec | ETA: {eta_str}"
+                    f"  📄 {label} {page_count}: {len(data)} records | Total: {total:,} | Remaining: {remaining_records:,} | Rate: {rate:.2f} pages/sec | ETA: {eta_str}"
                 )
 
                 # Get next page URL
@@ -98,20 +384,179 @@ class SafetyCultureAPI:
                     if not next_url.startswith("http"):
                         next_url = f"{BASE_URL}{next_url}"
                     url = next_url
+                    if self.checkpoint:
+                        self.checkpoint.save_page(name, initial_url, data, url)
                 else:
                     url = None
 
             except Exception as e:
-                print(f"❌ Error on page {page_count}: {e}")
-                break
+                print(f"❌ Error on {label.lower()} {page_count + 1}: {e}")
+                self.inspections_incomplete = True
+                if self.checkpoint and page_count:
+                    print(f"💾 Checkpoint kept for {name}; rerun to resume")
+                return all_data
+
+        if self.checkpoint:
+            self.checkpoint.complete(name)
+        return all_data
 
+    async def fetch_all_inspections(
+        self,
+        shards: int = 1,
+        modified_after: Optional[datetime] = None,
+        archived: str = "false",
+        compact: bool = False,
+    ) -> Inspections:
+        """Fetch all inspections, optionally as concurrent modified-date shards.
+
+        With compact set, returns an InspectionStore instead of the records.
+        """
+        print("🚀 Starting inspection fetch...")
+        start_time = time.time()
+        store = InspectionStore() if compact else None
+
+        if shards <= 1:
+            all_data = await self.fetch_inspection_chain(
+                build_inspections_url(modified_after, None, archived), store=store
+            )
+        else:
+            windows = await self.shard_windows(shards, modified_after, archived)
+            if store is not None:
+                # Only an inspection modified past the plan can be in two windows
+                store.plan_end = self.plan_end.timestamp()
+            # Incremental fetches must not reach back past the watermark
+            windows[0] = (modified_after, windows[0][1])
+            print(f"🧩 Fetching inspections in {len(windows)} modified-date shards")
+            shard_results = await asyncio.gather(
+                *[
+                    self.fetch_inspection_chain(
+                        build_inspections_url(after, before, archived),
+                        label=f"Shard {index}/{len(windows)} page",
+                        name=f"{INSPECTIONS_FEED} shard {index}/{len(windows)}",
+                        store=store,
+                    )
+                    for index, (after, before) in enumerate(windows, 1)
+                ]
+            )
+            all_data = merge_inspection_shards(shard_results)
+            if self.checkpoint and not self.inspections_incomplete:
+                self.checkpoint.clear_state(SHARD_PLAN_KEY)
+
+        if store is not None:
+            all_data = store
         elapsed = time.time() - start_time
-        rate = page_count / elapsed if elapsed > 0 else 0
         print(
-            f"🎉 Completed inspection fetch: {len(all_data):,} records from {page_count} pages in {elapsed:.1f}s ({rate:.1f} pages/sec)"
+            f"🎉 Completed inspection fetch: {len(all_data):,} records in {elapsed:.1f}s"
         )
         return all_data
 
+    async def shard_windows(
+        self, shards: int, modified_after: Optional[datetime], archived: str
+    ) -> List[tuple]:
+        """Modified-date windows for the shards, reused while shards are unfinished"""
+        if self.checkpoint:
+            saved = load_shard_plan(self.checkpoint.get_state(SHARD_PLAN_KEY))
+            shard_prefix = f"{INSPECTIONS_FEED} shard "
+            if saved and any(
+                name.startswith(shard_prefix) for name in self.checkpoint.pending()
+            ):
+                print("♻️  Reusing the shard windows of the interrupted run")
+                self.plan_end, boundaries = saved
+                return windows_from_boundaries(modified_after, boundaries)
+
+        self.plan_end = datetime.now(timezone.utc)
+        start = modified_after or FEED_START_DATE
+        try:
+            boundaries = await self.plan_shard_boundaries(
+                start, self.plan_end, shards, modified_after, archived
+            )
+        except Exception as e:
+            print(f"⚠️  Could not size shards by record count, using equal dates: {e}")
+            boundaries = equal_boundaries(start, self.plan_end, shards)
+        if self.checkpoint:
+            self.checkpoint.set_state(
+                SHARD_PLAN_KEY, dump_shard_plan(self.plan_end, boundaries)
+            )
+        return windows_from_boundaries(modified_after, boundaries)
+
+    async def count_window(
+        self, after: Optional[datetime], before: Optional[datetime], archived: str
+    ) -> int:
+        """Inspections in a modified-date window, read from its first page"""
+        response = await self.fetch_page(build_inspections_url(after, before, archived))
+        remaining = response.get("metadata", {}).get("remaining_records", 0)
+        return len(response.get("data", [])) + remaining
+
+    async def plan_shard_boundaries(
+        self,
+        start: datetime,
+        end: datetime,
+        shards: int,
+        modified_after: Optional[datetime],
+        archived: str,
+    ) -> List[datetime]:
+        """Dates that split the feed into shards of about equal record counts.
+
+        Date ranges holding more than half a shard's share are split into
+        SHARD_PROBE_FANOUT pieces and every piece is counted (concurrently),
+        so the dense recent end of the feed ends up finely divided. The
+        ranges are then merged in date order, cutting a shard each time the
+        running count passes the next multiple of the share.
+        """
+        total = await self.count_window(modified_after, None, archived)
+        target = total / shards
+        # (lower, upper, count); None bounds are open-ended
+        ranges = [(modified_after, None, total)]
+        for _ in range(SHARD_PROBE_ROUNDS):
+            pieces_per_range = []
+            for lower, upper, count in ranges:
+                low, high = lower or start, upper or end
+                if (
+                    count <= target / 2
+                    or high - low < MIN_SHARD_SPAN * SHARD_PROBE_FANOUT
+                ):
+                    pieces_per_range.append(None)
+                    continue
+                step = (high - low) / SHARD_PROBE_FANOUT
+                cuts = [low + step * i for i in range(1, SHARD_PROBE_FANOUT)]
+                pieces_per_range.append(list(zip([lower] + cuts, cuts + [upper])))
+            probes = [
+                piece for pieces in pieces_per_range if pieces for piece in pieces
+            ]
+            if not probes:
+                break
+            counts = iter(
+                await asyncio.gather(
+                    *[
+                        self.count_window(lower, upper, archived)
+                        for lower, upper in probes
+                    ]
+                )
+            )
+            refined = []
+            for current, pieces in zip(ranges, pieces_per_range):
+                if pieces is None:
+                    refined.append(current)
+                else:
+                    refined.extend(
+                        (lower, upper, next(counts)) for lower, upper in pieces
+                    )
+            ranges = refined
+
+        boundaries = []
+        running = 0
+        for _, upper, count in ranges[:-1]:
+            running += count
+            if len(boundaries) < shards - 1 and running >= target * (
+                len(boundaries) + 1
+            ):
+                boundaries.append(upper)
+        print(
+            f"🧮 Sized {len(boundaries) + 1} shard windows by record count "
+            f"(~{target:,.0f} inspections each)"
+        )
+        return boundaries
+
     async def fetch_all_sites(self) -> List[Dict]:
         """Fetch all folders (sites) using directory API"""
         initial_url = f"{BASE_URL}/directory/v1/folders?page_size=1500"
@@ -139,6 +584,7 @@ class SafetyCultureAPI:
 
             except Exception as e:
                 print(f"❌ Error on page {page_count}: {e}")
+                self.sites_incomplete = True
                 break
 
         elapsed = time.time() - start_time
@@ -148,33 +594,212 @@ class SafetyCultureAPI:
         return all_data
 
 
-def get_sites_with_activity(inspections: List[Dict]) -> Set[str]:
-    """Extract unique site IDs that have inspection activity"""
-    sites_with_activity = set()
+def equal_boundaries(start: datetime, end: datetime, shards: int) -> List[datetime]:
+    """Dates that split [start, end] into equal modified-date windows"""
+    step = (end - start) / shards
+    return [start + step * i for i in range(1, shards)]
+
 
-    for inspection in inspections:
-        site_id = inspection.get("site_id")
-        if site_id:
-            sites_with_activity.add(site_id)
+def windows_from_boundaries(
+    modified_after: Optional[datetime], boundaries: List[datetime]
+) -> List[tuple]:
+    """(after, before) windows between consecutive boundaries.
 
-    print(f"🎯 Found {len(sites_with_activity)} unique sites with inspection activity")
-    return sites_with_activity
+    The first window starts at modified_after (open-ended when None) and the
+    last has no upper bound, so no inspection falls outside the shards.
+    """
+    lower: List[Optional[datetime]] = [modified_after] + boundaries
+    upper: List[Optional[datetime]] = boundaries + [None]
+    return list(zip(lower, upper))
+
+
+def dump_shard_plan(end: datetime, boundaries: List[datetime]) -> str:
+    return json.dumps(
+        {"end": end.isoformat(), "boundaries": [b.isoformat() for b in boundaries]}
+    )
+
+
+def load_shard_plan(value: Optional[str]) -> Optional[Tuple[datetime, List[datetime]]]:
+    """Plan end time and boundaries saved by dump_shard_plan, or None"""
+    try:
+        plan = json.loads(value) if value else None
+        if not isinstance(plan, dict):
+            return None
+        return datetime.fromisoformat(plan["end"]), [
+            datetime.fromisoformat(boundary) for boundary in plan["boundaries"]
+        ]
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def build_inspections_url(
+    modified_after: Optional[datetime],
+    modified_before: Optional[datetime],
+    archived: str = "false",
+) -> str:
+    """Build the /feed/inspections URL for a single modified-date window"""
+    params = {"archived": archived, "completed": "both"}
+    if modified_after:
+        params["modified_after"] = modified_after.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+    if modified_before:
+        params["modified_before"] = modified_before.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+    return f"{BASE_URL}{INSPECTIONS_FEED}?{urlencode(params)}"
+
+
+async def sync_inspections_to_mirror(
+    api: SafetyCultureAPI, mirror: FeedMirror, compact: bool = False
+) -> Inspections:
+    """Pull inspections changed since the last run into the mirror and load it"""
+    sync_started = mirror.sync_started()
+    # A periodic full fetch drops inspections deleted since the last one
+    full = mirror.needs_full_resync(INSPECTIONS_FEED)
+    watermark = None if full else mirror.get_watermark(INSPECTIONS_FEED)
+    if watermark:
+        print(f"🪞 Syncing inspections modified since {watermark}")
+    elif mirror.get_watermark(INSPECTIONS_FEED):
+        print("🪞 Full resync of inspections to drop deleted records")
+
+    # Archived inspections are mirrored too, so archiving is picked up
+    # incrementally, and filtered out when reading
+    changed = await api.fetch_all_inspections(
+        INSPECTION_SHARDS,
+        modified_after=parse_timestamp(watermark) if watermark else None,
+        archived="both",
+    )
+    if api.inspections_incomplete:
+        mirror.upsert_records(INSPECTIONS_FEED, changed)
+        print("⚠️  Inspection sync incomplete, mirror watermark not advanced")
+    else:
+        if full:
+            removed = mirror.replace_records(INSPECTIONS_FEED, changed)
+            if removed:
+                print(f"🪞 Dropped {removed:,} deleted inspections from the mirror")
+        else:
+            mirror.upsert_records(INSPECTIONS_FEED, changed)
+        mirror.set_watermark(INSPECTIONS_FEED, sync_started, full=full)
+
+    inspections = (
+        inspection
+        for inspection in mirror.iter_records(INSPECTIONS_FEED)
+        if not inspection.get("archived")
+    )
+    if compact:
+        store = InspectionStore()
+        store.add(inspections)
+        inspections = store
+    else:
+        inspections = list(inspections)
+    print(f"🪞 Loaded {len(inspections):,} inspections from the feed mirror")
+    return inspections
+
+
+def merge_inspection_shards(shard_results: List[List[Dict]]) -> List[Dict]:
+    """Merge shard results, dropping inspections that moved between windows"""
+    merged = {}
+    for shard in shard_results:
+        for inspection in shard:
+            merged[inspection.get("id") or id(inspection)] = inspection
+    return list(merged.values())
+
+
+def get_site_activity(inspections: Inspections) -> SiteActivity:
+    """Index inspection counts and first/last activity per site in one pass"""
+    activity = SiteActivity()
+    if isinstance(inspections, InspectionStore):
+        activity = inspections.site_activity()
+    else:
+        for inspection in inspections:
+            site_id = inspection.get("site_id")
+            if site_id:
+                activity.record(
+                    site_id,
+                    timestamp_seconds(inspection.get("created_at")),
+                    timestamp_seconds(inspection.get("modified_at")),
+                )
+
+    print(f"🎯 Found {len(activity)} unique sites with inspection activity")
+    return activity
+
+
+def format_seconds(seconds: Optional[float]) -> str:
+    if not seconds:
+        return ""
+    return datetime.fromtimestamp(seconds, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def activity_row(
+    site: Dict, activity: SiteActivity, subtree: Optional[SiteActivity] = None
+) -> Dict:
+    """Copy of the site with its direct, and if given rolled-up, activity"""
+    site_id = site["id"]
+    row = dict(site)
+    row["inspection_count"] = activity.counts.get(site_id, 0)
+    row["first_activity"] = format_seconds(activity.first.get(site_id))
+    row["last_activity"] = format_seconds(activity.last.get(site_id))
+    if subtree is not None:
+        row["subtree_inspection_count"] = subtree.counts.get(site_id, 0)
+        row["subtree_first_activity"] = format_seconds(subtree.first.get(site_id))
+        row["subtree_last_activity"] = format_seconds(subtree.last.get(site_id))
+    return row
 
 
 def find_sites_without_activity(
-    sites: List[Dict], sites_with_activity: Set[str]
+    sites: List[Dict],
+    activity: SiteActivity,
+    staleness_days: Iterable[int] = STALENESS_DAYS,
+    now: Optional[float] = None,
+    subtree: Optional[SiteActivity] = None,
 ) -> List[Dict]:
-    """Find sites that don't have any inspection activity"""
+    """Find sites without inspection activity, ever or within staleness_days.
+
+    Without staleness windows only sites that never had an inspection are
+    returned. Otherwise every site idle for at least the shortest window is
+    returned with a no_activity_<N>d column per window.
+
+    Rows carry the site's inspection count and first and last activity when
+    windows are set or subtree is given. With subtree (see FolderTree.rollup),
+    sites are judged by the activity of their whole subtree and rows also get
+    the subtree_* activity columns; without either, rows are the sites as
+    they are.
+    """
+    now = time.time() if now is None else now
+    windows = sorted(staleness_days)
+    cutoffs = {days: now - days * SECONDS_PER_DAY for days in windows}
+    idle_counts = dict.fromkeys(windows, 0)
+    judged = subtree if subtree is not None else activity
     sites_without_activity = []
 
     for site in sites:
         site_id = site.get("id")
-        if site_id and site_id not in sites_with_activity:
-            sites_without_activity.append(site)
-
-    print(
-        f"📊 {len(sites_without_activity)} out of {len(sites)} sites have no inspection activity"
+        if not site_id:
+            continue
+        if not windows:
+            if site_id in judged:
+                continue
+            if subtree is None:
+                sites_without_activity.append(site)
+            else:
+                sites_without_activity.append(activity_row(site, activity, subtree))
+            continue
+
+        idle = {days: judged.idle_since(site_id, cutoffs[days]) for days in windows}
+        if not idle[windows[0]]:
+            continue
+        row = activity_row(site, activity, subtree)
+        for days in windows:
+            row[f"no_activity_{days}d"] = idle[days]
+            idle_counts[days] += idle[days]
+        sites_without_activity.append(row)
+
+    never_active = sum(
+        1 for site in sites if site.get("id") and site.get("id") not in judged
     )
+    print(f"📊 {never_active} out of {len(sites)} sites have no inspection activity")
+    for days in windows:
+        print(
+            f"📊 {idle_counts[days]} out of {len(sites)} sites have no inspection "
+            f"activity in the last {days} days"
+        )
     return sites_without_activity
 
 
@@ -211,6 +836,23 @@ def write_csv(data: List[Dict], filename: str):
     print(f"💾 Saved {len(data)} records to {filename}")
 
 
+async def fetch_inspections_and_sites(
+    api: SafetyCultureAPI,
+) -> Tuple[Inspections, List[Dict]]:
+    """Fetch inspections (or sync them through the mirror) and folders concurrently"""
+    sites_task = asyncio.create_task(api.fetch_all_sites())
+    if USE_FEED_MIRROR:
+        with FeedMirror() as mirror:
+            inspections_task = asyncio.create_task(
+                sync_inspections_to_mirror(api, mirror, COMPACT_INSPECTIONS)
+            )
+            return tuple(await asyncio.gather(inspections_task, sites_task))
+    inspections_task = asyncio.create_task(
+        api.fetch_all_inspections(INSPECTION_SHARDS, compact=COMPACT_INSPECTIONS)
+    )
+    return tuple(await asyncio.gather(inspections_task, sites_task))
+
+
 async def main():
     """Main execution function"""
     if not TOKEN:
@@ -220,21 +862,28 @@ async def main():
 
     print("🚀 Starting SafetyCulture Sites Without Activity Analysis")
     print("=" * 80)
-    print("📊 Expected runtime: ~25-30 minutes for ~69K inspections")
+    print(
+        f"📊 Fetching inspections in {INSPECTION_SHARDS} concurrent shard(s) "
+        "(~25-30 minutes for ~69K inspections when unsharded)"
+    )
     print("=" * 80)
 
     start_time = datetime.now()
 
-    async with SafetyCultureAPI(max_concurrent_requests=25) as api:
+    async with SafetyCultureAPI(
+        max_concurrent_requests=25, requests_per_second=REQUESTS_PER_SECOND
+    ) as api:
+        if USE_CHECKPOINTS:
+            api.checkpoint = FeedCheckpoint()
         # Fetch both inspections and sites concurrently
         print("🔄 Fetching inspections and sites concurrently...")
 
         fetch_start = time.time()
-        inspections_task = asyncio.create_task(api.fetch_all_inspections())
-        sites_task = asyncio.create_task(api.fetch_all_sites())
-
-        # Wait for both to complete
-        inspections, sites = await asyncio.gather(inspections_task, sites_task)
+        try:
+            inspections, sites = await fetch_inspections_and_sites(api)
+        finally:
+            if api.checkpoint:
+                api.checkpoint.close()
         fetch_time = time.time() - fetch_start
 
         print(f"⚡ Total fetch time: {fetch_time:.1f} seconds")
@@ -243,10 +892,19 @@ async def main():
     process_start = time.time()
 
     # Get sites that have inspection activity
-    sites_with_activity = get_sites_with_activity(inspections)
+    site_activity = get_site_activity(inspections)
+    subtree_activity = None
+    if ROLLUP_HIERARCHY:
+        subtree_activity = FolderTree(sites).rollup(site_activity)
+        print(
+            f"🌳 Rolled activity up the folder tree: {len(subtree_activity):,} "
+            "sites and areas have activity in their subtree"
+        )
 
     # Find sites without activity
-    sites_without_activity = find_sites_without_activity(sites, sites_with_activity)
+    sites_without_activity = find_sites_without_activity(
+        sites, site_activity, subtree=subtree_activity
+    )
     process_time = time.time() - process_start
 
     # Get next available output directory
@@ -256,7 +914,10 @@ async def main():
     print(f"\n💾 Saving results to {output_dir}/...")
     save_start = time.time()
     write_csv(sites_without_activity, f"{output_dir}/sites_without_activity.csv")
-    write_csv(inspections, f"{output_dir}/all_inspections.csv")
+    if COMPACT_INSPECTIONS:
+        print("ℹ️  COMPACT_INSPECTIONS is on; all_inspections.csv is not written")
+    else:
+        write_csv(inspections, f"{output_dir}/all_inspections.csv")
     write_csv(sites, f"{output_dir}/all_sites.csv")
     save_time = time.time() - save_start
 
@@ -269,8 +930,9 @@ async def main():
     print("=" * 80)
     print(f"🏢 Total Sites: {len(sites):,}")
     print(f"🔍 Total Inspections: {len(inspections):,}")
-    print(f"🎯 Sites with Activity: {len(sites_with_activity):,}")
-    print(f"⚪ Sites without Activity: {len(sites_without_activity):,}")
+    print(f"🎯 Sites with Activity: {len(site_activity):,}")
+    idle_label = f" in {min(STALENESS_DAYS)} days" if STALENESS_DAYS else ""
+    print(f"⚪ Sites without Activity{idle_label}: {len(sites_without_activity):,}")
     print(
         f"📊 Percentage without Activity: {(len(sites_without_activity)/len(sites)*100):.1f}%"
     )
@@ -281,6 +943,18 @@ async def main():
     print(f"  ⏱️  Total Runtime: {duration.total_seconds():.1f}s")
     print("=" * 80)
 
+    if api.inspections_incomplete or api.sites_incomplete:
+        print("\n⚠️  RESULTS ARE INCOMPLETE")
+        if api.inspections_incomplete:
+            print("  Inspection feed stopped on a failed request; sites listed as")
+            print("  inactive may have inspections that were not fetched")
+            if USE_CHECKPOINTS:
+                print("  Rerun the script to resume it from the saved checkpoint")
+        if api.sites_incomplete:
+            print(
+                "  Folder listing stopped on a failed request; some sites are missing"
+            )
+
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,177 @@
+"""
+Checks the folder tree rollup, the compact inspection store and the shard
+plan helpers used to find sites without activity.
+
+Run with: python -m pytest scripts/get_sites_without_activity
+"""
+
+import asyncio
+import importlib.util
+import os
+from datetime import datetime, timezone
+
+import pytest
+
+MAIN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+
+
+@pytest.fixture(scope="module")
+def sites_module():
+    spec = importlib.util.spec_from_file_location("sites_without_activity", MAIN_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def folders(*pairs):
+    return [{"id": folder_id, "parent_id": parent} for folder_id, parent in pairs]
+
+
+def activity(module, **sites):
+    """SiteActivity from site=(count, first, last) keyword arguments"""
+    result = module.SiteActivity()
+    for site_id, (count, first, last) in sites.items():
+        result.add(site_id, count, first, last)
+    return result
+
+
+def test_top_down_lists_parents_first_and_skips_cycles(sites_module):
+    tree = sites_module.FolderTree(
+        folders(
+            ("store", "region"),
+            ("region", None),
+            ("aisle", "store"),
+            ("loop_a", "loop_b"),
+            ("loop_b", "loop_a"),
+            ("orphan", "deleted-parent"),
+        )
+    )
+    order = tree.top_down()
+    assert sorted(order) == ["aisle", "orphan", "region", "store"]
+    assert order.index("region") < order.index("store") < order.index("aisle")
+
+
+def test_rollup_folds_children_into_every_ancestor(sites_module):
+    tree = sites_module.FolderTree(
+        folders(
+            ("region", ""),
+            ("store_1", "region"),
+            ("store_2", "region"),
+            ("aisle", "store_1"),
+            ("quiet", "region"),
+        )
+    )
+    rolled = tree.rollup(
+        activity(
+            sites_module,
+            region=(1, 500.0, 600.0),
+            aisle=(2, 100.0, 900.0),
+            store_2=(3, 0.0, 700.0),
+            # Not a folder in the tree
+            gone=(9, 1.0, 9999.0),
+        )
+    )
+    assert rolled.counts == {"region": 6, "aisle": 2, "store_1": 2, "store_2": 3}
+    assert rolled.first["region"] == 100.0
+    assert rolled.last["region"] == 900.0
+    assert rolled.first["store_1"] == 100.0
+    assert "quiet" not in rolled
+
+
+def test_idle_since(sites_module):
+    sites = activity(sites_module, busy=(1, 0.0, 200.0), unknown=(1, 0.0, 0.0))
+    assert not sites.idle_since("busy", 100.0)
+    assert sites.idle_since("busy", 300.0)
+    # Sites whose inspections have no modified time count as active
+    assert not sites.idle_since("unknown", 300.0)
+    assert sites.idle_since("never", 300.0)
+
+
+def inspection(inspection_id, site_id, modified_at):
+    return {
+        "id": inspection_id,
+        "site_id": site_id,
+        "created_at": "2023-01-01T00:00:00Z",
+        "modified_at": modified_at,
+    }
+
+
+def test_store_folds_pages_into_site_activity(sites_module):
+    store = sites_module.InspectionStore()
+    store.add(
+        [
+            inspection("a", "s1", "2023-03-01T00:00:00Z"),
+            inspection("b", "s1", "2023-02-01T00:00:00Z"),
+            inspection("c", None, "2023-02-01T00:00:00Z"),
+        ]
+    )
+    assert len(store) == 3
+    sites = store.site_activity()
+    assert sites.counts == {"s1": 2}
+    assert sites.last["s1"] == sites_module.timestamp_seconds("2023-03-01T00:00:00Z")
+
+
+def test_store_keeps_the_newest_version_modified_past_the_plan(sites_module):
+    plan_end = sites_module.timestamp_seconds("2024-01-01T00:00:00Z")
+    store = sites_module.InspectionStore(plan_end=plan_end)
+    store.add(
+        [
+            inspection("a", "s1", "2023-06-01T00:00:00Z"),
+            inspection("b", "s1", "2024-03-01T00:00:00Z"),
+        ]
+    )
+    # Returned again by a later page after moving to another site
+    store.add([inspection("b", "s2", "2024-02-01T00:00:00Z")])
+    store.add([inspection("b", "s2", "2024-04-01T00:00:00Z")])
+    assert len(store) == 2
+    sites = store.site_activity()
+    assert sites.counts == {"s1": 1, "s2": 1}
+    assert store.site_activity() is sites
+    assert len(store) == 2
+
+
+def test_windows_leave_both_ends_open(sites_module):
+    start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    end = datetime(2020, 1, 5, tzinfo=timezone.utc)
+    boundaries = sites_module.equal_boundaries(start, end, 4)
+    assert [boundary.day for boundary in boundaries] == [2, 3, 4]
+    windows = sites_module.windows_from_boundaries(None, boundaries)
+    assert windows[0] == (None, boundaries[0])
+    assert windows[-1] == (boundaries[-1], None)
+    assert len(windows) == 4
+
+
+def test_shard_plan_round_trip(sites_module):
+    end = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    boundaries = [datetime(2022, 1, 1, tzinfo=timezone.utc)]
+    saved = sites_module.dump_shard_plan(end, boundaries)
+    assert sites_module.load_shard_plan(saved) == (end, boundaries)
+    assert sites_module.load_shard_plan(None) is None
+    # Plans saved before the windows were sized by record count
+    assert sites_module.load_shard_plan(end.isoformat()) is None
+
+
+def test_shards_are_sized_by_record_count(sites_module, monkeypatch):
+    start = datetime(2015, 1, 1, tzinfo=timezone.utc)
+    end = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    # Every inspection was modified in the last year of the feed
+    busy = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    per_day = 100
+
+    async def count_window(self, after, before, archived):
+        lower = max(after or start, busy)
+        upper = before or end
+        return max(0.0, (upper - lower).total_seconds() / 86400 * per_day)
+
+    monkeypatch.setattr(sites_module.SafetyCultureAPI, "count_window", count_window)
+    api = sites_module.SafetyCultureAPI()
+    boundaries = asyncio.run(api.plan_shard_boundaries(start, end, 4, None, "false"))
+    windows = sites_module.windows_from_boundaries(None, boundaries)
+    counts = [
+        asyncio.run(count_window(api, after, before, "false"))
+        for after, before in windows
+    ]
+    assert len(windows) == 4
+    assert sum(counts) == pytest.approx(366 * per_day)
+    # Equal date spans would have left all of them in the last window
+    assert max(counts) < 0.35 * sum(counts)
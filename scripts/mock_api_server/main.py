@@ -0,0 +1,634 @@
+#!/usr/bin/env python3
+"""
+Local SafetyCulture API stand-in for load testing the scripts
+
+Serves synthetic, deterministic data for the endpoints the scripts call, with
+configurable latency, page sizes, dataset size and injected 429/5xx responses,
+so bulk runs can be exercised without touching a real organization.
+
+Usage:
+    python main.py --port 8080 --records 100000 --latency 0.05 --throttle-rate 0.02
+
+Then point any script at it:
+    SC_API_BASE_URL=http://127.0.0.1:8080 python main.py
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlencode
+
+from aiohttp import web
+
+BASE_TIME = datetime(2020, 1, 1, tzinfo=timezone.utc)
+# Synthetic records are modified this far apart, in index order, so
+# modified_after / modified_before windows map to index ranges
+MODIFIED_STEP = timedelta(minutes=7)
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+# Share of sites that never receive an inspection
+INACTIVE_SITE_SHARE = 0.2
+
+
+def record_uuid(kind: int, index: int) -> str:
+    """Deterministic UUID for the index-th record of a kind"""
+    return str(uuid.UUID(int=(kind << 96) | index))
+
+
+def feed_id(prefix: str, kind: int, index: int) -> str:
+    """Feed-style ID (e.g. user_<32 hex>) for a record"""
+    return f"{prefix}_{record_uuid(kind, index).replace('-', '')}"
+
+
+def timestamp(index: int) -> str:
+    return (BASE_TIME + MODIFIED_STEP * index).strftime(TIMESTAMP_FORMAT)
+
+
+def parse_time(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+class MockConfig:
+    """Server behavior and dataset size."""
+
+    def __init__(
+        self,
+        records: int = 10000,
+        sites: Optional[int] = None,
+        page_size: int = 100,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        throttle_rate: float = 0.0,
+        rate_limit: float = 0.0,
+        retry_after: float = 1.0,
+        error_rate: float = 0.0,
+        max_delete_ids: int = 2000,
+        seed: int = 0,
+    ):
+        """
+        Args:
+            records: Records in the issue, inspection and timeline feeds
+            sites: Folders in the directory (defaults to records / 10)
+            page_size: Records per feed page
+            latency: Seconds added to every response
+            jitter: Extra random seconds (0 to jitter) added to every response
+            throttle_rate: Share of requests answered with 429
+            rate_limit: Requests per second above which requests get 429 (0 = off)
+            retry_after: Retry-After seconds sent with injected 429s
+            error_rate: Share of requests answered with 503
+            max_delete_ids: IDs accepted per bulk delete before answering 413
+            seed: Seed for injected failures and latency jitter
+        """
+        self.records = records
+        self.sites = sites if sites is not None else max(1, records // 10)
+        self.users = max(1, records // 20)
+        self.groups = max(1, records // 200)
+        self.templates = max(1, records // 100)
+        self.asset_types = 50
+        self.page_size = page_size
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle_rate = throttle_rate
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.error_rate = error_rate
+        self.max_delete_ids = max_delete_ids
+        self.seed = seed
+
+
+class MockSafetyCulture:
+    """Synthetic dataset plus the state changed by create/delete requests."""
+
+    def __init__(self, config: MockConfig):
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.stats: Counter = Counter()
+        # Seconds spent on each request, injected latency included
+        self.latencies: List[float] = []
+        self.tokens = config.rate_limit
+        self.updated = time.monotonic()
+        # Mutations made by the scripts
+        self.created_folders: List[Dict] = []
+        self.deleted_folders = set()
+        self.folders: Optional[List[Dict]] = None
+        self.group_names = {self.group(index)["name"] for index in range(config.groups)}
+        self.created_groups: List[Dict] = []
+        self.upsert_jobs: Dict[str, Dict] = {}
+
+        self.feeds: Dict[str, tuple] = {
+            "issues": (config.records, self.issue),
+            "issue_timeline_items": (config.records * 2, self.timeline_item),
+            "issue_assignees": (config.records, self.assignee),
+            "inspections": (config.records, self.inspection),
+            "users": (config.users, self.user),
+            "groups": (config.groups, self.group),
+            "templates": (config.templates, self.template_summary),
+        }
+
+    # Synthetic records, generated from their index on demand
+
+    def issue(self, index: int) -> Dict:
+        completed = index % 3 == 0
+        return {
+            "id": feed_id("task", 1, index),
+            "task_id": record_uuid(1, index),
+            "unique_id": f"ISS-{index}",
+            "title": f"Issue {index}",
+            "description": f"Synthetic issue {index}",
+            "creator_id": feed_id("user", 5, index % self.config.users),
+            "creator_user_name": f"User {index % self.config.users}",
+            "created_at": timestamp(index),
+            "modified_at": timestamp(index),
+            "due_at": timestamp(index + 1000) if index % 2 else None,
+            "completed_at": timestamp(index + 100) if completed else None,
+            "status": "Complete" if completed else "Open",
+        }
+
+    def timeline_item(self, index: int) -> Dict:
+        issue = index % self.config.records
+        user = (issue + index) % self.config.users
+        return {
+            "task_id": record_uuid(1, issue),
+            "item_type": "TASK_STATUS_UPDATED" if index % 2 else "COMMENT_ADDED",
+            "timestamp": timestamp(index),
+            "modified_at": timestamp(index),
+            "creator_id": feed_id("user", 5, user),
+            "creator_name": f"User {user}",
+        }
+
+    def assignee(self, index: int) -> Dict:
+        if index % 5 == 0:
+            group = index % self.config.groups
+            return {
+                "issue_id": record_uuid(1, index),
+                "type": "group",
+                "group_name": f"Group {group}",
+                "modified_at": timestamp(index),
+            }
+        user = index % self.config.users
+        return {
+            "issue_id": record_uuid(1, index),
+            "type": "user",
+            "name": f"User {user}",
+            "modified_at": timestamp(index),
+        }
+
+    def inspection(self, index: int) -> Dict:
+        active_sites = max(1, int(self.config.sites * (1 - INACTIVE_SITE_SHARE)))
+        return {
+            "id": feed_id("audit", 3, index),
+            "name": f"Inspection {index}",
+            "site_id": record_uuid(2, index % active_sites),
+            "template_id": feed_id("template", 7, index % self.config.templates),
+            "archived": index % 50 == 0,
+            "created_at": timestamp(index),
+            "modified_at": timestamp(index),
+        }
+
+    def folder(self, index: int) -> Dict:
+        # Every tenth folder sits under the folder ten places before it
+        parent = record_uuid(2, index - 10) if index >= 10 and index % 10 == 0 else ""
+        return {
+            "id": record_uuid(2, index),
+            "name": f"Site {index}",
+            "parent_id": parent,
+            "meta_label": "location" if parent else "area",
+        }
+
+    def user(self, index: int) -> Dict:
+        return {
+            "id": feed_id("user", 5, index),
+            "firstname": "User",
+            "lastname": str(index),
+            "email": f"user{index}@example.com",
+            "modified_at": timestamp(index),
+        }
+
+    def group(self, index: int) -> Dict:
+        if index >= self.config.groups:
+            return self.created_groups[index - self.config.groups]
+        return {
+            "id": feed_id("role", 6, index),
+            "name": f"Group {index}",
+            "modified_at": timestamp(index),
+        }
+
+    def template_summary(self, index: int) -> Dict:
+        return {
+            "id": feed_id("template", 7, index),
+            "name": f"Template {index}",
+            "modified_at": timestamp(index),
+        }
+
+    def template_detail(self, index: int) -> Dict:
+        return {
+            "id": feed_id("template", 7, index),
+            "name": f"Template {index}",
+            "permissions": {
+                "owner": [
+                    {"id": record_uuid(5, index % self.config.users), "type": "USER"}
+                ],
+                "edit": [
+                    {"id": record_uuid(6, index % self.config.groups), "type": "ROLE"}
+                ],
+                "view": [
+                    {
+                        "id": record_uuid(5, (index + 1) % self.config.users),
+                        "type": "USER",
+                    }
+                ],
+            },
+        }
+
+    # Request handling
+
+    @web.middleware
+    async def middleware(self, request: web.Request, handler: Callable):
+        """Apply latency, authentication, throttling and injected errors"""
+        if request.path == "/__stats":
+            return await handler(request)
+        started = time.perf_counter()
+        config = self.config
+        delay = config.latency + (
+            self.random.uniform(0, config.jitter) if config.jitter else 0
+        )
+        if delay:
+            await asyncio.sleep(delay)
+
+        if not request.headers.get("Authorization", "").startswith("Bearer "):
+            response = web.json_response({"message": "unauthenticated"}, status=401)
+        elif self.over_rate_limit() or self.random.random() < config.throttle_rate:
+            response = web.json_response(
+                {"message": "too many requests"},
+                status=429,
+                headers={"Retry-After": f"{config.retry_after:g}"},
+            )
+        elif self.random.random() < config.error_rate:
+            response = web.json_response({"message": "unavailable"}, status=503)
+        else:
+            response = await handler(request)
+
+        route = request.match_info.route.resource
+        name = route.canonical if route is not None else request.path
+        self.stats[f"{request.method} {name} {response.status}"] += 1
+        self.stats["requests"] += 1
+        self.latencies.append(time.perf_counter() - started)
+        return response
+
+    def latency_percentile(self, percentile: float) -> Optional[float]:
+        """Request latency in milliseconds at the given percentile (0-100)"""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        rank = min(len(ordered) - 1, int(len(ordered) * percentile / 100))
+        return ordered[rank] * 1000
+
+    def reset_stats(self):
+        self.stats.clear()
+        self.latencies = []
+
+    def over_rate_limit(self) -> bool:
+        """Token bucket over all requests when --rate-limit is set"""
+        if not self.config.rate_limit:
+            return False
+        now = time.monotonic()
+        self.tokens = min(
+            self.config.rate_limit,
+            self.tokens + (now - self.updated) * self.config.rate_limit,
+        )
+        self.updated = now
+        if self.tokens < 1:
+            return True
+        self.tokens -= 1
+        return False
+
+    async def feed(self, request: web.Request) -> web.Response:
+        """GET /feed/{name} with next_page / remaining_records metadata"""
+        name = request.match_info["name"]
+        if name not in self.feeds:
+            return web.json_response({"message": f"unknown feed {name}"}, status=404)
+        size, make = self.feeds[name]
+        if name == "groups":
+            # Groups created through POST /groups follow the generated ones
+            size += len(self.created_groups)
+
+        # Records are in modified_at order, so date windows are index ranges
+        start, end = 0, size
+        after = parse_time(request.query.get("modified_after"))
+        before = parse_time(request.query.get("modified_before"))
+        if after:
+            start = max(start, int((after - BASE_TIME) / MODIFIED_STEP) + 1)
+        if before:
+            end = min(end, int((before - BASE_TIME) / MODIFIED_STEP) + 1)
+
+        offset = max(start, int(request.query.get("offset", start)))
+        page_end = min(end, offset + self.config.page_size)
+        data = [make(index) for index in range(offset, page_end)]
+        if name == "inspections" and request.query.get("archived", "false") == "false":
+            data = [record for record in data if not record["archived"]]
+
+        next_page = None
+        if page_end < end:
+            params = {
+                key: value for key, value in request.query.items() if key != "offset"
+            }
+            params["offset"] = page_end
+            next_page = f"/feed/{name}?{urlencode(params)}"
+        return web.json_response(
+            {
+                "count": len(data),
+                "data": data,
+                "metadata": {
+                    "next_page": next_page,
+                    "remaining_records": max(0, end - page_end),
+                },
+            }
+        )
+
+    def live_folders(self) -> List[Dict]:
+        """Generated plus created folders, minus deleted ones (rebuilt on change)"""
+        if self.folders is None:
+            folders = [self.folder(index) for index in range(self.config.sites)]
+            self.folders = [
+                folder
+                for folder in folders + self.created_folders
+                if folder["id"] not in self.deleted_folders
+            ]
+        return self.folders
+
+    async def list_folders(self, request: web.Request) -> web.Response:
+        """GET /directory/v1/folders paged with page_token"""
+        page_size = int(request.query.get("page_size", 1000))
+        offset = int(request.query.get("page_token") or 0)
+        folders = self.live_folders()
+        page = folders[offset : offset + page_size]
+        next_offset = offset + page_size
+        return web.json_response(
+            {
+                "folders": page,
+                "next_page_token": (
+                    str(next_offset) if next_offset < len(folders) else ""
+                ),
+            }
+        )
+
+    async def create_folder(self, request: web.Request) -> web.Response:
+        """POST /directory/v1/folder"""
+        body = await request.json()
+        folder = {
+            "id": str(uuid.uuid4()),
+            "name": body.get("name", ""),
+            "parent_id": body.get("parent_id", ""),
+            "meta_label": body.get("meta_label", ""),
+        }
+        self.created_folders.append(folder)
+        self.folders = None
+        return web.json_response({"folder": folder})
+
+    async def delete_folders(self, request: web.Request) -> web.Response:
+        """DELETE /directory/v1/folders?folder_ids=..."""
+        folder_ids = [
+            folder_id
+            for value in request.query.getall("folder_ids", [])
+            for folder_id in value.split(",")
+            if folder_id
+        ]
+        if len(folder_ids) > self.config.max_delete_ids:
+            return web.json_response({"message": "too many ids"}, status=413)
+        known = {folder["id"] for folder in self.live_folders()}
+        missing = [folder_id for folder_id in folder_ids if folder_id not in known]
+        if not folder_ids or missing:
+            return web.json_response(
+                {"message": f"folders not found: {', '.join(missing)}"}, status=404
+            )
+        self.deleted_folders.update(folder_ids)
+        self.folders = None
+        return web.json_response({})
+
+    async def create_group(self, request: web.Request) -> web.Response:
+        """POST /groups"""
+        name = (await request.json()).get("name", "")
+        if name in self.group_names:
+            return web.json_response(
+                {"message": f"group {name} already exists"}, status=400
+            )
+        group = {
+            "id": f"role_{uuid.uuid4().hex}",
+            "name": name,
+            "modified_at": timestamp(self.config.groups + len(self.created_groups)),
+        }
+        self.group_names.add(name)
+        self.created_groups.append(group)
+        return web.json_response(group)
+
+    async def template_detail_handler(self, request: web.Request) -> web.Response:
+        """GET /templates/v1/templates/{id}"""
+        template_id = request.match_info["template_id"]
+        try:
+            index = int(template_id.split("_")[-1].replace("-", ""), 16) & (2**96 - 1)
+        except ValueError:
+            index = self.config.templates
+        if index >= self.config.templates:
+            return web.json_response({"message": "template not found"}, status=404)
+        return web.json_response({"template": self.template_detail(index)})
+
+    async def archive_template(self, request: web.Request) -> web.Response:
+        """POST /templates/v1/templates/{id}/archive"""
+        return web.json_response({})
+
+    async def archive_asset(self, request: web.Request) -> web.Response:
+        """PATCH /assets/v1/assets/{id}/archive"""
+        return web.json_response({"asset": {"id": request.match_info["asset_id"]}})
+
+    async def list_asset_types(self, request: web.Request) -> web.Response:
+        """POST /assets/v1/types/list paged with page_token"""
+        body = await request.json() if request.can_read_body else {}
+        page_size = int(body.get("page_size", 100))
+        offset = int(body.get("page_token") or 0)
+        types = [
+            {
+                "id": record_uuid(8, index),
+                "name": f"Asset type {index}",
+                "type": "TYPE_CATEGORY_ASSET",
+            }
+            for index in range(offset, min(self.config.asset_types, offset + page_size))
+        ]
+        next_offset = offset + page_size
+        return web.json_response(
+            {
+                "type_list": types,
+                "page_token": (
+                    str(next_offset) if next_offset < self.config.asset_types else ""
+                ),
+            }
+        )
+
+    async def delete_actions(self, request: web.Request) -> web.Response:
+        """POST /tasks/v1/actions/delete with {"ids": [...]}"""
+        ids = (await request.json()).get("ids", [])
+        if len(ids) > self.config.max_delete_ids:
+            return web.json_response({"message": "too many ids"}, status=413)
+        return web.json_response({})
+
+    async def shared_link(self, request: web.Request) -> web.Response:
+        """POST /tasks/v1/shared_link/{id}/web_report"""
+        issue_id = request.match_info["issue_id"]
+        return web.json_response(
+            {"url": f"https://app.safetyculture.com/report/issues/{issue_id}/shared"}
+        )
+
+    async def set_inspection_site(self, request: web.Request) -> web.Response:
+        """PUT /inspections/v1/inspections/{id}/site"""
+        site_id = (await request.json()).get("site_id")
+        return web.json_response(
+            {"audit_id": request.match_info["audit_id"], "site_id": site_id}
+        )
+
+    async def create_upsert_job(self, request: web.Request) -> web.Response:
+        """POST /users/v1/users/upsert/jobs"""
+        users = (await request.json()).get("users", [])
+        job_id = str(uuid.uuid4())
+        self.upsert_jobs[job_id] = {
+            "job_id": job_id,
+            "status": "CREATED",
+            "users": len(users),
+        }
+        return web.json_response({"job_id": job_id})
+
+    async def start_upsert_job(self, request: web.Request) -> web.Response:
+        """POST /users/v1/users/upsert/jobs/{id}"""
+        job = self.upsert_jobs.get(request.match_info["job_id"])
+        if job is None:
+            return web.json_response({"message": "job not found"}, status=404)
+        job["status"] = "COMPLETED"
+        return web.json_response({"job_id": job["job_id"]})
+
+    async def get_upsert_job(self, request: web.Request) -> web.Response:
+        """GET /users/v1/users/upsert/jobs/{id}"""
+        job = self.upsert_jobs.get(request.match_info["job_id"])
+        if job is None:
+            return web.json_response({"message": "job not found"}, status=404)
+        return web.json_response(job)
+
+    async def get_stats(self, request: web.Request) -> web.Response:
+        """GET /__stats: request counts by route and status, plus p50/p99 latency"""
+        stats = dict(self.stats)
+        stats["latency_p50_ms"] = self.latency_percentile(50)
+        stats["latency_p99_ms"] = self.latency_percentile(99)
+        return web.json_response(stats)
+
+
+def build_app(config: MockConfig) -> web.Application:
+    """Create the mock API application"""
+    api = MockSafetyCulture(config)
+    app = web.Application(middlewares=[api.middleware])
+    app["api"] = api
+    app.router.add_get("/__stats", api.get_stats)
+    app.router.add_get("/feed/{name}", api.feed)
+    app.router.add_get("/directory/v1/folders", api.list_folders)
+    app.router.add_delete("/directory/v1/folders", api.delete_folders)
+    app.router.add_post("/directory/v1/folder", api.create_folder)
+    app.router.add_post("/groups", api.create_group)
+    app.router.add_get(
+        "/templates/v1/templates/{template_id}", api.template_detail_handler
+    )
+    app.router.add_post(
+        "/templates/v1/templates/{template_id}/archive", api.archive_template
+    )
+    app.router.add_patch("/assets/v1/assets/{asset_id}/archive", api.archive_asset)
+    app.router.add_post("/assets/v1/types/list", api.list_asset_types)
+    app.router.add_post("/tasks/v1/actions/delete", api.delete_actions)
+    app.router.add_post("/tasks/v1/shared_link/{issue_id}/web_report", api.shared_link)
+    app.router.add_put(
+        "/inspections/v1/inspections/{audit_id}/site", api.set_inspection_site
+    )
+    app.router.add_post("/users/v1/users/upsert/jobs", api.create_upsert_job)
+    app.router.add_post("/users/v1/users/upsert/jobs/{job_id}", api.start_upsert_job)
+    app.router.add_get("/users/v1/users/upsert/jobs/{job_id}", api.get_upsert_job)
+    return app
+
+
+def main():
+    """Parse command line arguments and serve the mock API."""
+    parser = argparse.ArgumentParser(
+        description="Local SafetyCulture API stand-in for load testing the scripts"
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address")
+    parser.add_argument("--port", type=int, default=8080, help="Port (default 8080)")
+    parser.add_argument(
+        "--records",
+        type=int,
+        default=10000,
+        help="Records in the issue, inspection and timeline feeds (default 10000)",
+    )
+    parser.add_argument(
+        "--sites", type=int, help="Folders in the directory (default records / 10)"
+    )
+    parser.add_argument(
+        "--page-size", type=int, default=100, help="Records per feed page (default 100)"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Seconds added to every response"
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=0.0, help="Random extra latency, in seconds"
+    )
+    parser.add_argument(
+        "--throttle-rate",
+        type=float,
+        default=0.0,
+        help="Share of requests answered with 429 (0-1)",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=0.0,
+        help="Requests per second above which requests get 429 (default off)",
+    )
+    parser.add_argument(
+        "--retry-after",
+        type=float,
+        default=1.0,
+        help="Retry-After seconds sent with 429 responses (default 1)",
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="Share of requests answered with 503 (0-1)",
+    )
+    parser.add_argument(
+        "--max-delete-ids",
+        type=int,
+        default=2000,
+        help="Action IDs accepted per bulk delete before 413 (default 2000)",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    config = MockConfig(
+        records=args.records,
+        sites=args.sites,
+        page_size=args.page_size,
+        latency=args.latency,
+        jitter=args.jitter,
+        throttle_rate=args.throttle_rate,
+        rate_limit=args.rate_limit,
+        retry_after=args.retry_after,
+        error_rate=args.error_rate,
+        max_delete_ids=args.max_delete_ids,
+        seed=args.seed,
+    )
+    print(f"Mock SafetyCulture API on http://{args.host}:{args.port}")
+    print(f"  export SC_API_BASE_URL=http://{args.host}:{args.port}")
+    web.run_app(build_app(config), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
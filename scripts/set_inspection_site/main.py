@@ -1,51 +1,119 @@
+import asyncio
 import os
+import sys
+from collections import Counter
 
 import pandas as pd
-import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.api_client import ApiClient, ApiError, run_bounded  # noqa: E402
+from common.journal import OperationJournal, journal_path  # noqa: E402
+from common.output_log import CsvOutputLog  # noqa: E402
 
 TOKEN = ''
+MAX_CONCURRENCY = 10  # Site assignment requests in flight at once
+INPUT_FILE = 'input.csv'
+# Applied assignments, so a rerun skips them; one journal per script and input file
+JOURNAL_FILE = journal_path(__file__, INPUT_FILE)
+OUTPUT_FILE = 'output.csv'
 
 
 def read_csv():
-    df = pd.read_csv('input.csv').fillna('')
+    df = pd.read_csv(INPUT_FILE).fillna('')
     csv = df.to_dict('records')
     return csv
 
 
-def set_inspection_site(audit_id, site_id, count):
+def latest_assignments(csv):
+    """Split rows into the last assignment per inspection and the rows it replaces.
+
+    Requests run concurrently, so two rows for one inspection could land in
+    either order; only the last row is sent, as a one-at-a-time run would
+    have left it.
+    """
+    latest = {}
+    for count, row in enumerate(csv):
+        latest[row['audit_id']] = count
+    assignments, superseded = [], []
+    for count, row in enumerate(csv):
+        if latest[row['audit_id']] == count:
+            assignments.append((count, row))
+        else:
+            superseded.append((count, row, latest[row['audit_id']]))
+    return assignments, superseded
+
+
+async def set_inspection_site(client, journal, audit_id, site_id, count):
+    # Keyed on the pair so changing an inspection's site in input.csv reapplies it
+    key = f"{audit_id}:{site_id}"
     try:
-        url = f"https://api.safetyculture.io/inspections/v1/inspections/{audit_id}/site"
         payload = {"site_id": site_id}
-        headers = {
-            "accept": "application/json",
-            "content-type": "application/json",
-            "authorization": f"Bearer {TOKEN}",
-        }
-        response = requests.put(url, json=payload, headers=headers)
-        response.raise_for_status()
+        await client.put(f"/inspections/v1/inspections/{audit_id}/site", json=payload)
+        journal.complete(key)
         status = f"#{count} - Successfully assigned {site_id} to {audit_id}"
         print(status)
-        return status
-    except requests.exceptions.RequestException as error:
+        return True, status
+    except ApiError as error:
+        journal.fail(key, error=str(error))
         status = f"#{count} - ERROR assigning {site_id} to {audit_id}: {error}"
         print(status)
-        return status
+        return False, status
+
+
+async def set_inspection_sites(assignments, journal, output):
+    """Send every assignment and return per-site (assigned, failed) counts"""
+    assigned, failed = Counter(), Counter()
+    async with ApiClient(TOKEN, max_concurrency=MAX_CONCURRENCY) as client:
+
+        async def assign_row(_, entry):
+            count, row = entry
+            audit_id = row['audit_id']
+            site_id = row['site_id']
+            if journal.is_done(f"{audit_id}:{site_id}"):
+                return
+            ok, status = await set_inspection_site(
+                client, journal, audit_id, site_id, count
+            )
+            (assigned if ok else failed)[site_id] += 1
+            output.write({"audit_id": audit_id, "site_id": site_id, "status": status})
+
+        await run_bounded(assign_row, assignments, MAX_CONCURRENCY)
+    return assigned, failed
 
 
 def main():
     csv = read_csv()
-    count = 0
-    for row in csv:
-        audit_id = row['audit_id']
-        site_id = row['site_id']
-        status = set_inspection_site(audit_id, site_id, count)
-        df = pd.DataFrame(
-            {"audit_id": [audit_id], "site_id": [site_id], "status": [status]}
+    journal = OperationJournal(JOURNAL_FILE, input_file=INPUT_FILE)
+    if journal.moved_to:
+        print(f"{INPUT_FILE} changed, moved the old journal to {journal.moved_to}")
+    if journal.resumed:
+        print(f"Resuming from {JOURNAL_FILE}: {journal.summary()}")
+    assignments, superseded = latest_assignments(csv)
+    with CsvOutputLog(OUTPUT_FILE, ['audit_id', 'site_id', 'status']) as output:
+        for count, row, latest in superseded:
+            status = (
+                f"#{count} - SKIPPED {row['site_id']} for {row['audit_id']}: "
+                f"superseded by row #{latest}"
+            )
+            print(status)
+            output.write(
+                {
+                    "audit_id": row['audit_id'],
+                    "site_id": row['site_id'],
+                    "status": status,
+                }
+            )
+        assigned, failed = asyncio.run(
+            set_inspection_sites(assignments, journal, output)
         )
-        df.to_csv(
-            'output.csv', mode='a', header=not os.path.exists('output.csv'), index=False
-        )
-        count += 1
+    journal.finish()
+
+    print(
+        f"Assigned {sum(assigned.values())} inspections to {len(assigned)} sites, "
+        f"{sum(failed.values())} failed, {len(superseded)} superseded rows skipped"
+    )
+    for site_id, errors in failed.most_common(10):
+        print(f"  {site_id}: {errors} failed, {assigned[site_id]} assigned")
 
 
 main()
@@ -1,5 +1,12 @@
+import asyncio
+import json
+import os
+import sys
+
 import pandas as pd
-import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.api_client import ApiClient, ApiError  # noqa: E402
 
 TOKEN = ''
 
@@ -25,52 +32,42 @@ def map_csv(csv):
     return mapped
 
 
-def initialize_update(users):
+async def initialize_update(client, users):
     try:
-        url = "https://api.safetyculture.io/users/v1/users/upsert/jobs"
         payload = {"users": users}
-        headers = {
-            "accept": "application/json",
-            "content-type": "application/json",
-            "authorization": f"Bearer {TOKEN}",
-        }
-        response = requests.post(url, json=payload, headers=headers)
-        response.raise_for_status()
-        job_id = response.json()['job_id']
+        response = await client.post("/users/v1/users/upsert/jobs", json=payload)
+        job_id = response['job_id']
         print(f"Successfully Initialized {job_id}")
         return job_id
-    except requests.exceptions.RequestException as error:
+    except ApiError as error:
         print(f'ERROR - {error}')
         return None
 
 
-def start_update(job):
-    url = f"https://api.safetyculture.io/users/v1/users/upsert/jobs/{job}"
+async def start_update(client, job):
     payload = {"origin": {"source": "SOURCE_UNSPECIFIED"}, "validate_only": True}
-    headers = {
-        "accept": "application/json",
-        "content-type": "application/json",
-        "authorization": f"Bearer {TOKEN}",
-    }
-    response = requests.post(url, json=payload, headers=headers)
-    job_id = response.json()['job_id']
+    response = await client.post(f"/users/v1/users/upsert/jobs/{job}", json=payload)
+    job_id = response['job_id']
     return job_id
 
 
-def get_job(job_id):
-    url = f"https://api.safetyculture.io/users/v1/users/upsert/jobs/{job_id}"
-    headers = {"accept": "application/json", "authorization": f"Bearer {TOKEN}"}
-    response = requests.get(url, headers=headers)
-    print(response.text)
+async def get_job(client, job_id):
+    response = await client.get(f"/users/v1/users/upsert/jobs/{job_id}")
+    print(json.dumps(response))
+
+
+async def update_user_sites(mapped):
+    async with ApiClient(TOKEN) as client:
+        job = await initialize_update(client, mapped)
+        result_id = await start_update(client, job)
+        await get_job(client, result_id)
 
 
 def main():
     csv = read_csv()
     mapped = list(map_csv(csv))
     print(mapped[0])
-    job = initialize_update(mapped)
-    result_id = start_update(job)
-    get_job(result_id)
+    asyncio.run(update_user_sites(mapped))
 
 
 main()